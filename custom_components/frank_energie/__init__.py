@@ -1,16 +1,38 @@
 """The Frank Energie component."""
 from __future__ import annotations
 
+import asyncio
+import logging
+
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import CONF_ACCESS_TOKEN, Platform, CONF_TOKEN
 from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import ConfigEntryAuthFailed
 from homeassistant.helpers.aiohttp_client import async_get_clientsession
-from python_frank_energie import FrankEnergie
+import homeassistant.helpers.config_validation as cv
+from homeassistant.helpers.typing import ConfigType
+from python_frank_energie.exceptions import AuthException, RequestException
+from python_frank_energie.models import Me
 
-from .const import CONF_COORDINATOR, DOMAIN
+from .auth import TokenManager
+from .const import CONF_COORDINATOR, CONF_SITE_REFERENCE, CONF_SITES, DOMAIN
 from .coordinator import FrankEnergieCoordinator
+from .metrics import CoordinatorMetrics, InstrumentedFrankEnergie
+from .resilience import ResilientFrankEnergie
+from .services import async_setup_services
+from .storage import FrankEnergieStore, UsageCheckpointStore
+
+LOGGER = logging.getLogger(__name__)
+
+PLATFORMS = [Platform.BINARY_SENSOR, Platform.SENSOR]
 
-PLATFORMS = [Platform.SENSOR]
+CONFIG_SCHEMA = cv.config_entry_only_config_schema(DOMAIN)
+
+
+async def async_setup(hass: HomeAssistant, config: ConfigType) -> bool:
+    """Set up the services of the Frank Energie component."""
+    async_setup_services(hass)
+    return True
 
 
 async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
@@ -20,40 +42,38 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     if entry.unique_id is None or entry.unique_id == "frank_energie_component":
         hass.config_entries.async_update_entry(entry, unique_id=str("frank_energie"))
 
-    # Select site-reference, or find first one that has status 'IN_DELIVERY' if not set
-    if entry.data.get("site_reference") is None and entry.data.get(CONF_ACCESS_TOKEN) is not None:
-        api = FrankEnergie(
-            clientsession=async_get_clientsession(hass),
-            auth_token=entry.data.get(CONF_ACCESS_TOKEN, None),
-            refresh_token=entry.data.get(CONF_TOKEN, None),
-        )
-        me = await api.me()
-
-        # filter out all sites that are not in delivery
-        me.deliverySites = [site for site in me.deliverySites if site.status == "IN_DELIVERY"]
-
-        if len(me.deliverySites) == 0:
-            raise Exception("No suitable sites found for this account")
-
-        site = me.deliverySites[0]
-        hass.config_entries.async_update_entry(entry, data={**entry.data, "site_reference": site.reference})
-
-        # Update title
-        title = f"{site.address_street} {site.address_houseNumber}"
-        if site.address_houseNumberAddition is not None:
-            title += f" {site.address_houseNumberAddition}"
-        hass.config_entries.async_update_entry(entry, title=title)
-
-    # Initialise the coordinator and save it as domain-data
-    api = FrankEnergie(
+    # A single client is used for everything, so all requests share the same connection, are measured
+    # and are retried when the network fails
+    api = ResilientFrankEnergie(
+        CoordinatorMetrics(),
         clientsession=async_get_clientsession(hass),
         auth_token=entry.data.get(CONF_ACCESS_TOKEN, None),
         refresh_token=entry.data.get(CONF_TOKEN, None),
     )
-    frank_coordinator = FrankEnergieCoordinator(hass, entry, api)
+    tokens = TokenManager(hass, entry, api)
+
+    # The sites of the account are cached in the entry. They're needed before the first refresh only
+    # when they haven't been looked up before, otherwise they're revalidated during the first refresh.
+    sites_refresh: asyncio.Task[bool] | None = None
+    if api.is_authenticated:
+        if entry.data.get(CONF_SITES) is None:
+            await async_update_sites(hass, entry, api, tokens)
+        else:
+            sites_refresh = entry.async_create_background_task(
+                hass, async_refresh_sites(hass, entry, api, tokens), "frank_energie_refresh_sites"
+            )
 
-    # Fetch initial data, so we have data when entities subscribe and set up the platform
-    await frank_coordinator.async_config_entry_first_refresh()
+    # Initialise the coordinator and save it as domain-data
+    frank_coordinator = FrankEnergieCoordinator(hass, entry, api, tokens)
+
+    # Use the data of the previous run when it's still usable and revalidate it in the background,
+    # otherwise fetch initial data, so we have data when entities subscribe and set up the platform
+    if await frank_coordinator.async_load_cached_data():
+        entry.async_create_background_task(
+            hass, frank_coordinator.async_refresh(), "frank_energie_revalidate"
+        )
+    else:
+        await frank_coordinator.async_config_entry_first_refresh()
     hass.data.setdefault(DOMAIN, {})
     hass.data[DOMAIN][entry.entry_id] = {
         CONF_COORDINATOR: frank_coordinator,
@@ -61,9 +81,89 @@ async def async_setup_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
 
     await hass.config_entries.async_forward_entry_setups(entry, PLATFORMS)
 
+    entry.async_on_unload(entry.add_update_listener(async_update_options))
+
+    # A single timer lets all entities update their state at each slot boundary
+    entry.async_on_unload(frank_coordinator.async_start_slot_updates())
+
+    # Renew the authentication tokens before they expire
+    if api.is_authenticated:
+        entry.async_on_unload(tokens.async_start())
+
+    if sites_refresh is not None:
+        entry.async_create_background_task(
+            hass, async_reload_on_sites_change(hass, entry, sites_refresh), "frank_energie_reload_on_sites_change"
+        )
+
     return True
 
 
+async def async_update_sites(
+    hass: HomeAssistant, entry: ConfigEntry, api: InstrumentedFrankEnergie, tokens: TokenManager
+) -> bool:
+    """Store all sites of the account that are in delivery in the entry.
+
+    Returns whether the sites differ from the ones that were stored before.
+    """
+    await tokens.async_ensure_valid()
+    me = await api.me()
+
+    # filter out all sites that are not in delivery
+    sites = {site.reference: site_title(site) for site in me.deliverySites if site.status == "IN_DELIVERY"}
+
+    if len(sites) == 0 and entry.data.get(CONF_SITE_REFERENCE) is None:
+        raise Exception("No suitable sites found for this account")
+
+    # A site that was selected before remains the primary site, so its entities keep their IDs
+    site_reference = entry.data.get(CONF_SITE_REFERENCE) or next(iter(sites))
+    sites = {site_reference: sites.get(site_reference, entry.title), **sites}
+    changed = sites != entry.data.get(CONF_SITES)
+
+    # Update title when the primary site is selected for the first time
+    if entry.data.get(CONF_SITE_REFERENCE) is None:
+        hass.config_entries.async_update_entry(entry, title=sites[site_reference])
+
+    hass.config_entries.async_update_entry(
+        entry, data={**entry.data, CONF_SITE_REFERENCE: site_reference, CONF_SITES: sites}
+    )
+
+    return changed
+
+
+async def async_refresh_sites(
+    hass: HomeAssistant, entry: ConfigEntry, api: InstrumentedFrankEnergie, tokens: TokenManager
+) -> bool:
+    """Revalidate the cached sites of the account, returns whether they've changed."""
+    try:
+        return await async_update_sites(hass, entry, api, tokens)
+    except (AuthException, ConfigEntryAuthFailed, RequestException, ValueError) as ex:
+        # The cached sites remain in use, they're looked up again on the next setup
+        LOGGER.debug("Failed to refresh the sites of the account: %s", ex)
+        return False
+
+
+async def async_reload_on_sites_change(
+    hass: HomeAssistant, entry: ConfigEntry, sites_refresh: asyncio.Task[bool]
+) -> None:
+    """Reload the entry once it's set up, when the refreshed sites differ from the cached ones."""
+    if await sites_refresh:
+        LOGGER.info("The sites of the account have changed, reloading")
+        hass.async_create_task(hass.config_entries.async_reload(entry.entry_id))
+
+
+def site_title(site: Me.DeliverySites) -> str:
+    """Return the title of a site, based on its address."""
+    title = f"{site.address_street} {site.address_houseNumber}"
+    if site.address_houseNumberAddition is not None:
+        title += f" {site.address_houseNumberAddition}"
+    return title
+
+
+async def async_update_options(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Let the entities pick up changed options."""
+    hass.data[DOMAIN][entry.entry_id][CONF_COORDINATOR].async_options_updated()
+
+
 async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
     """Unload a config entry."""
     unload_ok = await hass.config_entries.async_unload_platforms(entry, PLATFORMS)
@@ -71,3 +171,9 @@ async def async_unload_entry(hass: HomeAssistant, entry: ConfigEntry) -> bool:
         hass.data[DOMAIN].pop(entry.entry_id)
 
     return unload_ok
+
+
+async def async_remove_entry(hass: HomeAssistant, entry: ConfigEntry) -> None:
+    """Remove the cached data and import checkpoints of a config entry."""
+    await FrankEnergieStore(hass, entry.entry_id).async_remove()
+    await UsageCheckpointStore(hass, entry.entry_id).async_remove()
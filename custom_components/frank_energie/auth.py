@@ -0,0 +1,130 @@
+"""Renewal of the authentication tokens of a Frank Energie config entry."""
+from __future__ import annotations
+
+import asyncio
+import logging
+from datetime import datetime, timezone
+
+import jwt
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_ACCESS_TOKEN, CONF_TOKEN
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
+from homeassistant.exceptions import ConfigEntryAuthFailed
+from homeassistant.helpers.event import async_track_point_in_utc_time
+from homeassistant.util import utcnow
+from python_frank_energie import FrankEnergie
+from python_frank_energie.exceptions import AuthException
+
+from .const import TOKEN_RENEW_MARGIN
+
+LOGGER = logging.getLogger(__name__)
+
+
+class TokenManager:
+    """Keeps the authentication tokens of the API client valid.
+
+    The tokens are renewed shortly before they expire, so requests don't fail on expired tokens.
+    All callers share a single renewal, when several need one at the same time.
+    """
+
+    def __init__(self, hass: HomeAssistant, entry: ConfigEntry, api: FrankEnergie) -> None:
+        """Initialize the token manager."""
+        self.hass = hass
+        self.entry = entry
+        self.api = api
+        self._renewal: asyncio.Task[None] | None = None
+        self._started = False
+        self._unsub_timer: CALLBACK_TYPE | None = None
+
+    @property
+    def expires_at(self) -> datetime | None:
+        """Moment the current authentication token expires, if known."""
+        if not self.api.is_authenticated:
+            return None
+
+        # The token the client was created with or renewed to, both are saved in the config entry
+        try:
+            token = jwt.decode(self.entry.data[CONF_ACCESS_TOKEN], options={"verify_signature": False})
+            return datetime.fromtimestamp(token["exp"], tz=timezone.utc)
+        except (jwt.InvalidTokenError, KeyError, TypeError, ValueError):
+            return None
+
+    @callback
+    def async_start(self) -> CALLBACK_TYPE:
+        """Renew the tokens in the background before they expire.
+
+        Returns a callback to stop the renewals.
+        """
+        self._started = True
+        self.__schedule_renewal()
+        return self.__stop
+
+    async def async_ensure_valid(self) -> None:
+        """Renew the tokens first, when they're about to expire."""
+        if (expires_at := self.expires_at) is not None and expires_at - TOKEN_RENEW_MARGIN <= utcnow():
+            LOGGER.debug("Authentication token expires at %s, renewing it first", expires_at)
+            await self.async_renew()
+
+    async def async_renew(self) -> None:
+        """Renew the tokens, sharing a renewal that's already in progress."""
+        if self._renewal is None:
+            self._renewal = self.hass.async_create_task(self.__async_renew())
+            self._renewal.add_done_callback(lambda _: setattr(self, "_renewal", None))
+
+        # Shield the renewal, so it's not cancelled when one of the waiting callers is
+        await asyncio.shield(self._renewal)
+
+    async def __async_renew(self) -> None:
+        try:
+            updated_tokens = await self.api.renew_token()
+        except AuthException as ex:
+            LOGGER.error("Failed to renew token: %s. Starting user reauth flow", ex)
+            raise ConfigEntryAuthFailed from ex
+
+        self.hass.config_entries.async_update_entry(
+            self.entry,
+            data={
+                **self.entry.data,
+                CONF_ACCESS_TOKEN: updated_tokens.authToken,
+                CONF_TOKEN: updated_tokens.refreshToken,
+            },
+        )
+        LOGGER.debug("Successfully renewed token, it expires at %s", self.expires_at)
+
+        if self._started:
+            self.__cancel_renewal()
+            self.__schedule_renewal()
+
+    @callback
+    def __schedule_renewal(self) -> None:
+        if (expires_at := self.expires_at) is not None:
+            self._unsub_timer = async_track_point_in_utc_time(
+                self.hass, self.__handle_renewal_time, max(expires_at - TOKEN_RENEW_MARGIN, utcnow())
+            )
+
+    @callback
+    def __stop(self) -> None:
+        self._started = False
+        self.__cancel_renewal()
+
+    @callback
+    def __cancel_renewal(self) -> None:
+        if self._unsub_timer:
+            self._unsub_timer()
+            self._unsub_timer = None
+
+    @callback
+    def __handle_renewal_time(self, _now: datetime) -> None:
+        self._unsub_timer = None
+        self.entry.async_create_background_task(
+            self.hass, self.__async_renew_in_background(), "frank_energie_renew_token"
+        )
+
+    async def __async_renew_in_background(self) -> None:
+        try:
+            await self.async_renew()
+        except ConfigEntryAuthFailed:
+            self.entry.async_start_reauth(self.hass)
+        except ValueError as ex:
+            # Network errors, the next request renews the tokens when they've expired by then
+            LOGGER.debug("Failed to renew token in the background: %s", ex)
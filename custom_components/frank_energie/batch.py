@@ -0,0 +1,201 @@
+"""Batched GraphQL query, fetching all data of a refresh in a single request."""
+from __future__ import annotations
+
+import logging
+from datetime import date
+from typing import Any
+
+from homeassistant.helpers.json import json_dumps
+from python_frank_energie.exceptions import RequestException
+from python_frank_energie.models import Invoices, MarketPrices, MonthSummary
+
+from .client import FrankEnergieClient
+from .const import REFRESH_INVOICES, REFRESH_MONTH_SUMMARY, REFRESH_PRICES
+from .metrics import CoordinatorMetrics
+from .public_prices import PublicPriceCache
+
+LOGGER = logging.getLogger(__name__)
+
+PUBLIC_PRICE_SELECTION = "from till marketPrice marketPriceTax sourcingMarkupPrice energyTaxPrice"
+USER_PRICE_SELECTION = (
+    "from till marketPrice marketPriceTax "
+    "sourcingMarkupPrice: consumptionSourcingMarkupPrice energyTaxPrice: energyTax"
+)
+MONTH_SUMMARY_SELECTION = (
+    "actualCostsUntilLastMeterReadingDate expectedCostsUntilLastMeterReadingDate expectedCosts lastMeterReadingDate"
+)
+INVOICE_SELECTION = "StartDate PeriodDescription TotalAmount"
+INVOICES_SELECTION = (
+    f"previousPeriodInvoice {{ {INVOICE_SELECTION} }} "
+    f"currentPeriodInvoice {{ {INVOICE_SELECTION} }} "
+    f"upcomingPeriodInvoice {{ {INVOICE_SELECTION} }}"
+)
+# Kind of query of each field, as the metrics name the query when it's sent on its own
+FIELD_KINDS = {
+    "marketPricesElectricity": "prices",
+    "marketPricesGas": "prices",
+    "customerMarketPrices": "user_prices",
+    "monthSummary": "month_summary",
+    "invoices": "invoices",
+}
+
+
+class RefreshBatch:
+    """A single GraphQL document with an aliased field for every query of a refresh.
+
+    Aliases and variables are numbered, because site references aren't valid GraphQL names.
+    """
+
+    def __init__(
+        self,
+        days: list[tuple[date, date]],
+        sites: list[str | None],
+        kinds: set[str],
+        public_days: list[tuple[date, date]],
+    ) -> None:
+        """Build the document, for the user prices and other data of the given sites and kinds."""
+        self._fields: list[str] = []
+        self._aliases: dict[str, str] = {}
+        self._variables: dict[str, tuple[str, Any]] = {}
+        self.days = days
+        self.public_days = public_days
+        self.user_days = days if REFRESH_PRICES in kinds else []
+        self.sites = sites
+
+        for day, (start_date, end_date) in enumerate(days):
+            if (start_date, end_date) in public_days:
+                arguments = {
+                    "startDate": self._variable(f"start{day}", "Date!", str(start_date)),
+                    "endDate": self._variable(f"end{day}", "Date!", str(end_date)),
+                }
+                self._add(f"electricity{day}", "marketPricesElectricity", arguments, PUBLIC_PRICE_SELECTION)
+                self._add(f"gas{day}", "marketPricesGas", arguments, PUBLIC_PRICE_SELECTION)
+
+        for number, site in enumerate(sites):
+            site_variable = self._variable(f"site{number}", "String!", site)
+            for day, (start_date, _) in enumerate(self.user_days):
+                self._add(
+                    f"userPrices{number}_{day}",
+                    "customerMarketPrices",
+                    {"date": self._variable(f"date{day}", "String!", str(start_date)), "siteReference": site_variable},
+                    f"electricityPrices {{ {USER_PRICE_SELECTION} }} gasPrices {{ {USER_PRICE_SELECTION} }}",
+                )
+            site_arguments = {"siteReference": site_variable}
+            if REFRESH_MONTH_SUMMARY in kinds:
+                self._add(f"monthSummary{number}", "monthSummary", site_arguments, MONTH_SUMMARY_SELECTION)
+            if REFRESH_INVOICES in kinds:
+                self._add(f"invoices{number}", "invoices", site_arguments, INVOICES_SELECTION)
+
+    def _variable(self, name: str, graphql_type: str, value: Any) -> str:
+        self._variables[name] = (graphql_type, value)
+        return f"${name}"
+
+    def _add(self, alias: str, field: str, arguments: dict[str, str], selection: str) -> None:
+        arguments_list = ", ".join(f"{name}: {value}" for name, value in arguments.items())
+        self._aliases[alias] = field
+        self._fields.append(f"{alias}: {field}({arguments_list}) {{ {selection} }}")
+
+    def __bool__(self) -> bool:
+        """Return whether there's anything to query."""
+        return bool(self._fields)
+
+    @property
+    def query(self) -> dict[str, Any]:
+        """The query, as sent to the API."""
+        declarations = ", ".join(f"${name}: {graphql_type}" for name, (graphql_type, _) in self._variables.items())
+        return {
+            "query": f"query Refresh({declarations}) {{ {' '.join(self._fields)} }}",
+            "operationName": "Refresh",
+            "variables": {name: value for name, (_, value) in self._variables.items()},
+        }
+
+    async def async_fetch(
+        self, api: FrankEnergieClient, public_prices: PublicPriceCache, metrics: CoordinatorMetrics | None = None
+    ) -> RefreshBatchResponse | None:
+        """Send the query, returns None when the API rejects the document as a whole."""
+        response = await api.async_query(self.query)
+        if not response.get("data"):
+            LOGGER.debug("Batched query was rejected: %s", response.get("errors"))
+            return None
+
+        if metrics is not None:
+            self._record_fields(metrics, response)
+
+        result = RefreshBatchResponse(self, response, api, public_prices)
+        # Let other config entries use the public prices as well
+        for start_date, end_date in self.public_days:
+            try:
+                public_prices.async_set(await result.prices(start_date, end_date), start_date, end_date)
+            except RequestException:
+                # Raised again when the prices are actually needed
+                continue
+
+        return result
+
+    def _record_fields(self, metrics: CoordinatorMetrics, response: dict[str, Any]) -> None:
+        """Record the response size and errors of every field, under the kind of query it replaces."""
+        failed = {(error.get("path") or [None])[0] for error in response.get("errors") or []}
+        for alias, field in self._aliases.items():
+            metrics.record_batched_field(
+                FIELD_KINDS[field], len(json_dumps(response["data"].get(alias))), alias in failed
+            )
+
+
+class RefreshBatchResponse:
+    """Response to a RefreshBatch, with the same methods as the API client for the data it contains.
+
+    Every alias is parsed by the parser of the client library, with only the errors of that
+    alias, so a failing query raises the same exception as when it was sent on its own.
+    """
+
+    def __init__(
+        self,
+        batch: RefreshBatch,
+        response: dict[str, Any],
+        api: FrankEnergieClient,
+        public_prices: PublicPriceCache,
+    ) -> None:
+        """Initialize the response."""
+        self._batch = batch
+        self._data: dict[str, Any] = response["data"]
+        self._errors: dict[str, list[dict]] = {}
+        for error in response.get("errors") or []:
+            self._errors.setdefault((error.get("path") or [None])[0], []).append(error)
+        self._api = api
+        self._public_prices = public_prices
+
+    def _response(self, **aliases: str) -> dict[str, Any]:
+        """Return the response the fields would have had when queried on their own."""
+        response = {"data": {field: self._data.get(alias) for field, alias in aliases.items()}}
+        if errors := [error for alias in aliases.values() for error in self._errors.get(alias, [])]:
+            response["errors"] = errors
+        return response
+
+    async def prices(self, start_date: date, end_date: date) -> MarketPrices:
+        """Return the public prices, from the cache when they weren't part of the batch."""
+        if (start_date, end_date) not in self._batch.public_days:
+            return await self._public_prices.async_get(self._api, start_date, end_date)
+
+        day = self._batch.days.index((start_date, end_date))
+        return MarketPrices.from_dict(
+            self._response(marketPricesElectricity=f"electricity{day}", marketPricesGas=f"gas{day}")
+        )
+
+    async def user_prices(self, start_date: date, site_reference: str | None) -> MarketPrices:
+        """Return the prices of a site."""
+        day = [start for start, _ in self._batch.user_days].index(start_date)
+        response = self._response(customerMarketPrices=self._alias("userPrices", site_reference, f"_{day}"))
+        if not response.get("errors") and response["data"]["customerMarketPrices"] is None:
+            raise RequestException("Unexpected response")
+        return MarketPrices.from_userprices_dict(response)
+
+    async def month_summary(self, site_reference: str | None) -> MonthSummary:
+        """Return the month summary of a site."""
+        return MonthSummary.from_dict(self._response(monthSummary=self._alias("monthSummary", site_reference)))
+
+    async def invoices(self, site_reference: str | None) -> Invoices:
+        """Return the invoices of a site."""
+        return Invoices.from_dict(self._response(invoices=self._alias("invoices", site_reference)))
+
+    def _alias(self, name: str, site_reference: str | None, suffix: str = "") -> str:
+        return f"{name}{self._batch.sites.index(site_reference)}{suffix}"
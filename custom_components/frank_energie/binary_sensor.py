@@ -0,0 +1,131 @@
+"""Frank Energie flags for the current electricity price compared to the other prices of the day."""
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Any
+
+from homeassistant.components.binary_sensor import BinarySensorEntity, BinarySensorEntityDescription
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.core import HomeAssistant, callback
+from homeassistant.helpers.entity_platform import AddEntitiesCallback
+
+from .const import (
+    ATTR_FETCHED_AT,
+    ATTR_HOURS,
+    CONF_COORDINATOR,
+    DATA_ELECTRICITY_INDEX,
+    DOMAIN,
+    REFRESH_PRICES,
+    SERVICE_NAME_PRICES,
+)
+from .coordinator import FrankEnergieCoordinator
+from .entity import FrankEnergieEntity, attributes_fingerprint
+
+
+@dataclass
+class FrankEnergieBinaryEntityDescription(BinarySensorEntityDescription):
+    """Describes Frank Energie binary sensor entity."""
+
+    cheapest: bool = True
+
+
+BINARY_SENSOR_TYPES: tuple[FrankEnergieBinaryEntityDescription, ...] = (
+    FrankEnergieBinaryEntityDescription(
+        key="elec_in_cheapest_hours",
+        name="Electricity price in cheapest hours today",
+        icon="mdi:cash-check",
+        cheapest=True,
+    ),
+    FrankEnergieBinaryEntityDescription(
+        key="elec_in_most_expensive_hours",
+        name="Electricity price in most expensive hours today",
+        icon="mdi:cash-remove",
+        cheapest=False,
+    ),
+)
+
+
+async def async_setup_entry(
+    hass: HomeAssistant,
+    config_entry: ConfigEntry,
+    async_add_entities: AddEntitiesCallback,
+) -> None:
+    """Set up Frank Energie binary sensor entries."""
+    frank_coordinator = hass.data[DOMAIN][config_entry.entry_id][CONF_COORDINATOR]
+
+    async_add_entities(
+        [
+            FrankEnergieBinarySensor(frank_coordinator, description, config_entry, site_reference)
+            for site_reference in frank_coordinator.sites
+            for description in BINARY_SENSOR_TYPES
+        ],
+        True,
+    )
+
+
+class FrankEnergieBinarySensor(FrankEnergieEntity, BinarySensorEntity):
+    """Whether the current electricity price is among the cheapest or most expensive of today.
+
+    The number of hours that count is configured in the options. The ranks of the prices are computed
+    once per refresh, so updating the state only looks up the rank of the current price.
+    """
+
+    entity_description: FrankEnergieBinaryEntityDescription
+    _unrecorded_attributes = frozenset({ATTR_FETCHED_AT})
+
+    def __init__(
+        self,
+        coordinator: FrankEnergieCoordinator,
+        description: FrankEnergieBinaryEntityDescription,
+        entry: ConfigEntry,
+        site_reference: str | None = None,
+    ) -> None:
+        """Initialize the binary sensor."""
+        super().__init__(coordinator, description, entry, site_reference, SERVICE_NAME_PRICES)
+        self._last_written: tuple | None = None
+
+    def _update_is_on(self) -> None:
+        """Update the flag from the coordinator data."""
+        try:
+            index = self.coordinator.data[self._site_reference][DATA_ELECTRICITY_INDEX]
+            if self.entity_description.cheapest:
+                self._attr_is_on = index.in_cheapest(self.coordinator.ranked_hours)
+            else:
+                self._attr_is_on = index.in_most_expensive(self.coordinator.ranked_hours)
+        except (TypeError, IndexError):
+            # No data available
+            self._attr_is_on = None
+
+    async def async_update(self) -> None:
+        """Get the latest data and updates the states."""
+        self._update_is_on()
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Handle new coordinator data, or a slot boundary, only writing a changed state."""
+        self._update_is_on()
+
+        written = (self.available, self._attr_is_on, attributes_fingerprint(self.extra_state_attributes))
+        if written == self._last_written:
+            self.coordinator.suppressed_writes += 1
+            return
+
+        self._last_written = written
+        super()._handle_coordinator_update()
+
+    async def async_added_to_hass(self) -> None:
+        """Remember the state that is written when the entity is added."""
+        await super().async_added_to_hass()
+        self._last_written = (self.available, self._attr_is_on, attributes_fingerprint(self.extra_state_attributes))
+
+    @property
+    def extra_state_attributes(self) -> dict[str, Any]:
+        """Return the state attributes."""
+        return {
+            ATTR_HOURS: self.coordinator.ranked_hours,
+            ATTR_FETCHED_AT: self.coordinator.fetched_at(self._site_reference, REFRESH_PRICES),
+        }
+
+    @property
+    def available(self) -> bool:
+        return super().available and self.is_on is not None
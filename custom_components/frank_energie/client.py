@@ -0,0 +1,28 @@
+"""API client of the component, the only place that relies on internals of python-frank-energie.
+
+The library has no public method to send a GraphQL document of its own, which the batched refresh
+and the usage statistics need, or to observe every request, which the metrics and retries need.
+Its private `_query` is only used here, so a change to it in a new version of the library shows up
+in a single place, and in the tests of this module.
+"""
+from __future__ import annotations
+
+from typing import Any
+
+from python_frank_energie import FrankEnergie
+
+
+class FrankEnergieClient(FrankEnergie):
+    """Frank Energie API client, sending all requests through `async_query`."""
+
+    async def _query(self, query: dict[str, Any]) -> dict[str, Any]:
+        # Every method of the library sends its request through here
+        return await self.async_query(query)
+
+    async def async_query(self, query: dict[str, Any]) -> dict[str, Any]:
+        """Send a GraphQL document, and return the response.
+
+        Subclasses extend this to observe or retry every request. Raises AuthException when the
+        tokens are rejected, and ValueError when the request fails.
+        """
+        return await super()._query(query)
@@ -14,11 +14,21 @@ from homeassistant.const import (
     CONF_TOKEN,
     CONF_USERNAME,
 )
+from homeassistant.core import callback
 from homeassistant.data_entry_flow import FlowResult
 from python_frank_energie import FrankEnergie
 from python_frank_energie.exceptions import AuthException
 
-from .const import DOMAIN
+from .const import (
+    CONF_COMPACT_PRICES,
+    CONF_HISTORY_DAYS,
+    CONF_RANKED_HOURS,
+    CONF_WINDOW_HOURS,
+    DEFAULT_HISTORY_DAYS,
+    DEFAULT_RANKED_HOURS,
+    DEFAULT_WINDOW_HOURS,
+    DOMAIN,
+)
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -109,6 +119,12 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         )
         return await self.async_step_login()
 
+    @staticmethod
+    @callback
+    def async_get_options_flow(config_entry: config_entries.ConfigEntry) -> config_entries.OptionsFlow:
+        """Get the options flow for this handler."""
+        return OptionsFlowHandler(config_entry)
+
     async def _async_create_entry(self, data):
         await self.async_set_unique_id(data.get(CONF_USERNAME, "frank_energie"))
         self._abort_if_unique_id_configured()
@@ -116,3 +132,39 @@ class ConfigFlow(config_entries.ConfigFlow, domain=DOMAIN):
         return self.async_create_entry(
             title=data.get(CONF_USERNAME, "Frank Energie"), data=data
         )
+
+
+class OptionsFlowHandler(config_entries.OptionsFlow):
+    """Handle the options of Frank Energie."""
+
+    def __init__(self, config_entry: config_entries.ConfigEntry) -> None:
+        """Initialize the options flow."""
+        self.config_entry = config_entry
+
+    async def async_step_init(self, user_input=None) -> FlowResult:
+        """Manage the options."""
+        if user_input is not None:
+            return self.async_create_entry(title="", data=user_input)
+
+        data_schema = vol.Schema(
+            {
+                vol.Required(
+                    CONF_COMPACT_PRICES,
+                    default=self.config_entry.options.get(CONF_COMPACT_PRICES, False),
+                ): bool,
+                vol.Required(
+                    CONF_WINDOW_HOURS,
+                    default=self.config_entry.options.get(CONF_WINDOW_HOURS, DEFAULT_WINDOW_HOURS),
+                ): vol.All(vol.Coerce(float), vol.Range(min=0.25, max=24)),
+                vol.Required(
+                    CONF_RANKED_HOURS,
+                    default=self.config_entry.options.get(CONF_RANKED_HOURS, DEFAULT_RANKED_HOURS),
+                ): vol.All(vol.Coerce(float), vol.Range(min=0.25, max=24)),
+                vol.Required(
+                    CONF_HISTORY_DAYS,
+                    default=self.config_entry.options.get(CONF_HISTORY_DAYS, DEFAULT_HISTORY_DAYS),
+                ): vol.All(vol.Coerce(int), vol.Range(min=1, max=31)),
+            }
+        )
+
+        return self.async_show_form(step_id="init", data_schema=data_schema)
@@ -1,6 +1,8 @@
 """Constants for the Frank Energie integration."""
 from __future__ import annotations
 
+from datetime import time, timedelta
+
 ATTRIBUTION = "Data provided by Frank Energie"
 DOMAIN = "frank_energie"
 DATA_URL = "https://frank-graphql-prod.graphcdn.app/"
@@ -9,11 +11,107 @@ COMPONENT_TITLE = "Frank Energie"
 
 CONF_COORDINATOR = "coordinator"
 ATTR_TIME = "from_time"
+ATTR_PRICES = "prices"
+ATTR_PRICES_START = "prices_start"
+ATTR_FETCHED_AT = "fetched_at"
+ATTR_PRICES_INTERVAL = "prices_interval"
+ATTR_END = "end"
+ATTR_AVERAGE_PRICE = "average_price"
+ATTR_HOURS = "hours"
+ATTR_DAYS = "days"
+ATTR_SITE_REFERENCE = "site_reference"
+ATTR_CONFIG_ENTRY_ID = "config_entry_id"
+ATTR_ENERGY = "energy"
+ATTR_MAX_POWER = "max_power"
+ATTR_DEADLINE = "deadline"
+ATTR_EFFICIENCY = "efficiency"
+ATTR_MODE = "mode"
+ATTR_POWER = "power"
+ATTR_PRICE = "price"
+ATTR_COST = "cost"
+
+CONF_COMPACT_PRICES = "compact_prices"
+CONF_SITE_REFERENCE = "site_reference"
+CONF_SITES = "sites"
+CONF_WINDOW_HOURS = "window_hours"
+CONF_RANKED_HOURS = "ranked_hours"
+CONF_HISTORY_DAYS = "history_days"
+
+# Default length of the cheapest and most expensive price windows
+DEFAULT_WINDOW_HOURS = 3
+# Default number of hours that count as the cheapest and most expensive hours of a day
+DEFAULT_RANKED_HOURS = 4
+# Default number of past days of which the prices are kept, for the trailing averages
+DEFAULT_HISTORY_DAYS = 7
 
 DATA_ELECTRICITY = "electricity"
 DATA_GAS = "gas"
 DATA_MONTH_SUMMARY = "month_summary"
 DATA_INVOICES = "invoices"
+DATA_ELECTRICITY_INDEX = "electricity_index"
+DATA_GAS_INDEX = "gas_index"
+DATA_ELECTRICITY_HISTORY = "electricity_history"
+DATA_GAS_HISTORY = "gas_history"
+
+DATA_PUBLIC_PRICES = f"{DOMAIN}_public_prices"
 
 SERVICE_NAME_PRICES = "Prices"
 SERVICE_NAME_COSTS = "Costs"
+
+SERVICE_FIND_PRICE_WINDOWS = "find_price_windows"
+SERVICE_OPTIMIZE_SCHEDULE = "optimize_schedule"
+
+MODE_CHARGE = "charge"
+MODE_DISCHARGE = "discharge"
+
+# Kinds of data that are refreshed on their own schedule
+REFRESH_PRICES = "prices"
+REFRESH_MONTH_SUMMARY = DATA_MONTH_SUMMARY
+REFRESH_INVOICES = DATA_INVOICES
+
+# Day-ahead prices for tomorrow are published once a day, in the early afternoon (Dutch time)
+PRICE_TIME_ZONE = "Europe/Amsterdam"
+PRICE_PUBLICATION_START = time(13, 0)
+PRICE_PUBLICATION_END = time(16, 0)
+PRICE_PUBLICATION_POLL_INTERVAL = timedelta(minutes=5)
+
+MONTH_SUMMARY_REFRESH_INTERVAL = timedelta(hours=6)
+INVOICES_REFRESH_INTERVAL = timedelta(hours=12)
+
+# How long the month summary and invoices are shown when they can't be refreshed. Prices are shown
+# for as long as they apply.
+DATA_TTL = {
+    REFRESH_MONTH_SUMMARY: timedelta(days=1),
+    REFRESH_INVOICES: timedelta(days=2),
+}
+
+REFRESH_BACKOFF_MIN = timedelta(minutes=5)
+REFRESH_BACKOFF_MAX = timedelta(hours=2)
+REFRESH_INTERVAL_MIN = timedelta(seconds=30)
+
+# Requests that fail on a network error are retried a few times during a refresh, with an exponential backoff
+REQUEST_RETRY_ATTEMPTS = 3
+REQUEST_RETRY_BACKOFF_MIN = timedelta(seconds=1)
+REQUEST_RETRY_BACKOFF_MAX = timedelta(seconds=10)
+
+# After this many failed requests in a row the API is left alone for a while, then a single request
+# probes whether it is back
+CIRCUIT_FAILURE_THRESHOLD = 5
+CIRCUIT_RESET_TIMEOUT = timedelta(minutes=5)
+
+# How long public prices are shared between config entries after they have been received
+PUBLIC_PRICES_CACHE_TTL = timedelta(minutes=1)
+
+# Missing price statistics are backfilled this many days back, requesting a day at a time
+STATISTICS_BACKFILL_DAYS = 30
+STATISTICS_BACKFILL_DELAY = timedelta(seconds=1)
+
+# Usage and costs are imported this many days back, a number of days per request with a pause in between.
+# Days are fetched again by every import until they're this old, meter readings may arrive late.
+USAGE_BACKFILL_DAYS = 2 * 365
+USAGE_CHUNK_DAYS = 7
+USAGE_REQUEST_DELAY = timedelta(seconds=2)
+USAGE_FINAL_AFTER = timedelta(days=7)
+
+# Authentication tokens are renewed this long before they expire
+TOKEN_RENEW_MARGIN = timedelta(minutes=5)
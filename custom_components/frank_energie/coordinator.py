@@ -1,20 +1,65 @@
 """Coordinator implementation for Frank Energie integration."""
 from __future__ import annotations
 
+import asyncio
 import logging
+from collections.abc import Coroutine
 from datetime import datetime, timedelta, date
+from time import monotonic
 from typing import TypedDict
 
 from homeassistant.config_entries import ConfigEntry
-from homeassistant.core import HomeAssistant
-from homeassistant.const import CONF_ACCESS_TOKEN, CONF_TOKEN
+from homeassistant.core import CALLBACK_TYPE, HomeAssistant, callback
 from homeassistant.exceptions import ConfigEntryAuthFailed
+from homeassistant.helpers.event import async_track_point_in_utc_time
 from homeassistant.helpers.update_coordinator import DataUpdateCoordinator, UpdateFailed
+from homeassistant.util import utcnow
+from homeassistant.util.dt import get_time_zone
 from python_frank_energie import FrankEnergie
 from python_frank_energie.exceptions import RequestException, AuthException
 from python_frank_energie.models import PriceData, MonthSummary, Invoices, MarketPrices
 
-from .const import DATA_ELECTRICITY, DATA_GAS, DATA_MONTH_SUMMARY, DATA_INVOICES
+from .const import (
+    CONF_COMPACT_PRICES,
+    CONF_HISTORY_DAYS,
+    CONF_SITE_REFERENCE,
+    CONF_SITES,
+    CONF_RANKED_HOURS,
+    CONF_WINDOW_HOURS,
+    DATA_ELECTRICITY,
+    DATA_ELECTRICITY_HISTORY,
+    DATA_ELECTRICITY_INDEX,
+    DATA_GAS,
+    DATA_GAS_HISTORY,
+    DATA_GAS_INDEX,
+    DATA_INVOICES,
+    DATA_MONTH_SUMMARY,
+    DATA_TTL,
+    DEFAULT_HISTORY_DAYS,
+    DEFAULT_RANKED_HOURS,
+    DEFAULT_WINDOW_HOURS,
+    INVOICES_REFRESH_INTERVAL,
+    MONTH_SUMMARY_REFRESH_INTERVAL,
+    PRICE_TIME_ZONE,
+    REFRESH_INVOICES,
+    REFRESH_MONTH_SUMMARY,
+    REFRESH_PRICES,
+)
+from .auth import TokenManager
+from .batch import RefreshBatch, RefreshBatchResponse
+from .history import PriceHistory
+from .price_index import PriceIndex
+from .public_prices import async_get_public_price_cache
+from .resilience import ResilientFrankEnergie
+from .scheduler import RefreshScheduler, next_price_refresh
+from .statistics import PriceStatistics, UsageStatistics
+from .storage import (
+    STORAGE_SAVE_DELAY,
+    FrankEnergieStore,
+    decode_fetched_at,
+    decode_sites_data,
+    encode_sites_data,
+)
 
 LOGGER = logging.getLogger(__name__)
 
@@ -22,93 +67,528 @@ LOGGER = logging.getLogger(__name__)
 class FrankEnergieData(TypedDict):
     DATA_ELECTRICITY: PriceData
     DATA_GAS: PriceData
+    DATA_ELECTRICITY_INDEX: PriceIndex
+    DATA_GAS_INDEX: PriceIndex
     DATA_MONTH_SUMMARY: MonthSummary | None
     DATA_INVOICES: Invoices | None
+    DATA_ELECTRICITY_HISTORY: PriceHistory
+    DATA_GAS_HISTORY: PriceHistory
+
+
+def build_price_indexes(data: FrankEnergieData) -> None:
+    """(Re)build the indexes of the electricity and gas prices, after they've changed.
+
+    The complete days of the new prices are added to the price histories.
+    """
+    data[DATA_ELECTRICITY_INDEX] = PriceIndex(data[DATA_ELECTRICITY])
+    data[DATA_GAS_INDEX] = PriceIndex(data[DATA_GAS])
+    data[DATA_ELECTRICITY_HISTORY].add(data[DATA_ELECTRICITY_INDEX])
+    data[DATA_GAS_HISTORY].add(data[DATA_GAS_INDEX])
+
+
+def is_complete_day(prices: MarketPrices, day: date) -> bool:
+    """Return whether the prices of a day's query span the whole day, for both electricity and gas.
+
+    The span is compared rather than the start and end, the gas prices don't have to start at midnight.
+    """
+    time_zone = get_time_zone(PRICE_TIME_ZONE)
+    day_start = datetime.combine(day, datetime.min.time(), time_zone)
+    day_length = datetime.combine(day + timedelta(days=1), datetime.min.time(), time_zone) - day_start
+    return all(
+        price_data.all and price_data.all[-1].date_till - price_data.all[0].date_from >= day_length
+        for price_data in (prices.electricity, prices.gas)
+    )
 
 
 class FrankEnergieCoordinator(DataUpdateCoordinator):
     """Get the latest data and update the states."""
 
-    api: FrankEnergie
+    api: ResilientFrankEnergie
 
     def __init__(
-        self, hass: HomeAssistant, entry: ConfigEntry, api: FrankEnergie,
+        self, hass: HomeAssistant, entry: ConfigEntry, api: ResilientFrankEnergie, tokens: TokenManager,
     ) -> None:
         """Initialize the data object."""
         self.hass = hass
         self.entry = entry
         self.api = api
-        self.site_reference = entry.data.get("site_reference", None)
+        self.metrics = api.metrics
+        self.tokens = tokens
+        self._options = dict(entry.options)
+        self.site_reference = entry.data.get(CONF_SITE_REFERENCE, None)
+        # All sites of the account, with their title, the primary site first
+        self.sites: dict[str | None, str] = entry.data.get(CONF_SITES) or {self.site_reference: entry.title}
+        self.store = FrankEnergieStore(hass, entry.entry_id)
+        self.public_prices = async_get_public_price_cache(hass)
+        self.price_statistics = PriceStatistics(hass, api, self.sites)
+        self.usage_statistics = UsageStatistics(hass, entry.entry_id, api, tokens, self.sites)
+        # Whether the current data was loaded from the store and not yet revalidated
+        self.data_stale = False
+        # Incremented whenever new data arrives, so entities know when to rebuild derived values
+        self.data_generation = 0
+        # Prices of the past days of each site, which are no longer fetched
+        self._histories: dict[str | None, dict[str, PriceHistory]] = {
+            site: {key: PriceHistory(self.history_days) for key in (DATA_ELECTRICITY_HISTORY, DATA_GAS_HISTORY)}
+            for site in self.sites
+        }
+        # Prices of each site for the days of which all prices are known, by the date of their query
+        self._complete_price_days: dict[str | None, dict[date, MarketPrices]] = {}
+        # When each kind of data of each site was fetched
+        self._fetched_at: dict[str | None, dict[str, datetime]] = {}
+        # Number of state writes the entities skipped because nothing changed
+        self.suppressed_writes = 0
+        self._unsub_slot_update: CALLBACK_TYPE | None = None
+        self.scheduler = RefreshScheduler(
+            [REFRESH_PRICES, REFRESH_MONTH_SUMMARY, REFRESH_INVOICES] if api.is_authenticated else [REFRESH_PRICES]
+        )
 
         super().__init__(
             hass,
             LOGGER,
             name="Frank Energie coordinator",
-            update_interval=timedelta(minutes=60),
+            update_interval=self.scheduler.next_interval(utcnow()),
         )
 
-    async def _async_update_data(self) -> FrankEnergieData:
-        """Get the latest data from Frank Energie."""
-        LOGGER.debug("Fetching Frank Energie data")
+    async def async_load_cached_data(self) -> bool:
+        """Load the data of the last run from the store.
 
-        # We request data for today up until the day after tomorrow.
-        # This is to ensure we always request all available data.
-        today = datetime.utcnow().date()
-        tomorrow = today + timedelta(days=1)
-        day_after_tomorrow = today + timedelta(days=2)
+        Returns True when the stored data still contains a price for the current slot, so it
+        can be used until it is revalidated.
+        """
+        try:
+            stored = await self.store.async_load()
+            data = decode_sites_data(stored, self.history_days) if stored else None
+            fetched_at = decode_fetched_at(stored) if stored else {}
+        except (KeyError, TypeError, ValueError) as ex:
+            LOGGER.warning("Ignoring invalid cached Frank Energie data: %s", ex)
+            return False
 
-        # Fetch data for today and tomorrow separately,
-        # because the gas prices response only contains data for the first day of the query
+        if data is None or list(data) != list(self.sites):
+            return False
+
+        # The past prices are kept, even when the data itself is too old to use
+        self._histories = {
+            site: {key: site_data[key] for key in (DATA_ELECTRICITY_HISTORY, DATA_GAS_HISTORY)}
+            for site, site_data in data.items()
+        }
+        for site_data in data.values():
+            build_price_indexes(site_data)
+            if site_data[DATA_ELECTRICITY_INDEX].slot_at(utcnow()) is None:
+                return False
+
+        LOGGER.debug("Using cached Frank Energie data until it is revalidated")
+        self._fetched_at = fetched_at
+        self.data_stale = True
+        self.data_generation += 1
+        self.async_set_updated_data(data)
+        return True
+
+    @property
+    def compact_prices(self) -> bool:
+        """Whether to list prices in the compact format in the prices attribute."""
+        return self.entry.options.get(CONF_COMPACT_PRICES, False)
+
+    @property
+    def window_hours(self) -> float:
+        """Length of the cheapest and most expensive price windows, in hours."""
+        return self.entry.options.get(CONF_WINDOW_HOURS, DEFAULT_WINDOW_HOURS)
+
+    @property
+    def ranked_hours(self) -> float:
+        """Number of hours that count as the cheapest and most expensive hours of a day."""
+        return self.entry.options.get(CONF_RANKED_HOURS, DEFAULT_RANKED_HOURS)
+
+    @property
+    def history_days(self) -> int:
+        """Number of past days of which the prices are kept."""
+        return self.entry.options.get(CONF_HISTORY_DAYS, DEFAULT_HISTORY_DAYS)
+
+    @callback
+    def async_options_updated(self) -> None:
+        """Let all entities rebuild their state with the changed options."""
+        # The entry is also updated when its tokens are renewed, which doesn't affect the entities
+        if self.entry.options == self._options:
+            return
+
+        self._options = dict(self.entry.options)
+        for histories in self._histories.values():
+            for history in histories.values():
+                history.resize(self.history_days)
+        self.data_generation += 1
+        self.async_update_listeners()
+
+    @callback
+    def async_start_slot_updates(self) -> CALLBACK_TYPE:
+        """Update all listeners at the start of every price slot, when the current price changes.
+
+        Returns a callback to stop the updates.
+        """
+        self.__schedule_slot_update()
+        return self.__cancel_slot_update
+
+    def next_slot_boundary(self, now: datetime, data: dict[str | None, FrankEnergieData] | None = None) -> datetime:
+        """Return the first moment after now at which any price of any site changes, in the given or current data.
+
+        Prices may have different lengths per commodity, like quarter-hourly electricity and hourly gas
+        prices, a single timer is used for all of them. When no prices are known, the next hour is used.
+        """
+        boundaries = [
+            boundary
+            for site_data in (data or self.data or {}).values()
+            for key in (DATA_ELECTRICITY_INDEX, DATA_GAS_INDEX)
+            if (boundary := site_data[key].next_boundary(now)) is not None
+        ]
+        return min(boundaries, default=now.replace(minute=0, second=0, microsecond=0) + timedelta(hours=1))
+
+    @callback
+    def __schedule_slot_update(self, data: dict[str | None, FrankEnergieData] | None = None) -> None:
+        self._unsub_slot_update = async_track_point_in_utc_time(
+            self.hass, self.__handle_slot_update, self.next_slot_boundary(utcnow(), data)
+        )
+
+    @callback
+    def __reschedule_slot_update(self, data: dict[str | None, FrankEnergieData]) -> None:
+        """Schedule the next slot update again when it is running, for the boundaries of new prices."""
+        if self._unsub_slot_update:
+            self.__cancel_slot_update()
+            self.__schedule_slot_update(data)
+
+    @callback
+    def __cancel_slot_update(self) -> None:
+        if self._unsub_slot_update:
+            self._unsub_slot_update()
+            self._unsub_slot_update = None
+
+    @callback
+    def __handle_slot_update(self, _now: datetime) -> None:
+        """Let all entities update their state for the new price slot at once."""
+        self.__schedule_slot_update()
+        self.async_update_listeners()
+
+    @callback
+    def async_set_updated_data(self, data: dict[str | None, FrankEnergieData]) -> None:
+        """Set the data of the coordinator, and follow the boundaries of its prices."""
+        super().async_set_updated_data(data)
+        self.__reschedule_slot_update(data)
+
+    async def _async_update_data(self) -> dict[str | None, FrankEnergieData]:
+        """Get the latest data from Frank Energie.
+
+        Each kind of data is refreshed on its own, when some of them fail the others are still updated
+        and the failed ones keep their previous data, until it expires. Only the failed kinds are retried.
+        """
+        now = utcnow()
+        kinds = self.scheduler.due(now)
+        LOGGER.debug("Fetching Frank Energie data (%s)", ", ".join(sorted(kinds)))
+
+        start = monotonic()
         try:
-            prices_today = await self.__fetch_prices_with_fallback(today, tomorrow)
-            prices_tomorrow = await self.__fetch_prices_with_fallback(tomorrow, day_after_tomorrow)
+            data, errors = await self.__fetch_data(kinds)
+            if errors.keys() == kinds and self.data is None:
+                # There's nothing to show at all
+                raise UpdateFailed(next(iter(errors.values())))
+        except Exception:
+            self.scheduler.backoff(kinds, now)
+            self.metrics.record_refresh(monotonic() - start, True)
+            self.update_interval = self.scheduler.next_interval(utcnow())
+            raise
 
-            data_month_summary = (
-                await self.api.month_summary(self.site_reference) if self.api.is_authenticated else None
+        fetched = kinds - errors.keys()
+        self.__schedule_next_refresh(fetched, now, data)
+        self.scheduler.backoff(errors, now)
+        self.update_interval = self.scheduler.next_interval(utcnow())
+        self.metrics.record_refresh(monotonic() - start, bool(errors))
+        if errors:
+            LOGGER.warning(
+                "Failed to refresh %s, keeping the previous data: %s",
+                ", ".join(sorted(errors)),
+                "; ".join(str(error) for error in errors.values()),
             )
-            data_invoices = (
-                await self.api.invoices(self.site_reference) if self.api.is_authenticated else None
+
+        self.data_stale = self.data_stale and bool(errors)
+        if fetched <= {REFRESH_PRICES} and self.data is not None and data == self.data:
+            # Only complete price days were due, which aren't fetched again, so nothing has changed
+            return data
+
+        self.data_generation += 1
+        # The new prices may start or end at other moments than the previous ones
+        self.__reschedule_slot_update(data)
+        self.store.async_delay_save(lambda: encode_sites_data(data, self._fetched_at), STORAGE_SAVE_DELAY)
+        if REFRESH_PRICES in fetched and self.__prices_changed(data):
+            # Keep the price history in the long-term statistics, without holding up the refresh
+            self.entry.async_create_background_task(
+                self.hass, self.price_statistics.async_import(data), "frank_energie_price_statistics"
             )
-        except UpdateFailed as err:
-            # Check if we still have data to work with, if so, return this data. Still log the error as warning
-            if (
-                self.data[DATA_ELECTRICITY].get_future_prices()
-                and self.data[DATA_GAS].get_future_prices()
-            ):
-                LOGGER.warning(str(err))
-                return self.data
-            # Re-raise the error if there's no data from future left
-            raise err
-        except RequestException as ex:
+        if REFRESH_MONTH_SUMMARY in fetched:
+            # The usage and costs change as often as the month summary, when new meter readings arrive
+            self.entry.async_create_background_task(
+                self.hass, self.usage_statistics.async_import(), "frank_energie_usage_statistics"
+            )
+
+        return data
+
+    async def __fetch_data(
+        self, kinds: set[str], retry: bool = True
+    ) -> tuple[dict[str | None, FrankEnergieData], dict[str, Exception]]:
+        """Fetch the given kinds of data for all sites, other data is taken from the previous refresh.
+
+        Returns the data, and the error of each kind of data that couldn't be fetched for one of the sites.
+        """
+        # The queries that fail are tried again when the tokens are rejected
+        failures = self.metrics.failures_by_kind()
+        try:
+            # Renew the tokens first when they're about to expire, instead of waiting for a failure
+            await self.tokens.async_ensure_valid()
+
+            # Fetch everything in a single request, or when the API doesn't accept that, run the
+            # separate queries concurrently
+            source = await self.__fetch_batch(kinds) or self.api
+            fetches = {
+                (site, kind): fetch
+                for site in self.sites
+                for kind, fetch in self.__site_fetches(site, kinds, source).items()
+            }
+            results = dict(zip(fetches, await asyncio.gather(*fetches.values(), return_exceptions=True)))
+            errors = self.__result_errors(results)
+        except (RequestException, ValueError) as ex:
             if str(ex).startswith("user-error:"):
                 raise ConfigEntryAuthFailed from ex
 
-            raise UpdateFailed(ex) from ex
+            # Nothing could be fetched, all data is taken from the previous refresh
+            results, errors = {}, dict.fromkeys(kinds, ex)
 
         except AuthException as ex:
+            if not retry:
+                raise UpdateFailed(ex) from ex
+
+            # The tokens were rejected before they were expected to expire, renew them and try again
             LOGGER.debug("Authentication tokens expired, trying to renew them (%s)", ex)
-            await self.__try_renew_token()
-            # Tell we have no data, so update coordinator tries again with renewed tokens
-            raise UpdateFailed(ex) from ex
+            for kind, count in self.metrics.failures_by_kind().items():
+                if count > failures.get(kind, 0):
+                    self.metrics.record_retry(kind)
+            await self.tokens.async_renew()
+            return await self.__fetch_data(kinds, retry=False)
 
+        now = utcnow()
         return {
-            DATA_ELECTRICITY: prices_today.electricity + prices_tomorrow.electricity,
-            DATA_GAS: prices_today.gas + prices_tomorrow.gas,
-            DATA_MONTH_SUMMARY: data_month_summary,
-            DATA_INVOICES: data_invoices,
+            site: self.__merge_results(
+                site,
+                {
+                    kind: result
+                    for (result_site, kind), result in results.items()
+                    if result_site == site and not isinstance(result, BaseException)
+                },
+                now,
+            )
+            for site in self.sites
+        }, errors
+
+    def __prices_changed(self, data: dict[str | None, FrankEnergieData]) -> bool:
+        """Return whether the prices of any site differ from those of the previous refresh."""
+        return self.data is None or any(
+            site_data[DATA_ELECTRICITY_INDEX] is not self.data[site][DATA_ELECTRICITY_INDEX]
+            for site, site_data in data.items()
+        )
+
+    @staticmethod
+    def __result_errors(results: dict[tuple[str | None, str], object]) -> dict[str, Exception]:
+        """Return the error of each kind of data that failed for a site.
+
+        Errors that aren't caused by a single query, like rejected tokens, are raised.
+        """
+        errors = {}
+        for (_, kind), result in results.items():
+            if isinstance(result, AuthException) or (
+                isinstance(result, RequestException) and str(result).startswith("user-error:")
+            ):
+                raise result
+            if isinstance(result, (RequestException, ValueError)):
+                errors[kind] = result
+            elif isinstance(result, BaseException):
+                raise result
+        return errors
+
+    async def __fetch_batch(self, kinds: set[str]) -> RefreshBatchResponse | None:
+        """Fetch all data of the refresh with a single query.
+
+        Returns None when the API rejects the batched query, or when there's nothing to fetch.
+        """
+        days = self.__missing_price_days()
+        public_days = []
+        if REFRESH_PRICES in kinds and not self.api.is_authenticated:
+            # Public prices are shared with other config entries, only include those not known yet.
+            # With an account they're only a fallback, fetched when the prices of a site are missing.
+            public_days = [day for day in days if not self.__public_prices_cached(*day)]
+        batch = RefreshBatch(
+            days,
+            list(self.sites) if self.api.is_authenticated else [],
+            kinds if self.api.is_authenticated else kinds & {REFRESH_PRICES},
+            public_days,
+        )
+        return await batch.async_fetch(self.api, self.public_prices, self.metrics) if batch else None
+
+    def __public_prices_cached(self, start_date: date, end_date: date) -> bool:
+        """Return whether public prices are cached, and count the lookup in the metrics."""
+        if self.public_prices.async_contains(start_date, end_date):
+            self.metrics.public_price_cache_hits += 1
+            return True
+
+        self.metrics.public_price_cache_misses += 1
+        return False
+
+    def __site_fetches(
+        self, site: str | None, kinds: set[str], source: FrankEnergie | RefreshBatchResponse
+    ) -> dict[str, Coroutine]:
+        """Return the queries to run for the given kinds of data of a site."""
+        fetches = {}
+        if REFRESH_PRICES in kinds:
+            fetches[REFRESH_PRICES] = self.__fetch_prices(site, source)
+        if REFRESH_MONTH_SUMMARY in kinds:
+            fetches[REFRESH_MONTH_SUMMARY] = source.month_summary(site)
+        if REFRESH_INVOICES in kinds:
+            fetches[REFRESH_INVOICES] = source.invoices(site)
+
+        return fetches
+
+    def __merge_results(self, site: str | None, results: dict, now: datetime) -> FrankEnergieData:
+        """Merge freshly fetched results of a site into the data of the previous refresh.
+
+        Data of the previous refresh that has expired is dropped. Prices that are None weren't
+        fetched, because they're unchanged since the previous refresh.
+        """
+        if self.data:
+            data = dict(self.data[site])
+        else:
+            data = {
+                DATA_ELECTRICITY: PriceData(),
+                DATA_GAS: PriceData(),
+                DATA_MONTH_SUMMARY: None,
+                DATA_INVOICES: None,
+                **self._histories[site],
+            }
+            # Empty indexes, for when the first prices of the site couldn't be fetched
+            build_price_indexes(data)
+        if results.get(REFRESH_PRICES) is not None:
+            data[DATA_ELECTRICITY] = results[REFRESH_PRICES].electricity
+            data[DATA_GAS] = results[REFRESH_PRICES].gas
+            build_price_indexes(data)
+        if REFRESH_MONTH_SUMMARY in results:
+            data[DATA_MONTH_SUMMARY] = results[REFRESH_MONTH_SUMMARY]
+        if REFRESH_INVOICES in results:
+            data[DATA_INVOICES] = results[REFRESH_INVOICES]
+
+        fetched_at = self._fetched_at.setdefault(site, {})
+        fetched_at.update(dict.fromkeys((kind for kind, result in results.items() if result is not None), now))
+        for kind, ttl in DATA_TTL.items():
+            # The kinds of data with a time to live are stored with the kind as key
+            if kind not in results and kind in fetched_at and now - fetched_at[kind] > ttl:
+                LOGGER.debug("The %s of %s has expired", kind, site)
+                data[kind] = None
+
+        return data
+
+    def fetched_at(self, site: str | None, kind: str) -> datetime | None:
+        """Return when a kind of data of a site was fetched, if known."""
+        return self._fetched_at.get(site, {}).get(kind)
+
+    def __schedule_next_refresh(
+        self, kinds: set[str], now: datetime, data: dict[str | None, FrankEnergieData]
+    ) -> None:
+        """Schedule the next refresh of each kind of data that was just fetched."""
+        if REFRESH_PRICES in kinds:
+            # Prices are known until the end of the last price of the site and commodity which reaches least far
+            prices_until = (
+                min(
+                    site_data[key].all[-1].date_till
+                    for site_data in data.values()
+                    for key in (DATA_ELECTRICITY, DATA_GAS)
+                )
+                if all(site_data[key].all for site_data in data.values() for key in (DATA_ELECTRICITY, DATA_GAS))
+                else None
+            )
+            if (next_refresh := next_price_refresh(now, prices_until)) is not None:
+                self.scheduler.reschedule(REFRESH_PRICES, next_refresh)
+            else:
+                LOGGER.debug("Not all expected prices are published yet, backing off")
+                self.scheduler.backoff([REFRESH_PRICES], now)
+
+        if REFRESH_MONTH_SUMMARY in kinds:
+            self.scheduler.reschedule(REFRESH_MONTH_SUMMARY, now + MONTH_SUMMARY_REFRESH_INTERVAL)
+        if REFRESH_INVOICES in kinds:
+            self.scheduler.reschedule(REFRESH_INVOICES, now + INVOICES_REFRESH_INTERVAL)
+
+    @staticmethod
+    def __price_days() -> list[tuple[date, date]]:
+        """Return the start and end date of each query for prices."""
+        # We request data for today up until the day after tomorrow.
+        # This is to ensure we always request all available data.
+        today = datetime.utcnow().date()
+        tomorrow = today + timedelta(days=1)
+        day_after_tomorrow = today + timedelta(days=2)
+
+        # Fetch data for today and tomorrow separately,
+        # because the gas prices response only contains data for the first day of the query
+        return [(today, tomorrow), (tomorrow, day_after_tomorrow)]
+
+    def __missing_price_days(self) -> list[tuple[date, date]]:
+        """Return the days of __price_days of which the prices aren't complete for all sites."""
+        return [
+            day for day in self.__price_days()
+            if any(day[0] not in self._complete_price_days.get(site, {}) for site in self.sites)
+        ]
+
+    async def __fetch_prices(
+        self, site: str | None, source: FrankEnergie | RefreshBatchResponse
+    ) -> MarketPrices | None:
+        """Fetch the prices of a site for today and tomorrow.
+
+        Prices don't change once they're published, days of which all prices are known aren't fetched again.
+        Returns None when all days were known already, and the prices of the previous refresh are still current.
+        """
+        days = self.__price_days()
+        complete_days = {
+            start_date: prices
+            for start_date, prices in self._complete_price_days.get(site, {}).items()
+            if start_date >= days[0][0]
         }
+        self._complete_price_days[site] = complete_days
+        if self.data and all(start_date in complete_days for start_date, _ in days):
+            return None
+
+        async def fetch_day(start_date: date, end_date: date) -> MarketPrices:
+            if start_date in complete_days:
+                return complete_days[start_date]
+
+            prices = await self.__fetch_prices_with_fallback(start_date, end_date, site, source)
+            if is_complete_day(prices, start_date):
+                complete_days[start_date] = prices
+            return prices
 
-    async def __fetch_prices_with_fallback(self, start_date: date, end_date: date) -> MarketPrices:
+        prices_today, prices_tomorrow = await asyncio.gather(
+            *(fetch_day(start_date, end_date) for start_date, end_date in days)
+        )
+
+        return MarketPrices(
+            electricity=prices_today.electricity + prices_tomorrow.electricity,
+            gas=prices_today.gas + prices_tomorrow.gas,
+        )
+
+    async def __fetch_prices_with_fallback(
+        self, start_date: date, end_date: date, site: str | None, source: FrankEnergie | RefreshBatchResponse
+    ) -> MarketPrices:
         if not self.api.is_authenticated:
-            return await self.api.prices(start_date, end_date)
+            return await self.__fetch_public_prices(start_date, end_date, source)
         else:
-            user_prices = await self.api.user_prices(start_date, self.site_reference)
+            user_prices = await source.user_prices(start_date, site)
 
             if len(user_prices.gas.all) > 0 and len(user_prices.electricity.all) > 0:
                 # If user_prices are available for both gas and electricity return them
                 return user_prices
             else:
-                public_prices = await self.api.prices(start_date, end_date)
+                # Public prices are the same for every site and config entry, so they are shared
+                self.metrics.public_price_fallbacks += 1
+                self.__public_prices_cached(start_date, end_date)
+                public_prices = await self.__fetch_public_prices(start_date, end_date, source)
 
                 # Use public prices if no user prices are available
                 if len(user_prices.gas.all) == 0:
@@ -121,19 +601,10 @@ class FrankEnergieCoordinator(DataUpdateCoordinator):
 
                 return user_prices
 
-    async def __try_renew_token(self):
-
-        try:
-            updated_tokens = await self.api.renew_token()
-
-            data = {
-                CONF_ACCESS_TOKEN: updated_tokens.authToken,
-                CONF_TOKEN: updated_tokens.refreshToken,
-            }
-            self.hass.config_entries.async_update_entry(self.entry, data=data)
-
-            LOGGER.debug("Successfully renewed token")
-
-        except AuthException as ex:
-            LOGGER.error("Failed to renew token: %s. Starting user reauth flow", ex)
-            raise ConfigEntryAuthFailed from ex
+    async def __fetch_public_prices(
+        self, start_date: date, end_date: date, source: FrankEnergie | RefreshBatchResponse
+    ) -> MarketPrices:
+        """Fetch public prices, which are shared between all config entries."""
+        if isinstance(source, RefreshBatchResponse):
+            return await source.prices(start_date, end_date)
+        return await self.public_prices.async_get(self.api, start_date, end_date)
@@ -0,0 +1,34 @@
+"""Diagnostics support for Frank Energie."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.components.diagnostics import async_redact_data
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.const import CONF_ACCESS_TOKEN, CONF_PASSWORD, CONF_TOKEN, CONF_USERNAME
+from homeassistant.core import HomeAssistant
+
+from .const import CONF_COORDINATOR, CONF_SITE_REFERENCE, CONF_SITES, DOMAIN
+from .coordinator import FrankEnergieCoordinator
+
+TO_REDACT = {CONF_ACCESS_TOKEN, CONF_PASSWORD, CONF_TOKEN, CONF_USERNAME, CONF_SITE_REFERENCE, CONF_SITES}
+
+
+async def async_get_config_entry_diagnostics(hass: HomeAssistant, entry: ConfigEntry) -> dict[str, Any]:
+    """Return diagnostics for a config entry."""
+    coordinator: FrankEnergieCoordinator = hass.data[DOMAIN][entry.entry_id][CONF_COORDINATOR]
+
+    return {
+        "entry": {
+            "data": async_redact_data(entry.data, TO_REDACT),
+            "options": dict(entry.options),
+        },
+        "authenticated": coordinator.api.is_authenticated,
+        "sites": len(coordinator.sites),
+        "last_update_success": coordinator.last_update_success,
+        "data_stale": coordinator.data_stale,
+        "suppressed_writes": coordinator.suppressed_writes,
+        "schedule": coordinator.scheduler.as_dict(),
+        "metrics": coordinator.metrics.as_dict(),
+        "circuit_breaker": coordinator.api.breaker.as_dict(),
+    }
@@ -0,0 +1,65 @@
+"""Base entity of the Frank Energie component."""
+from __future__ import annotations
+
+from typing import Any
+
+from homeassistant.config_entries import ConfigEntry
+from homeassistant.helpers.device_registry import DeviceEntryType
+from homeassistant.helpers.entity import DeviceInfo, EntityDescription
+from homeassistant.helpers.update_coordinator import CoordinatorEntity
+
+from .const import ATTR_FETCHED_AT, ATTRIBUTION, DOMAIN, ICON, SERVICE_NAME_PRICES
+from .coordinator import FrankEnergieCoordinator
+
+
+class FrankEnergieEntity(CoordinatorEntity[FrankEnergieCoordinator]):
+    """Entity of a site of the account, grouped in a device per service."""
+
+    _attr_attribution = ATTRIBUTION
+
+    def __init__(
+        self,
+        coordinator: FrankEnergieCoordinator,
+        description: EntityDescription,
+        entry: ConfigEntry,
+        site_reference: str | None,
+        service_name: str | None,
+    ) -> None:
+        """Initialize the entity."""
+        self.entity_description = description
+        self._site_reference = site_reference
+        self._attr_icon = description.icon or ICON
+
+        # Do not set extra identifier for default service, backwards compatibility
+        if service_name is SERVICE_NAME_PRICES:
+            device_info_identifiers = {(DOMAIN, f"{entry.entry_id}")}
+        else:
+            device_info_identifiers = {(DOMAIN, f"{entry.entry_id}", service_name)}
+        device_name = f"Frank Energie - {service_name}"
+
+        # Entities of the primary site keep their original IDs and names, those of other sites include the site
+        if site_reference == coordinator.site_reference:
+            self._attr_unique_id = f"{entry.unique_id}.{description.key}"
+        else:
+            self._attr_unique_id = f"{entry.unique_id}.{site_reference}.{description.key}"
+            self._attr_name = f"{description.name} ({coordinator.sites[site_reference]})"
+            device_info_identifiers = {(DOMAIN, f"{entry.entry_id}", site_reference, service_name)}
+            device_name += f" ({coordinator.sites[site_reference]})"
+
+        self._attr_device_info = DeviceInfo(
+            identifiers=device_info_identifiers,
+            name=device_name,
+            manufacturer="Frank Energie",
+            entry_type=DeviceEntryType.SERVICE,
+            configuration_url="https://www.frankenergie.nl/goedkoop",
+        )
+
+        super().__init__(coordinator)
+
+
+def attributes_fingerprint(attributes: dict[str, Any]) -> int:
+    """Return what identifies the attributes of a state, leaving out when its data was fetched.
+
+    A refresh that fetches the same data again only moves fetched_at, which isn't worth a state write.
+    """
+    return hash(repr({name: value for name, value in attributes.items() if name != ATTR_FETCHED_AT}))
@@ -0,0 +1,104 @@
+"""Prices of the last days, kept after they've dropped out of the fetched prices."""
+from __future__ import annotations
+
+from collections import deque
+from dataclasses import dataclass
+from datetime import date, timedelta
+
+from homeassistant.util import dt as dt_util
+from python_frank_energie.models import Price
+
+from .price_index import PriceIndex
+
+
+@dataclass(frozen=True)
+class HistoryDay:
+    """The prices of a single (local) day, with the average of their totals."""
+
+    day: date
+    prices: tuple[Price, ...]
+    avg: float
+
+
+class PriceHistory:
+    """Rolling window of the prices of complete days, of a single commodity.
+
+    Days are added from each new price index, and are kept for the given number of days after they
+    have passed. The window also holds today and tomorrow, so it never holds more than `days` + 2 days.
+    """
+
+    def __init__(self, days: int) -> None:
+        """Initialize an empty history."""
+        self.days = days
+        self._window: deque[HistoryDay] = deque(maxlen=days + 2)
+
+    def __len__(self) -> int:
+        """Return the number of days in the history."""
+        return len(self._window)
+
+    def __iter__(self):
+        """Iterate over the days in the history, the oldest first."""
+        return iter(self._window)
+
+    def resize(self, days: int) -> None:
+        """Change the number of past days to keep, evicting the oldest days when there are too many."""
+        self.days = days
+        self._window = deque(self._window, maxlen=days + 2)
+        self.evict(dt_util.now().date())
+
+    def add(self, index: PriceIndex) -> None:
+        """Add the complete days of a price index, replacing those that are already known."""
+        for day, stats in index.days.items():
+            if index.ends[stats.end - 1] - index.starts[stats.start] < _day_seconds(day):
+                # Not all prices of the day are known (yet)
+                continue
+            self.add_day(HistoryDay(day, tuple(index.rows[stats.start:stats.end]), stats.avg))
+
+    def add_day(self, history_day: HistoryDay) -> None:
+        """Add a single day, keeping the days in order."""
+        if self._window and history_day.day <= self._window[-1].day:
+            # Replaced or inserted before the last day, rebuild the window in order
+            days = {known.day: known for known in self._window}
+            days[history_day.day] = history_day
+            self._window = deque((days[day] for day in sorted(days)), maxlen=self._window.maxlen)
+        else:
+            # New days are appended, the ring drops the oldest day when it's full
+            self._window.append(history_day)
+        self.evict(dt_util.now().date())
+
+    def evict(self, today: date) -> None:
+        """Remove the days that are more than `days` days before today."""
+        first_day = today - timedelta(days=self.days)
+        while self._window and self._window[0].day < first_day:
+            self._window.popleft()
+
+    def day(self, day: date) -> HistoryDay | None:
+        """Return the given day, if it's in the history."""
+        return next((known for known in self._window if known.day == day), None)
+
+    def average(self, day: date) -> float | None:
+        """Return the average price of the given day, if it's in the history."""
+        return history_day.avg if (history_day := self.day(day)) else None
+
+    def past_days(self, today: date) -> list[HistoryDay]:
+        """Return the days in the history before today, the oldest first."""
+        return [known for known in self._window if today - timedelta(days=self.days) <= known.day < today]
+
+    def trailing_average(self, today: date) -> float | None:
+        """Return the mean of the daily averages of the past days, if there are any."""
+        if not (past_days := self.past_days(today)):
+            return None
+        return round(sum(known.avg for known in past_days) / len(past_days), 5)
+
+    def difference(self, avg: float, today: date) -> float | None:
+        """Return how much an average price of today differs from the trailing average, as a percentage."""
+        if not (trailing := self.trailing_average(today)):
+            return None
+        return round((avg / trailing - 1) * 100, 1)
+
+
+def _day_seconds(day: date) -> float:
+    """Return the length of a local day in seconds, which differs on the days the clocks change."""
+    start = dt_util.start_of_local_day(day)
+    end = dt_util.start_of_local_day(day + timedelta(days=1))
+    return (end - start).total_seconds()
@@ -0,0 +1,170 @@
+"""Metrics of the requests to the Frank Energie API and the refreshes of the coordinator."""
+from __future__ import annotations
+
+import re
+from bisect import bisect_left
+from dataclasses import asdict, dataclass, field
+from time import monotonic
+from typing import Any
+
+from homeassistant.helpers.json import json_dumps
+from .client import FrankEnergieClient
+
+# Upper bounds of the buckets of the latency histograms, in seconds
+LATENCY_BUCKETS = (0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def query_kind(query: dict[str, Any]) -> str:
+    """Return the kind of a query, from its operation name in snake case."""
+    name = query.get("operationName")
+    if name is None and (match := re.search(r"(?:query|mutation)\s+(\w+)", query.get("query", ""))):
+        name = match.group(1)
+    if name is None:
+        return "unknown"
+
+    # Public and user prices are both named MarketPrices
+    if name == "MarketPrices":
+        return "user_prices" if "customerMarketPrices" in query["query"] else "prices"
+    return re.sub(r"(?<!^)(?=[A-Z])", "_", name).lower()
+
+
+@dataclass
+class QueryMetrics:
+    """Metrics of the requests of a kind of query."""
+
+    requests: int = 0
+    failures: int = 0
+    retries: int = 0
+    response_bytes: int = 0
+    total_latency: float = 0
+    last_latency: float | None = None
+    # Number of requests with a latency up to each of the LATENCY_BUCKETS, and above the last one
+    latency_histogram: list[int] = field(default_factory=lambda: [0] * (len(LATENCY_BUCKETS) + 1))
+
+    @property
+    def average_latency(self) -> float | None:
+        """Average latency of the requests, in seconds."""
+        return self.total_latency / self.requests if self.requests else None
+
+
+@dataclass
+class BatchedFieldMetrics:
+    """Metrics of the fields of a kind of query in batched queries.
+
+    The latency of the fields is that of the batched query as a whole, which is recorded as a refresh.
+    """
+
+    fields: int = 0
+    failures: int = 0
+    response_bytes: int = 0
+
+
+@dataclass
+class CoordinatorMetrics:
+    """Metrics of a config entry, collected since it was set up."""
+
+    queries: dict[str, QueryMetrics] = field(default_factory=dict)
+    # Fields of batched queries, by the kind of query they replace
+    batched_fields: dict[str, BatchedFieldMetrics] = field(default_factory=dict)
+    refreshes: int = 0
+    refresh_failures: int = 0
+    last_refresh_duration: float | None = None
+    public_price_fallbacks: int = 0
+    public_price_cache_hits: int = 0
+    public_price_cache_misses: int = 0
+
+    def query(self, kind: str) -> QueryMetrics:
+        """Return the metrics of a kind of query."""
+        return self.queries.setdefault(kind, QueryMetrics())
+
+    def record_query(self, kind: str, latency: float, response_bytes: int, failed: bool) -> None:
+        """Record a request to the API."""
+        metrics = self.query(kind)
+        metrics.requests += 1
+        metrics.failures += failed
+        metrics.response_bytes += response_bytes
+        metrics.total_latency += latency
+        metrics.last_latency = latency
+        metrics.latency_histogram[bisect_left(LATENCY_BUCKETS, latency)] += 1
+
+    def record_batched_field(self, kind: str, response_bytes: int, failed: bool) -> None:
+        """Record a field of a batched query, which is part of a request that is recorded on its own."""
+        metrics = self.batched_fields.setdefault(kind, BatchedFieldMetrics())
+        metrics.fields += 1
+        metrics.failures += failed
+        metrics.response_bytes += response_bytes
+
+    def record_retry(self, kind: str) -> None:
+        """Record that a kind of query is tried again."""
+        self.query(kind).retries += 1
+
+    def failures_by_kind(self) -> dict[str, int]:
+        """Return the number of failed requests of each kind of query."""
+        return {kind: metrics.failures for kind, metrics in self.queries.items()}
+
+    def record_refresh(self, duration: float, failed: bool) -> None:
+        """Record a refresh of the coordinator."""
+        self.refreshes += 1
+        self.refresh_failures += failed
+        self.last_refresh_duration = duration
+
+    @property
+    def requests(self) -> int:
+        """Number of requests to the API."""
+        return sum(metrics.requests for metrics in self.queries.values())
+
+    @property
+    def failures(self) -> int:
+        """Number of failed requests to the API."""
+        return sum(metrics.failures for metrics in self.queries.values())
+
+    @property
+    def response_bytes(self) -> int:
+        """Size of all responses of the API."""
+        return sum(metrics.response_bytes for metrics in self.queries.values())
+
+    @property
+    def token_renewals(self) -> int:
+        """Number of times the authentication tokens were renewed."""
+        return self.queries.get("renew_token", QueryMetrics()).requests
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the metrics as a dict, for the diagnostics."""
+        return {
+            **asdict(self),
+            "queries": {
+                kind: {**asdict(metrics), "average_latency": metrics.average_latency}
+                for kind, metrics in self.queries.items()
+            },
+            "latency_buckets": LATENCY_BUCKETS,
+            "requests": self.requests,
+            "failures": self.failures,
+            "response_bytes": self.response_bytes,
+            "token_renewals": self.token_renewals,
+        }
+
+
+class InstrumentedFrankEnergie(FrankEnergieClient):
+    """API client recording the latency and response size of every request in the metrics.
+
+    The response size is the size of the JSON encoded response, the client doesn't expose the
+    size of the response body itself.
+    """
+
+    def __init__(self, metrics: CoordinatorMetrics, *args, **kwargs) -> None:
+        """Initialize the client."""
+        super().__init__(*args, **kwargs)
+        self.metrics = metrics
+
+    async def async_query(self, query: dict[str, Any]) -> dict[str, Any]:
+        start = monotonic()
+        try:
+            response = await super().async_query(query)
+        except Exception:
+            self.metrics.record_query(query_kind(query), monotonic() - start, 0, True)
+            raise
+
+        self.metrics.record_query(
+            query_kind(query), monotonic() - start, len(json_dumps(response)), bool(response.get("errors"))
+        )
+        return response
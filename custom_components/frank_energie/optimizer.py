@@ -0,0 +1,86 @@
+"""Charge and discharge schedules, planned over the known electricity prices."""
+from __future__ import annotations
+
+import heapq
+from bisect import bisect_right
+from dataclasses import dataclass
+from datetime import datetime
+
+from homeassistant.util import dt as dt_util
+
+from .price_index import PriceIndex
+
+
+@dataclass(frozen=True)
+class ScheduleSlot:
+    """A period in which to charge (or discharge), with the energy exchanged with the grid."""
+
+    start: datetime
+    end: datetime
+    energy: float
+    power: float
+    price: float
+
+    @property
+    def cost(self) -> float:
+        """Cost of the energy exchanged in this period, negative when discharging."""
+        return self.energy * self.price
+
+
+def optimize_schedule(
+    index: PriceIndex,
+    energy: float,
+    max_power: float,
+    deadline: datetime,
+    efficiency: float = 1.0,
+    discharge: bool = False,
+    now: datetime | None = None,
+) -> list[ScheduleSlot]:
+    """Plan when to charge (or discharge) the given energy in kWh before the deadline.
+
+    The cheapest (or most expensive when discharging) periods are used first, at a power of at
+    most `max_power` kW. Because the cost of each period is linear in its energy, filling the
+    best periods first is optimal. The energy exchanged with the grid includes the losses of the
+    given round-trip efficiency. Raises ValueError when the energy can't be exchanged in time.
+    """
+    now = now or dt_util.utcnow()
+    if deadline <= now:
+        raise ValueError(f"The deadline {deadline} has already passed")
+
+    start_ts, deadline_ts = now.timestamp(), deadline.timestamp()
+    grid_energy = energy * efficiency if discharge else energy / efficiency
+
+    # Candidate periods are the parts of each slot between now and the deadline, ordered by price,
+    # only as many are popped from the heap as needed to exchange the energy
+    candidates = []
+    for row in range(bisect_right(index.ends, start_ts), len(index)):
+        if index.starts[row] >= deadline_ts:
+            break
+        begin, end = max(index.starts[row], start_ts), min(index.ends[row], deadline_ts)
+        candidates.append((-index.totals[row] if discharge else index.totals[row], row, begin, end))
+    heapq.heapify(candidates)
+
+    slots = []
+    remaining = grid_energy
+    while remaining > 1e-9 and candidates:
+        _, row, begin, end = heapq.heappop(candidates)
+        slot_energy = min(remaining, max_power * (end - begin) / 3600)
+        remaining -= slot_energy
+        slots.append(
+            ScheduleSlot(
+                start=dt_util.utc_from_timestamp(begin),
+                end=dt_util.utc_from_timestamp(end),
+                energy=round(-slot_energy if discharge else slot_energy, 5),
+                power=round(slot_energy / (end - begin) * 3600, 5),
+                price=index.totals[row],
+            )
+        )
+
+    if remaining > 1e-9:
+        available = grid_energy - remaining
+        raise ValueError(
+            f"Only {available:.2f} kWh can be {'discharged' if discharge else 'charged'} before {deadline}, "
+            f"at most {max_power} kW with the known prices"
+        )
+
+    return sorted(slots, key=lambda slot: slot.start)
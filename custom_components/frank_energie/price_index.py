@@ -0,0 +1,328 @@
+"""Index over price data, for fast lookups of the current price and daily statistics."""
+from __future__ import annotations
+
+import logging
+from array import array
+from bisect import bisect_right
+from dataclasses import dataclass
+from datetime import date, datetime
+from math import sqrt
+from typing import Any
+
+from homeassistant.util import dt as dt_util
+from python_frank_energie.models import Price, PriceData
+
+from .const import ATTR_PRICES, ATTR_PRICES_INTERVAL, ATTR_PRICES_START
+
+_LOGGER = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class DayStats:
+    """Statistics of the total prices of a single day.
+
+    `start` and `end` are the (exclusive) range of rows of the day in the index, `argmin` and
+    `argmax` are the rows with the lowest and highest price.
+    """
+
+    start: int
+    end: int
+    min: float
+    max: float
+    avg: float
+    argmin: int
+    argmax: int
+
+
+@dataclass(frozen=True)
+class PriceWindow:
+    """A contiguous period of prices, with the average of their totals."""
+
+    start: datetime
+    end: datetime
+    avg: float
+
+
+class PriceIndex:
+    """Prices of a PriceData object, stored as flat arrays ordered by their start time.
+
+    The index is built once when new prices are fetched, so looking up the current price or the
+    statistics of a day doesn't require scanning all prices.
+    """
+
+    def __init__(self, price_data: PriceData) -> None:
+        """Build the index."""
+        self.rows: list[Price] = sorted(price_data.all, key=lambda price: price.date_from)
+        self.starts = array("d", (price.date_from.timestamp() for price in self.rows))
+        self.ends = array("d", (price.date_till.timestamp() for price in self.rows))
+        self.totals = array("d", (price.total for price in self.rows))
+
+        # When all slots have the same length and follow each other without gaps, the slot for
+        # a point in time can be calculated directly
+        self.slot_seconds: float | None = None
+        if self.rows:
+            length = self.ends[0] - self.starts[0]
+            if all(
+                end - start == length and (i == 0 or start == self.ends[i - 1])
+                for i, (start, end) in enumerate(zip(self.starts, self.ends))
+            ):
+                self.slot_seconds = length
+
+        # Position of each price within its day, filled in along with the statistics of each day
+        self.ranks = array("i", bytes(array("i").itemsize * len(self.rows)))
+        self.ranks_desc = array("i", self.ranks)
+        self.percentiles = array("d", bytes(array("d").itemsize * len(self.rows)))
+        self.zscores = array("d", self.percentiles)
+        self.days: dict[date, DayStats] = self._build_day_stats()
+        self._attributes: dict[tuple[str, bool], dict[str, Any]] = {}
+        self._windows: dict[tuple[float, bool, int], PriceWindow | None] = {}
+
+    def _build_day_stats(self) -> dict[date, DayStats]:
+        """Calculate the statistics of each (local) day in a single pass over the rows."""
+        days = {}
+        start = 0
+        for i in range(1, len(self.rows) + 1):
+            if i < len(self.rows) and self._local_date(i) == self._local_date(start):
+                continue
+
+            order = sorted(range(start, i), key=self.totals.__getitem__)
+            avg = sum(self.totals[start:i]) / (i - start)
+            days[self._local_date(start)] = DayStats(
+                start=start,
+                end=i,
+                min=self.totals[order[0]],
+                max=self.totals[order[-1]],
+                avg=round(avg, 5),
+                argmin=order[0],
+                argmax=max(order, key=self.totals.__getitem__),
+            )
+            self._rank_day(order, avg)
+            start = i
+
+        return days
+
+    def _rank_day(self, order: list[int], avg: float) -> None:
+        """Fill in the rank, percentile and z-score of the rows of a day, given in order of their price.
+
+        Equal prices share the same rank, the lowest price has rank 1. The percentile counts the prices that are
+        strictly lower, so equal prices share it too, and the lowest price has percentile 0.
+        """
+        std = sqrt(sum((self.totals[row] - avg) ** 2 for row in order) / len(order))
+        position = 0
+        while position < len(order):
+            group_end = position + 1
+            while group_end < len(order) and self.totals[order[group_end]] == self.totals[order[position]]:
+                group_end += 1
+
+            for row in order[position:group_end]:
+                self.ranks[row] = position + 1
+                self.ranks_desc[row] = len(order) - group_end + 1
+                self.percentiles[row] = round(position / len(order) * 100, 1)
+                self.zscores[row] = round((self.totals[row] - avg) / std, 3) if std else 0
+            position = group_end
+
+    def _local_date(self, row: int) -> date:
+        return dt_util.as_local(self.rows[row].date_from).date()
+
+    def __len__(self) -> int:
+        """Return the number of prices in the index."""
+        return len(self.rows)
+
+    def slot_at(self, when: datetime) -> int | None:
+        """Return the row of the price that's applicable at the given moment, if any."""
+        timestamp = when.timestamp()
+        if not self.rows or not self.starts[0] <= timestamp < self.ends[-1]:
+            return None
+
+        if self.slot_seconds:
+            return int((timestamp - self.starts[0]) // self.slot_seconds)
+
+        row = bisect_right(self.starts, timestamp) - 1
+        return row if timestamp < self.ends[row] else None
+
+    def next_boundary(self, when: datetime) -> datetime | None:
+        """Return the first moment after the given one at which the applicable price changes, if any."""
+        timestamp = when.timestamp()
+        if not self.rows or timestamp >= self.ends[-1]:
+            return None
+
+        if timestamp < self.starts[0]:
+            boundary = self.starts[0]
+        elif self.slot_seconds:
+            boundary = self.starts[0] + ((timestamp - self.starts[0]) // self.slot_seconds + 1) * self.slot_seconds
+        else:
+            # With gaps between the prices, the price changes at the end of the current one or at the start
+            # of the next one
+            row = bisect_right(self.starts, timestamp) - 1
+            boundary = self.ends[row] if timestamp < self.ends[row] else self.starts[row + 1]
+        return dt_util.utc_from_timestamp(boundary)
+
+    @property
+    def current_row(self) -> int:
+        """Row of the price that's currently applicable."""
+        if (row := self.slot_at(dt_util.utcnow())) is None:
+            raise IndexError("No price available for the current moment")
+        return row
+
+    @property
+    def current_slot(self) -> Price:
+        """Price that's currently applicable."""
+        return self.rows[self.current_row]
+
+    @property
+    def current_rank(self) -> int:
+        """Rank of the current price within today, 1 being the lowest."""
+        return self.ranks[self.current_row]
+
+    @property
+    def current_percentile(self) -> float:
+        """Percentage of today's prices that are lower than the current one."""
+        return self.percentiles[self.current_row]
+
+    @property
+    def current_zscore(self) -> float:
+        """Number of standard deviations the current price differs from today's average."""
+        return self.zscores[self.current_row]
+
+    def in_cheapest(self, hours: float) -> bool:
+        """Return whether the current price is among the cheapest of today, for the given number of hours."""
+        row = self.current_row
+        return self.ranks[row] <= self._slots(row, hours)
+
+    def in_most_expensive(self, hours: float) -> bool:
+        """Return whether the current price is among the most expensive of today, for the given number of hours."""
+        row = self.current_row
+        return self.ranks_desc[row] <= self._slots(row, hours)
+
+    def _slots(self, row: int, hours: float) -> int:
+        """Convert a number of hours to a number of slots, of the length of the given row."""
+        return round(hours * 3600 / (self.ends[row] - self.starts[row]))
+
+    def day(self, day: date) -> DayStats:
+        """Return the statistics of the given day."""
+        if day not in self.days:
+            raise ValueError(f"No prices available for {day}")
+        return self.days[day]
+
+    @property
+    def today(self) -> DayStats:
+        """Statistics of today."""
+        return self.day(dt_util.now().date())
+
+    @property
+    def today_min(self) -> Price:
+        """Price with the lowest total for today."""
+        return self.rows[self.today.argmin]
+
+    @property
+    def today_max(self) -> Price:
+        """Price with the highest total for today."""
+        return self.rows[self.today.argmax]
+
+    @property
+    def today_avg(self) -> float:
+        """Average price for today."""
+        return self.today.avg
+
+    def window(self, hours: float, cheapest: bool = True, after: datetime | None = None) -> PriceWindow | None:
+        """Return the cheapest (or most expensive) contiguous window of the given length.
+
+        Only windows that start in the current slot or later are considered, or in the slot at
+        `after` when given. Windows are kept per index, so they're only searched again after new
+        prices or when the first slot has passed. A window always covers a whole number of slots,
+        so a length that doesn't fit the slots is rounded to the nearest number of slots.
+        """
+        first = bisect_right(self.ends, (after or dt_util.utcnow()).timestamp())
+        key = (hours, cheapest, first)
+        if key not in self._windows:
+            self._windows[key] = self._find_window(first, self._window_seconds(first, hours), cheapest)
+        return self._windows[key]
+
+    def _window_seconds(self, first: int, hours: float) -> float:
+        """Round the length of a window to whole slots, of the length of the slot it starts from."""
+        if first >= len(self.rows):
+            return hours * 3600
+
+        length = self.ends[first] - self.starts[first]
+        seconds = max(round(hours * 3600 / length), 1) * length
+        if seconds != hours * 3600:
+            _LOGGER.debug(
+                "A window of %s hours doesn't fit slots of %d minutes, using %s hours instead",
+                hours,
+                length / 60,
+                seconds / 3600,
+            )
+        return seconds
+
+    def _find_window(self, first: int, seconds: float, cheapest: bool) -> PriceWindow | None:
+        """Find the window in a single pass, sliding the window along the rows from the first row.
+
+        The window is extended at its end as long as the rows follow each other and it isn't
+        longer than requested, and shrunk at its start for the next candidate.
+        """
+        best: tuple[float, int, int] | None = None
+        total = 0.0
+        end = first
+        for start in range(first, len(self.rows)):
+            if end <= start:
+                end, total = start, 0.0
+
+            while (
+                end < len(self.rows)
+                and self.ends[end] - self.starts[start] <= seconds
+                and (end == start or self.starts[end] == self.ends[end - 1])
+            ):
+                total += self.totals[end]
+                end += 1
+
+            if end > start:
+                if self.ends[end - 1] - self.starts[start] == seconds:
+                    # Rounded, so the running sum's rounding errors can't decide between equal windows
+                    avg = round(total / (end - start), 5)
+                    if best is None or (avg < best[0] if cheapest else avg > best[0]):
+                        best = (avg, start, end)
+                total -= self.totals[start]
+
+        if best is None:
+            return None
+
+        avg, start, end = best
+        return PriceWindow(start=self.rows[start].date_from, end=self.rows[end - 1].date_till, avg=avg)
+
+    def prices_attribute(self, field: str, compact: bool = False) -> dict[str, Any]:
+        """Return the attributes listing all prices, using the given field of each price.
+
+        The attributes are built once per index, so once per refresh of the prices.
+        """
+        if (field, compact) not in self._attributes:
+            self._attributes[(field, compact)] = (
+                self._compact_prices_attribute(field) if compact else {
+                    ATTR_PRICES: [
+                        {"from": price.date_from, "till": price.date_till, "price": getattr(price, field)}
+                        for price in self.rows
+                    ]
+                }
+            )
+        return self._attributes[(field, compact)]
+
+    def _compact_prices_attribute(self, field: str) -> dict[str, Any]:
+        """Return the prices as start time, interval in minutes and a list of values.
+
+        Slots without a known price are None, so the position of a value always matches its time.
+        """
+        if not self.rows:
+            return {ATTR_PRICES_START: None, ATTR_PRICES_INTERVAL: None, ATTR_PRICES: []}
+
+        interval = self.slot_seconds or min(end - start for start, end in zip(self.starts, self.ends))
+        values = [None] * round((self.ends[-1] - self.starts[0]) / interval)
+        for price, start, end in zip(self.rows, self.starts, self.ends):
+            first = round((start - self.starts[0]) / interval)
+            value = getattr(price, field)
+            for position in range(first, first + round((end - start) / interval)):
+                values[position] = value
+
+        return {
+            ATTR_PRICES_START: self.rows[0].date_from,
+            ATTR_PRICES_INTERVAL: round(interval / 60),
+            ATTR_PRICES: values,
+        }
@@ -0,0 +1,86 @@
+"""Public market prices, shared between all Frank Energie config entries."""
+from __future__ import annotations
+
+import asyncio
+import logging
+from datetime import date
+from time import monotonic
+
+from homeassistant.core import HomeAssistant, callback
+from python_frank_energie import FrankEnergie
+from python_frank_energie.models import MarketPrices
+
+from .const import DATA_PUBLIC_PRICES, PUBLIC_PRICES_CACHE_TTL
+
+LOGGER = logging.getLogger(__name__)
+
+
+class PublicPriceCache:
+    """Cache of public market prices, keyed by the requested date range.
+
+    Concurrent requests for the same date range share a single request to the API, and its result
+    is reused for a short while after it has been received.
+    """
+
+    def __init__(self, hass: HomeAssistant) -> None:
+        """Initialize the cache."""
+        self.hass = hass
+        self._requests: dict[tuple[date, date | None], tuple[float, asyncio.Future[MarketPrices]]] = {}
+
+    async def async_get(self, api: FrankEnergie, start_date: date, end_date: date | None = None) -> MarketPrices:
+        """Return the public prices for the given date range, requesting them only when needed."""
+        self._async_purge()
+        key = (start_date, end_date)
+
+        if key in self._requests:
+            LOGGER.debug("Reusing public prices of %s - %s", start_date, end_date)
+        else:
+            request = self.hass.async_create_task(api.prices(start_date, end_date))
+            request.add_done_callback(lambda _: self._async_request_done(key, request))
+            self._requests[key] = (monotonic(), request)
+
+        # Shield the shared request, so it's not cancelled when one of the waiting callers is
+        return await asyncio.shield(self._requests[key][1])
+
+    @callback
+    def async_contains(self, start_date: date, end_date: date | None = None) -> bool:
+        """Return whether prices for the date range are cached or being requested."""
+        self._async_purge()
+        return (start_date, end_date) in self._requests
+
+    @callback
+    def async_set(self, prices: MarketPrices, start_date: date, end_date: date | None = None) -> None:
+        """Add prices for the date range that were requested some other way, unless they're already known."""
+        self._async_purge()
+        if (start_date, end_date) not in self._requests:
+            request = self.hass.loop.create_future()
+            request.set_result(prices)
+            self._requests[start_date, end_date] = (monotonic(), request)
+
+    @callback
+    def _async_request_done(self, key: tuple[date, date | None], request: asyncio.Future[MarketPrices]) -> None:
+        """Don't keep failed requests, so the next caller tries again."""
+        if key not in self._requests or self._requests[key][1] is not request:
+            return
+
+        if request.cancelled() or request.exception() is not None:
+            del self._requests[key]
+        else:
+            # Results expire relative to when they were received
+            self._requests[key] = (monotonic(), request)
+
+    @callback
+    def _async_purge(self) -> None:
+        """Remove results that have expired."""
+        expire = monotonic() - PUBLIC_PRICES_CACHE_TTL.total_seconds()
+        for key, (received, request) in list(self._requests.items()):
+            if request.done() and received < expire:
+                del self._requests[key]
+
+
+@callback
+def async_get_public_price_cache(hass: HomeAssistant) -> PublicPriceCache:
+    """Return the public price cache shared by all config entries."""
+    if DATA_PUBLIC_PRICES not in hass.data:
+        hass.data[DATA_PUBLIC_PRICES] = PublicPriceCache(hass)
+    return hass.data[DATA_PUBLIC_PRICES]
@@ -0,0 +1,164 @@
+"""Retries and a circuit breaker for the requests to the Frank Energie API."""
+from __future__ import annotations
+
+import asyncio
+import logging
+from datetime import timedelta
+from time import monotonic
+from typing import Any
+
+from .const import (
+    CIRCUIT_FAILURE_THRESHOLD,
+    CIRCUIT_RESET_TIMEOUT,
+    REQUEST_RETRY_ATTEMPTS,
+    REQUEST_RETRY_BACKOFF_MAX,
+    REQUEST_RETRY_BACKOFF_MIN,
+)
+from .metrics import CoordinatorMetrics, InstrumentedFrankEnergie, query_kind
+from .scheduler import backoff
+
+LOGGER = logging.getLogger(__name__)
+
+CIRCUIT_CLOSED = "closed"
+CIRCUIT_OPEN = "open"
+CIRCUIT_HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(ValueError):
+    """Raised instead of sending a request while the API is considered down.
+
+    It's a ValueError like the network errors of the client, so it's handled the same way.
+    """
+
+
+class CircuitBreaker:
+    """Stops sending requests after a number of failures in a row.
+
+    When the reset timeout has passed, a single request at a time is let through to probe the API.
+    The first probe that succeeds closes the circuit again, a failing probe keeps it open.
+    """
+
+    def __init__(
+        self, threshold: int = CIRCUIT_FAILURE_THRESHOLD, reset_timeout: timedelta = CIRCUIT_RESET_TIMEOUT
+    ) -> None:
+        """Initialize the circuit breaker."""
+        self.threshold = threshold
+        self.reset_timeout = reset_timeout.total_seconds()
+        self.failures = 0
+        self.opened = 0
+        self.rejected = 0
+        self._opened_at: float | None = None
+        self._probing = False
+
+    @property
+    def state(self) -> str:
+        """Return the state of the circuit."""
+        if self._opened_at is None:
+            return CIRCUIT_CLOSED
+        if monotonic() - self._opened_at < self.reset_timeout:
+            return CIRCUIT_OPEN
+        return CIRCUIT_HALF_OPEN
+
+    def acquire(self) -> bool:
+        """Return whether a request may be sent, it's a probe when the circuit is half open.
+
+        Every acquired request must be followed by record_success or record_failure.
+        """
+        state = self.state
+        if state == CIRCUIT_CLOSED:
+            return True
+        if state == CIRCUIT_HALF_OPEN and not self._probing:
+            self._probing = True
+            return True
+        self.rejected += 1
+        return False
+
+    def record_success(self) -> None:
+        """Record a request that reached the API, closing the circuit."""
+        if self._opened_at is not None:
+            LOGGER.info("Frank Energie API is reachable again")
+        self.failures = 0
+        self._opened_at = None
+        self._probing = False
+
+    def record_failure(self) -> None:
+        """Record a request that didn't reach the API, opening the circuit when there are too many."""
+        self.failures += 1
+        if self._probing or (self._opened_at is None and self.failures >= self.threshold):
+            if self._opened_at is None:
+                LOGGER.warning(
+                    "Frank Energie API failed %s times in a row, pausing requests for %s seconds",
+                    self.failures,
+                    self.reset_timeout,
+                )
+                self.opened += 1
+            self._opened_at = monotonic()
+        self._probing = False
+
+    def release(self) -> None:
+        """Release an acquired request that was cancelled, without changing the state."""
+        self._probing = False
+
+    def as_dict(self) -> dict[str, Any]:
+        """Return the state of the circuit breaker, for the diagnostics."""
+        return {
+            "state": self.state,
+            "failures": self.failures,
+            "opened": self.opened,
+            "rejected": self.rejected,
+        }
+
+
+class ResilientFrankEnergie(InstrumentedFrankEnergie):
+    """API client retrying requests that fail on a network error, behind a circuit breaker.
+
+    Errors returned by the API itself aren't retried, the same request would fail again. Every
+    attempt is recorded in the metrics, a retry is recorded as well.
+    """
+
+    def __init__(
+        self,
+        metrics: CoordinatorMetrics,
+        *args,
+        breaker: CircuitBreaker | None = None,
+        attempts: int = REQUEST_RETRY_ATTEMPTS,
+        backoff_min: timedelta = REQUEST_RETRY_BACKOFF_MIN,
+        backoff_max: timedelta = REQUEST_RETRY_BACKOFF_MAX,
+        **kwargs,
+    ) -> None:
+        """Initialize the client."""
+        super().__init__(metrics, *args, **kwargs)
+        self.breaker = breaker or CircuitBreaker()
+        self.attempts = attempts
+        self.backoff_min = backoff_min
+        self.backoff_max = backoff_max
+
+    async def async_query(self, query: dict[str, Any]) -> dict[str, Any]:
+        kind = query_kind(query)
+        attempt = 0
+        while True:
+            if not self.breaker.acquire():
+                raise CircuitOpenError(f"Request skipped, the Frank Energie API is considered down ({kind})")
+
+            try:
+                response = await super().async_query(query)
+            except ValueError:
+                self.breaker.record_failure()
+                attempt += 1
+                if attempt == self.attempts or self.breaker.state != CIRCUIT_CLOSED:
+                    raise
+            except asyncio.CancelledError:
+                self.breaker.release()
+                raise
+            except Exception:
+                # The API was reached, it rejected the tokens for example
+                self.breaker.record_success()
+                raise
+            else:
+                self.breaker.record_success()
+                return response
+
+            self.metrics.record_retry(kind)
+            delay = backoff(attempt - 1, self.backoff_min, self.backoff_max)
+            LOGGER.debug("Request %s failed, trying again in %.1f seconds", kind, delay.total_seconds())
+            await asyncio.sleep(delay.total_seconds())
@@ -0,0 +1,97 @@
+"""Refresh scheduling for the Frank Energie coordinator."""
+from __future__ import annotations
+
+import random
+from collections.abc import Iterable
+from datetime import datetime, timedelta
+
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    PRICE_PUBLICATION_END,
+    PRICE_PUBLICATION_POLL_INTERVAL,
+    PRICE_PUBLICATION_START,
+    PRICE_TIME_ZONE,
+    REFRESH_BACKOFF_MAX,
+    REFRESH_BACKOFF_MIN,
+    REFRESH_INTERVAL_MIN,
+)
+
+
+def jitter(delay: timedelta) -> timedelta:
+    """Spread a delay by +/- 20%, so clients don't all poll at the same moment."""
+    return delay * random.uniform(0.8, 1.2)
+
+
+def backoff(
+    attempt: int, minimum: timedelta = REFRESH_BACKOFF_MIN, maximum: timedelta = REFRESH_BACKOFF_MAX
+) -> timedelta:
+    """Return the exponential backoff delay, including jitter, for the given attempt (starting at 0)."""
+    return jitter(min(maximum, minimum * 2 ** min(attempt, 16)))
+
+
+def next_price_refresh(now: datetime, prices_until: datetime | None) -> datetime | None:
+    """Return when new day-ahead prices can be expected.
+
+    `prices_until` is the end of the last known price. Returns None when prices are missing and
+    there's no way to tell when they will be available, the caller should back off in that case.
+    """
+    time_zone = dt_util.get_time_zone(PRICE_TIME_ZONE)
+    local_now = now.astimezone(time_zone)
+    today = local_now.date()
+    publication_start = datetime.combine(today, PRICE_PUBLICATION_START, time_zone)
+    publication_end = datetime.combine(today, PRICE_PUBLICATION_END, time_zone)
+    end_of_today = datetime.combine(today + timedelta(days=1), datetime.min.time(), time_zone)
+
+    if prices_until is not None and prices_until >= end_of_today + timedelta(days=1):
+        # Prices up to and including tomorrow are known, the next ones are published tomorrow
+        return publication_start + timedelta(days=1)
+
+    if prices_until is not None and prices_until >= end_of_today and local_now < publication_start:
+        # Prices for today are known, tomorrow's prices are published later today
+        return publication_start
+
+    if publication_start <= local_now < publication_end:
+        # Tomorrow's prices can be published any moment now
+        return now + jitter(PRICE_PUBLICATION_POLL_INTERVAL)
+
+    return None
+
+
+class RefreshScheduler:
+    """Keep track of when each kind of data is due to be refreshed."""
+
+    def __init__(self, kinds: Iterable[str]) -> None:
+        """Initialize the scheduler, all kinds of data are due right away."""
+        self._due: dict[str, datetime | None] = dict.fromkeys(kinds)
+        self._attempts: dict[str, int] = dict.fromkeys(self._due, 0)
+
+    def due(self, now: datetime) -> set[str]:
+        """Return the kinds of data that are due to be refreshed."""
+        return {kind for kind, due in self._due.items() if due is None or due <= now}
+
+    def reschedule(self, kind: str, when: datetime) -> None:
+        """Schedule the next refresh of a kind of data after a successful refresh."""
+        self._due[kind] = when
+        self._attempts[kind] = 0
+
+    def backoff(self, kinds: Iterable[str], now: datetime) -> None:
+        """Retry kinds of data later, backing off exponentially on consecutive attempts."""
+        for kind in kinds:
+            self._due[kind] = now + backoff(self._attempts[kind])
+            self._attempts[kind] += 1
+
+    def next_interval(self, now: datetime) -> timedelta:
+        """Return the time until the first kind of data is due."""
+        due = [when for when in self._due.values() if when is not None]
+        if len(due) < len(self._due):
+            return REFRESH_INTERVAL_MIN
+
+        return max(min(due) - now, REFRESH_INTERVAL_MIN)
+
+    def as_dict(self) -> dict[str, dict]:
+        """Return when each kind of data is due and the number of failed attempts, for the diagnostics."""
+        return {
+            kind: {"due": due.isoformat() if due else None, "attempts": self._attempts[kind]}
+            for kind, due in self._due.items()
+        }
@@ -15,32 +15,46 @@ from homeassistant.components.sensor import (
 from homeassistant.config_entries import ConfigEntry
 from homeassistant.const import (
     CURRENCY_EURO,
+    PERCENTAGE,
+    EntityCategory,
+    UnitOfInformation,
+    UnitOfTime,
     UnitOfEnergy,
     UnitOfVolume,
 )
-from homeassistant.core import HassJob, HomeAssistant
-from homeassistant.helpers import event
-from homeassistant.helpers.device_registry import DeviceEntryType
-from homeassistant.helpers.entity import DeviceInfo
+from homeassistant.core import HomeAssistant, callback
 from homeassistant.helpers.entity_platform import AddEntitiesCallback
 from homeassistant.helpers.typing import StateType
-from homeassistant.helpers.update_coordinator import CoordinatorEntity
-from homeassistant.util import utcnow
+from homeassistant.util import dt as dt_util
 
 from .const import (
+    ATTR_AVERAGE_PRICE,
+    ATTR_DAYS,
+    ATTR_END,
+    ATTR_FETCHED_AT,
+    ATTR_HOURS,
+    ATTR_PRICES,
+    ATTR_PRICES_INTERVAL,
+    ATTR_PRICES_START,
     ATTR_TIME,
-    ATTRIBUTION,
     CONF_COORDINATOR,
-    DATA_ELECTRICITY,
-    DATA_GAS,
+    DATA_ELECTRICITY_HISTORY,
+    DATA_ELECTRICITY_INDEX,
+    DATA_GAS_HISTORY,
+    DATA_GAS_INDEX,
     DATA_INVOICES,
     DATA_MONTH_SUMMARY,
     DOMAIN,
-    ICON,
+    REFRESH_INVOICES,
+    REFRESH_MONTH_SUMMARY,
+    REFRESH_PRICES,
     SERVICE_NAME_PRICES,
     SERVICE_NAME_COSTS,
 )
 from .coordinator import FrankEnergieCoordinator
+from .entity import FrankEnergieEntity, attributes_fingerprint
+from .metrics import CoordinatorMetrics
+from .price_index import PriceWindow
 
 _LOGGER = logging.getLogger(__name__)
 
@@ -51,8 +65,28 @@ class FrankEnergieEntityDescription(SensorEntityDescription):
 
     authenticated: bool = False
     service_name: str | None = SERVICE_NAME_PRICES
+    # Kind of data the sensor shows, which is refreshed on its own schedule
+    refresh_kind: str = REFRESH_PRICES
     value_fn: Callable[[dict], StateType] = None
     attr_fn: Callable[[dict], dict[str, StateType | list]] = lambda _: {}
+    # Key of the price index and field of each price to list in the prices attribute
+    prices_key: str | None = None
+    prices_field: str | None = None
+
+
+@dataclass
+class FrankEnergieWindowEntityDescription(FrankEnergieEntityDescription):
+    """Describes Frank Energie sensor entity for a window of electricity prices."""
+
+    cheapest: bool = True
+
+
+@dataclass
+class FrankEnergieDiagnosticEntityDescription(FrankEnergieEntityDescription):
+    """Describes Frank Energie diagnostic sensor entity, showing the metrics of the config entry."""
+
+    metrics_fn: Callable[[CoordinatorMetrics], StateType] = None
+    metrics_attr_fn: Callable[[CoordinatorMetrics], dict[str, StateType]] = lambda _: {}
 
 
 SENSOR_TYPES: tuple[FrankEnergieEntityDescription, ...] = (
@@ -62,8 +96,9 @@ SENSOR_TYPES: tuple[FrankEnergieEntityDescription, ...] = (
         native_unit_of_measurement=f"{CURRENCY_EURO}/{UnitOfEnergy.KILO_WATT_HOUR}",
         suggested_display_precision=2,
         state_class=SensorStateClass.MEASUREMENT,
-        value_fn=lambda data: data[DATA_ELECTRICITY].current_hour.total,
-        attr_fn=lambda data: {"prices": data[DATA_ELECTRICITY].asdict("total")},
+        value_fn=lambda data: data[DATA_ELECTRICITY_INDEX].current_slot.total,
+        prices_key=DATA_ELECTRICITY_INDEX,
+        prices_field="total",
     ),
     FrankEnergieEntityDescription(
         key="elec_market",
@@ -71,8 +106,9 @@ SENSOR_TYPES: tuple[FrankEnergieEntityDescription, ...] = (
         native_unit_of_measurement=f"{CURRENCY_EURO}/{UnitOfEnergy.KILO_WATT_HOUR}",
         suggested_display_precision=2,
         state_class=SensorStateClass.MEASUREMENT,
-        value_fn=lambda data: data[DATA_ELECTRICITY].current_hour.market_price,
-        attr_fn=lambda data: {"prices": data[DATA_ELECTRICITY].asdict("market_price")},
+        value_fn=lambda data: data[DATA_ELECTRICITY_INDEX].current_slot.market_price,
+        prices_key=DATA_ELECTRICITY_INDEX,
+        prices_field="market_price",
     ),
     FrankEnergieEntityDescription(
         key="elec_tax",
@@ -80,10 +116,9 @@ SENSOR_TYPES: tuple[FrankEnergieEntityDescription, ...] = (
         native_unit_of_measurement=f"{CURRENCY_EURO}/{UnitOfEnergy.KILO_WATT_HOUR}",
         suggested_display_precision=2,
         state_class=SensorStateClass.MEASUREMENT,
-        value_fn=lambda data: data[DATA_ELECTRICITY].current_hour.market_price_with_tax,
-        attr_fn=lambda data: {
-            "prices": data[DATA_ELECTRICITY].asdict("market_price_with_tax")
-        },
+        value_fn=lambda data: data[DATA_ELECTRICITY_INDEX].current_slot.market_price_with_tax,
+        prices_key=DATA_ELECTRICITY_INDEX,
+        prices_field="market_price_with_tax",
     ),
     FrankEnergieEntityDescription(
         key="elec_tax_vat",
@@ -91,7 +126,7 @@ SENSOR_TYPES: tuple[FrankEnergieEntityDescription, ...] = (
         native_unit_of_measurement=f"{CURRENCY_EURO}/{UnitOfEnergy.KILO_WATT_HOUR}",
         suggested_display_precision=2,
         state_class=SensorStateClass.MEASUREMENT,
-        value_fn=lambda data: data[DATA_ELECTRICITY].current_hour.market_price_tax,
+        value_fn=lambda data: data[DATA_ELECTRICITY_INDEX].current_slot.market_price_tax,
         entity_registry_enabled_default=False,
     ),
     FrankEnergieEntityDescription(
@@ -100,7 +135,7 @@ SENSOR_TYPES: tuple[FrankEnergieEntityDescription, ...] = (
         native_unit_of_measurement=f"{CURRENCY_EURO}/{UnitOfEnergy.KILO_WATT_HOUR}",
         suggested_display_precision=2,
         state_class=SensorStateClass.MEASUREMENT,
-        value_fn=lambda data: data[DATA_ELECTRICITY].current_hour.sourcing_markup_price,
+        value_fn=lambda data: data[DATA_ELECTRICITY_INDEX].current_slot.sourcing_markup_price,
         entity_registry_enabled_default=False,
     ),
     FrankEnergieEntityDescription(
@@ -109,7 +144,7 @@ SENSOR_TYPES: tuple[FrankEnergieEntityDescription, ...] = (
         native_unit_of_measurement=f"{CURRENCY_EURO}/{UnitOfEnergy.KILO_WATT_HOUR}",
         suggested_display_precision=2,
         state_class=SensorStateClass.MEASUREMENT,
-        value_fn=lambda data: data[DATA_ELECTRICITY].current_hour.energy_tax_price,
+        value_fn=lambda data: data[DATA_ELECTRICITY_INDEX].current_slot.energy_tax_price,
         entity_registry_enabled_default=False,
     ),
     FrankEnergieEntityDescription(
@@ -118,8 +153,9 @@ SENSOR_TYPES: tuple[FrankEnergieEntityDescription, ...] = (
         native_unit_of_measurement=f"{CURRENCY_EURO}/{UnitOfVolume.CUBIC_METERS}",
         suggested_display_precision=2,
         state_class=SensorStateClass.MEASUREMENT,
-        value_fn=lambda data: data[DATA_GAS].current_hour.total,
-        attr_fn=lambda data: {"prices": data[DATA_GAS].asdict("total")},
+        value_fn=lambda data: data[DATA_GAS_INDEX].current_slot.total,
+        prices_key=DATA_GAS_INDEX,
+        prices_field="total",
     ),
     FrankEnergieEntityDescription(
         key="gas_market",
@@ -127,8 +163,9 @@ SENSOR_TYPES: tuple[FrankEnergieEntityDescription, ...] = (
         native_unit_of_measurement=f"{CURRENCY_EURO}/{UnitOfVolume.CUBIC_METERS}",
         suggested_display_precision=2,
         state_class=SensorStateClass.MEASUREMENT,
-        value_fn=lambda data: data[DATA_GAS].current_hour.market_price,
-        attr_fn=lambda data: {"prices": data[DATA_GAS].asdict("market_price")},
+        value_fn=lambda data: data[DATA_GAS_INDEX].current_slot.market_price,
+        prices_key=DATA_GAS_INDEX,
+        prices_field="market_price",
     ),
     FrankEnergieEntityDescription(
         key="gas_tax",
@@ -136,8 +173,9 @@ SENSOR_TYPES: tuple[FrankEnergieEntityDescription, ...] = (
         native_unit_of_measurement=f"{CURRENCY_EURO}/{UnitOfVolume.CUBIC_METERS}",
         suggested_display_precision=2,
         state_class=SensorStateClass.MEASUREMENT,
-        value_fn=lambda data: data[DATA_GAS].current_hour.market_price_with_tax,
-        attr_fn=lambda data: {"prices": data[DATA_GAS].asdict("market_price_with_tax")},
+        value_fn=lambda data: data[DATA_GAS_INDEX].current_slot.market_price_with_tax,
+        prices_key=DATA_GAS_INDEX,
+        prices_field="market_price_with_tax",
     ),
     FrankEnergieEntityDescription(
         key="gas_tax_vat",
@@ -145,7 +183,7 @@ SENSOR_TYPES: tuple[FrankEnergieEntityDescription, ...] = (
         native_unit_of_measurement=f"{CURRENCY_EURO}/{UnitOfVolume.CUBIC_METERS}",
         suggested_display_precision=2,
         state_class=SensorStateClass.MEASUREMENT,
-        value_fn=lambda data: data[DATA_GAS].current_hour.market_price_tax,
+        value_fn=lambda data: data[DATA_GAS_INDEX].current_slot.market_price_tax,
         entity_registry_enabled_default=False,
     ),
     FrankEnergieEntityDescription(
@@ -154,7 +192,7 @@ SENSOR_TYPES: tuple[FrankEnergieEntityDescription, ...] = (
         native_unit_of_measurement=f"{CURRENCY_EURO}/{UnitOfVolume.CUBIC_METERS}",
         suggested_display_precision=2,
         state_class=SensorStateClass.MEASUREMENT,
-        value_fn=lambda data: data[DATA_GAS].current_hour.sourcing_markup_price,
+        value_fn=lambda data: data[DATA_GAS_INDEX].current_slot.sourcing_markup_price,
         entity_registry_enabled_default=False,
     ),
     FrankEnergieEntityDescription(
@@ -163,7 +201,7 @@ SENSOR_TYPES: tuple[FrankEnergieEntityDescription, ...] = (
         native_unit_of_measurement=f"{CURRENCY_EURO}/{UnitOfVolume.CUBIC_METERS}",
         suggested_display_precision=2,
         state_class=SensorStateClass.MEASUREMENT,
-        value_fn=lambda data: data[DATA_GAS].current_hour.energy_tax_price,
+        value_fn=lambda data: data[DATA_GAS_INDEX].current_slot.energy_tax_price,
         entity_registry_enabled_default=False,
     ),
     FrankEnergieEntityDescription(
@@ -172,8 +210,8 @@ SENSOR_TYPES: tuple[FrankEnergieEntityDescription, ...] = (
         native_unit_of_measurement=f"{CURRENCY_EURO}/{UnitOfVolume.CUBIC_METERS}",
         suggested_display_precision=2,
         state_class=SensorStateClass.MEASUREMENT,
-        value_fn=lambda data: data[DATA_GAS].today_min.total,
-        attr_fn=lambda data: {ATTR_TIME: data[DATA_GAS].today_min.date_from},
+        value_fn=lambda data: data[DATA_GAS_INDEX].today_min.total,
+        attr_fn=lambda data: {ATTR_TIME: data[DATA_GAS_INDEX].today_min.date_from},
     ),
     FrankEnergieEntityDescription(
         key="gas_max",
@@ -181,8 +219,8 @@ SENSOR_TYPES: tuple[FrankEnergieEntityDescription, ...] = (
         native_unit_of_measurement=f"{CURRENCY_EURO}/{UnitOfVolume.CUBIC_METERS}",
         suggested_display_precision=2,
         state_class=SensorStateClass.MEASUREMENT,
-        value_fn=lambda data: data[DATA_GAS].today_max.total,
-        attr_fn=lambda data: {ATTR_TIME: data[DATA_GAS].today_max.date_from},
+        value_fn=lambda data: data[DATA_GAS_INDEX].today_max.total,
+        attr_fn=lambda data: {ATTR_TIME: data[DATA_GAS_INDEX].today_max.date_from},
     ),
     FrankEnergieEntityDescription(
         key="elec_min",
@@ -190,8 +228,8 @@ SENSOR_TYPES: tuple[FrankEnergieEntityDescription, ...] = (
         native_unit_of_measurement=f"{CURRENCY_EURO}/{UnitOfEnergy.KILO_WATT_HOUR}",
         suggested_display_precision=2,
         state_class=SensorStateClass.MEASUREMENT,
-        value_fn=lambda data: data[DATA_ELECTRICITY].today_min.total,
-        attr_fn=lambda data: {ATTR_TIME: data[DATA_ELECTRICITY].today_min.date_from},
+        value_fn=lambda data: data[DATA_ELECTRICITY_INDEX].today_min.total,
+        attr_fn=lambda data: {ATTR_TIME: data[DATA_ELECTRICITY_INDEX].today_min.date_from},
     ),
     FrankEnergieEntityDescription(
         key="elec_max",
@@ -199,8 +237,8 @@ SENSOR_TYPES: tuple[FrankEnergieEntityDescription, ...] = (
         native_unit_of_measurement=f"{CURRENCY_EURO}/{UnitOfEnergy.KILO_WATT_HOUR}",
         suggested_display_precision=2,
         state_class=SensorStateClass.MEASUREMENT,
-        value_fn=lambda data: data[DATA_ELECTRICITY].today_max.total,
-        attr_fn=lambda data: {ATTR_TIME: data[DATA_ELECTRICITY].today_max.date_from},
+        value_fn=lambda data: data[DATA_ELECTRICITY_INDEX].today_max.total,
+        attr_fn=lambda data: {ATTR_TIME: data[DATA_ELECTRICITY_INDEX].today_max.date_from},
     ),
     FrankEnergieEntityDescription(
         key="elec_avg",
@@ -208,7 +246,67 @@ SENSOR_TYPES: tuple[FrankEnergieEntityDescription, ...] = (
         native_unit_of_measurement=f"{CURRENCY_EURO}/{UnitOfEnergy.KILO_WATT_HOUR}",
         suggested_display_precision=2,
         state_class=SensorStateClass.MEASUREMENT,
-        value_fn=lambda data: data[DATA_ELECTRICITY].today_avg,
+        value_fn=lambda data: data[DATA_ELECTRICITY_INDEX].today_avg,
+    ),
+    FrankEnergieEntityDescription(
+        key="elec_rank",
+        name="Current electricity price rank today",
+        icon="mdi:podium",
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda data: data[DATA_ELECTRICITY_INDEX].current_rank,
+    ),
+    FrankEnergieEntityDescription(
+        key="elec_percentile",
+        name="Current electricity price percentile today",
+        icon="mdi:percent",
+        native_unit_of_measurement=PERCENTAGE,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda data: data[DATA_ELECTRICITY_INDEX].current_percentile,
+    ),
+    FrankEnergieEntityDescription(
+        key="elec_zscore",
+        name="Current electricity price z-score today",
+        icon="mdi:sigma",
+        suggested_display_precision=2,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda data: data[DATA_ELECTRICITY_INDEX].current_zscore,
+        entity_registry_enabled_default=False,
+    ),
+    FrankEnergieEntityDescription(
+        key="elec_avg_yesterday",
+        name="Average electricity price yesterday",
+        native_unit_of_measurement=f"{CURRENCY_EURO}/{UnitOfEnergy.KILO_WATT_HOUR}",
+        suggested_display_precision=2,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda data: data[DATA_ELECTRICITY_HISTORY].average(dt_util.now().date() - timedelta(days=1)),
+    ),
+    FrankEnergieEntityDescription(
+        key="elec_avg_previous_days",
+        name="Average electricity price previous days",
+        native_unit_of_measurement=f"{CURRENCY_EURO}/{UnitOfEnergy.KILO_WATT_HOUR}",
+        suggested_display_precision=2,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda data: data[DATA_ELECTRICITY_HISTORY].trailing_average(dt_util.now().date()),
+        attr_fn=lambda data: {ATTR_DAYS: len(data[DATA_ELECTRICITY_HISTORY].past_days(dt_util.now().date()))},
+    ),
+    FrankEnergieEntityDescription(
+        key="elec_avg_vs_previous_days",
+        name="Average electricity price today compared to previous days",
+        icon="mdi:scale-unbalanced",
+        native_unit_of_measurement=PERCENTAGE,
+        suggested_display_precision=1,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda data: data[DATA_ELECTRICITY_HISTORY].difference(
+            data[DATA_ELECTRICITY_INDEX].today_avg, dt_util.now().date()
+        ),
+    ),
+    FrankEnergieEntityDescription(
+        key="gas_avg_yesterday",
+        name="Average gas price yesterday",
+        native_unit_of_measurement=f"{CURRENCY_EURO}/{UnitOfVolume.CUBIC_METERS}",
+        suggested_display_precision=2,
+        state_class=SensorStateClass.MEASUREMENT,
+        value_fn=lambda data: data[DATA_GAS_HISTORY].average(dt_util.now().date() - timedelta(days=1)),
     ),
     FrankEnergieEntityDescription(
         key="actual_costs_until_last_meter_reading_date",
@@ -217,6 +315,7 @@ SENSOR_TYPES: tuple[FrankEnergieEntityDescription, ...] = (
         state_class=SensorStateClass.TOTAL,
         native_unit_of_measurement=CURRENCY_EURO,
         authenticated=True,
+        refresh_kind=REFRESH_MONTH_SUMMARY,
         service_name=SERVICE_NAME_COSTS,
         value_fn=lambda data: data[
             DATA_MONTH_SUMMARY
@@ -232,6 +331,7 @@ SENSOR_TYPES: tuple[FrankEnergieEntityDescription, ...] = (
         state_class=SensorStateClass.TOTAL,
         native_unit_of_measurement=CURRENCY_EURO,
         authenticated=True,
+        refresh_kind=REFRESH_MONTH_SUMMARY,
         service_name=SERVICE_NAME_COSTS,
         value_fn=lambda data: data[
             DATA_MONTH_SUMMARY
@@ -247,6 +347,7 @@ SENSOR_TYPES: tuple[FrankEnergieEntityDescription, ...] = (
         state_class=SensorStateClass.TOTAL,
         native_unit_of_measurement=CURRENCY_EURO,
         authenticated=True,
+        refresh_kind=REFRESH_MONTH_SUMMARY,
         service_name=SERVICE_NAME_COSTS,
         value_fn=lambda data: data[DATA_MONTH_SUMMARY].expectedCosts,
     ),
@@ -257,6 +358,7 @@ SENSOR_TYPES: tuple[FrankEnergieEntityDescription, ...] = (
         state_class=SensorStateClass.TOTAL,
         native_unit_of_measurement=CURRENCY_EURO,
         authenticated=True,
+        refresh_kind=REFRESH_INVOICES,
         service_name=SERVICE_NAME_COSTS,
         value_fn=lambda data: data[DATA_INVOICES].previousPeriodInvoice.TotalAmount
         if data[DATA_INVOICES].previousPeriodInvoice
@@ -273,6 +375,7 @@ SENSOR_TYPES: tuple[FrankEnergieEntityDescription, ...] = (
         state_class=SensorStateClass.TOTAL,
         native_unit_of_measurement=CURRENCY_EURO,
         authenticated=True,
+        refresh_kind=REFRESH_INVOICES,
         service_name=SERVICE_NAME_COSTS,
         value_fn=lambda data: data[DATA_INVOICES].currentPeriodInvoice.TotalAmount
         if data[DATA_INVOICES].currentPeriodInvoice
@@ -289,6 +392,7 @@ SENSOR_TYPES: tuple[FrankEnergieEntityDescription, ...] = (
         state_class=SensorStateClass.TOTAL,
         native_unit_of_measurement=CURRENCY_EURO,
         authenticated=True,
+        refresh_kind=REFRESH_INVOICES,
         service_name=SERVICE_NAME_COSTS,
         value_fn=lambda data: data[DATA_INVOICES].upcomingPeriodInvoice.TotalAmount
         if data[DATA_INVOICES].upcomingPeriodInvoice
@@ -301,6 +405,121 @@ SENSOR_TYPES: tuple[FrankEnergieEntityDescription, ...] = (
 )
 
 
+WINDOW_SENSOR_TYPES: tuple[FrankEnergieWindowEntityDescription, ...] = (
+    FrankEnergieWindowEntityDescription(
+        key="elec_cheapest_window",
+        name="Cheapest electricity window",
+        icon="mdi:clock-start",
+        device_class=SensorDeviceClass.TIMESTAMP,
+        cheapest=True,
+    ),
+    FrankEnergieWindowEntityDescription(
+        key="elec_most_expensive_window",
+        name="Most expensive electricity window",
+        icon="mdi:clock-alert",
+        device_class=SensorDeviceClass.TIMESTAMP,
+        cheapest=False,
+    ),
+)
+
+
+DIAGNOSTIC_SENSOR_TYPES: tuple[FrankEnergieDiagnosticEntityDescription, ...] = (
+    FrankEnergieDiagnosticEntityDescription(
+        key="refresh_duration",
+        name="Last refresh duration",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.SECONDS,
+        suggested_display_precision=2,
+        state_class=SensorStateClass.MEASUREMENT,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        metrics_fn=lambda metrics: metrics.last_refresh_duration,
+        metrics_attr_fn=lambda metrics: {
+            "refreshes": metrics.refreshes,
+            "refresh_failures": metrics.refresh_failures,
+        },
+    ),
+    FrankEnergieDiagnosticEntityDescription(
+        key="api_requests",
+        name="API requests",
+        icon="mdi:api",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        metrics_fn=lambda metrics: metrics.requests,
+        metrics_attr_fn=lambda metrics: {
+            **{kind: query.requests for kind, query in metrics.queries.items()},
+            "public_price_cache_hits": metrics.public_price_cache_hits,
+            "public_price_cache_misses": metrics.public_price_cache_misses,
+        },
+    ),
+    FrankEnergieDiagnosticEntityDescription(
+        key="api_failures",
+        name="API request failures",
+        icon="mdi:api-off",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        metrics_fn=lambda metrics: metrics.failures,
+        metrics_attr_fn=lambda metrics: {
+            **{f"{kind}_failures": query.failures for kind, query in metrics.queries.items()},
+            **{f"{kind}_retries": query.retries for kind, query in metrics.queries.items()},
+            **{f"batched_{kind}_failures": fields.failures for kind, fields in metrics.batched_fields.items()},
+        },
+    ),
+    FrankEnergieDiagnosticEntityDescription(
+        key="api_latency",
+        name="Last API latency",
+        device_class=SensorDeviceClass.DURATION,
+        native_unit_of_measurement=UnitOfTime.SECONDS,
+        suggested_display_precision=2,
+        state_class=SensorStateClass.MEASUREMENT,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        metrics_fn=lambda metrics: max(
+            (query.last_latency for query in metrics.queries.values() if query.last_latency is not None),
+            default=None,
+        ),
+        metrics_attr_fn=lambda metrics: {
+            f"{kind}_average": round(query.average_latency, 3)
+            for kind, query in metrics.queries.items()
+            if query.average_latency is not None
+        },
+    ),
+    FrankEnergieDiagnosticEntityDescription(
+        key="api_response_size",
+        name="API response data",
+        device_class=SensorDeviceClass.DATA_SIZE,
+        native_unit_of_measurement=UnitOfInformation.BYTES,
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        metrics_fn=lambda metrics: metrics.response_bytes,
+        metrics_attr_fn=lambda metrics: {
+            **{kind: query.response_bytes for kind, query in metrics.queries.items()},
+            **{f"batched_{kind}": fields.response_bytes for kind, fields in metrics.batched_fields.items()},
+        },
+    ),
+    FrankEnergieDiagnosticEntityDescription(
+        key="public_price_fallbacks",
+        name="Public price fallbacks",
+        icon="mdi:swap-horizontal",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        metrics_fn=lambda metrics: metrics.public_price_fallbacks,
+    ),
+    FrankEnergieDiagnosticEntityDescription(
+        key="token_renewals",
+        name="Token renewals",
+        icon="mdi:key-chain",
+        state_class=SensorStateClass.TOTAL_INCREASING,
+        entity_category=EntityCategory.DIAGNOSTIC,
+        entity_registry_enabled_default=False,
+        authenticated=True,
+        metrics_fn=lambda metrics: metrics.token_renewals,
+    ),
+)
+
+
 async def async_setup_entry(
     hass: HomeAssistant,
     config_entry: ConfigEntry,
@@ -309,89 +528,182 @@ async def async_setup_entry(
     """Set up Frank Energie sensor entries."""
     frank_coordinator = hass.data[DOMAIN][config_entry.entry_id][CONF_COORDINATOR]
 
-    # Add an entity for each sensor type, when authenticated is True,
+    # Add an entity for each sensor type and site, when authenticated is True,
     # only add the entity if the user is authenticated
     async_add_entities(
         [
-            FrankEnergieSensor(frank_coordinator, description, config_entry)
+            FrankEnergieSensor(frank_coordinator, description, config_entry, site_reference)
+            for site_reference in frank_coordinator.sites
             for description in SENSOR_TYPES
             if not description.authenticated or frank_coordinator.api.is_authenticated
+        ]
+        + [
+            FrankEnergieWindowSensor(frank_coordinator, description, config_entry, site_reference)
+            for site_reference in frank_coordinator.sites
+            for description in WINDOW_SENSOR_TYPES
+        ]
+        # The metrics are collected for the config entry as a whole, they're shown with the primary site
+        + [
+            FrankEnergieDiagnosticSensor(frank_coordinator, description, config_entry, frank_coordinator.site_reference)
+            for description in DIAGNOSTIC_SENSOR_TYPES
+            if not description.authenticated or frank_coordinator.api.is_authenticated
         ],
         True,
     )
 
 
-class FrankEnergieSensor(CoordinatorEntity, SensorEntity):
+class FrankEnergieSensor(FrankEnergieEntity, SensorEntity):
     """Representation of a Frank Energie sensor."""
 
-    _attr_attribution = ATTRIBUTION
-    _attr_icon = ICON
+    entity_description: FrankEnergieEntityDescription
+    # The list of prices changes once a day at most, don't store a copy of it with every state change
+    _unrecorded_attributes = frozenset({ATTR_PRICES, ATTR_PRICES_INTERVAL, ATTR_PRICES_START, ATTR_FETCHED_AT})
 
     def __init__(
         self,
         coordinator: FrankEnergieCoordinator,
         description: FrankEnergieEntityDescription,
         entry: ConfigEntry,
+        site_reference: str | None = None,
     ) -> None:
         """Initialize the sensor."""
-        self.entity_description: FrankEnergieEntityDescription = description
-        self._attr_unique_id = f"{entry.unique_id}.{description.key}"
-
-        # Do not set extra identifier for default service, backwards compatibility
-        if description.service_name is SERVICE_NAME_PRICES:
-            device_info_identifiers = {(DOMAIN, f"{entry.entry_id}")}
-        else:
-            device_info_identifiers = {(DOMAIN, f"{entry.entry_id}", description.service_name)}
-
-        self._attr_device_info = DeviceInfo(
-            identifiers=device_info_identifiers,
-            name=f"Frank Energie - {description.service_name}",
-            manufacturer="Frank Energie",
-            entry_type=DeviceEntryType.SERVICE,
-            configuration_url="https://www.frankenergie.nl/goedkoop",
-        )
+        super().__init__(coordinator, description, entry, site_reference, description.service_name)
+        self._attributes: dict[str, Any] = {}
+        self._attributes_key: tuple | None = None
+        self._attributes_fingerprint: int | None = None
+        # What was written to the state machine the last time, to skip writing unchanged states
+        self._last_written: tuple | None = None
 
-        self._update_job = HassJob(self._handle_scheduled_update)
-        self._unsub_update = None
-
-        super().__init__(coordinator)
-
-    async def async_update(self) -> None:
-        """Get the latest data and updates the states."""
+    def _update_native_value(self) -> None:
+        """Update the native value from the coordinator data."""
         try:
             self._attr_native_value = self.entity_description.value_fn(
-                self.coordinator.data
+                self.coordinator.data[self._site_reference]
             )
-        except (TypeError, IndexError, ValueError):
-            # No data available
+        except (AttributeError, TypeError, IndexError, ValueError):
+            # No data available, the month summary and invoices are None when they couldn't be fetched
             self._attr_native_value = None
 
-        # Cancel the currently scheduled event if there is any
-        if self._unsub_update:
-            self._unsub_update()
-            self._unsub_update = None
-
-        # Schedule the next update at exactly the next whole hour sharp
-        self._unsub_update = event.async_track_point_in_utc_time(
-            self.hass,
-            self._update_job,
-            utcnow().replace(minute=0, second=0) + timedelta(hours=1),
-        )
-
-    async def _handle_scheduled_update(self, _):
-        """Handle a scheduled update."""
-        # Only handle the scheduled update for entities which have a reference to hass,
-        # which disabled sensors don't have.
-        if self.hass is None:
+    async def async_update(self) -> None:
+        """Get the latest data and updates the states."""
+        self._update_native_value()
+
+    @callback
+    def _handle_coordinator_update(self) -> None:
+        """Handle new coordinator data, or a slot boundary.
+
+        The state is only written when the value, availability or attributes have changed.
+        """
+        self._update_native_value()
+
+        written = self._state_fingerprint()
+        if written == self._last_written:
+            self.coordinator.suppressed_writes += 1
+            return
+
+        self._last_written = written
+        super()._handle_coordinator_update()
+
+    async def async_added_to_hass(self) -> None:
+        """Remember the state that is written when the entity is added."""
+        await super().async_added_to_hass()
+        self._last_written = self._state_fingerprint()
+
+    def _state_fingerprint(self) -> tuple:
+        """Return what identifies the state that would be written now."""
+        if not self.available:
+            return (False, None, None)
+
+        self._update_attributes()
+        return (True, self._attr_native_value, self._attributes_fingerprint)
+
+    def _update_attributes(self) -> None:
+        """Rebuild the attributes when needed.
+
+        The attributes only change with new coordinator data, or for some of them when a new day
+        starts, so they are only rebuilt then.
+        """
+        key = (self.coordinator.data_generation, dt_util.now().date())
+        if key == self._attributes_key:
             return
 
-        self.async_schedule_update_ha_state(True)
+        data = self.coordinator.data[self._site_reference]
+        try:
+            attributes = self.entity_description.attr_fn(data)
+        except (AttributeError, TypeError, IndexError, ValueError):
+            # No data available, the sensor is unavailable as well
+            attributes = {}
+        self._attributes = {
+            **attributes,
+            ATTR_FETCHED_AT: self.coordinator.fetched_at(self._site_reference, self.entity_description.refresh_kind),
+        }
+        if self.entity_description.prices_key:
+            self._attributes.update(
+                data[self.entity_description.prices_key].prices_attribute(
+                    self.entity_description.prices_field, self.coordinator.compact_prices
+                )
+            )
+        self._attributes_key = key
+        self._attributes_fingerprint = attributes_fingerprint(self._attributes)
 
     @property
     def extra_state_attributes(self) -> dict[str, Any]:
         """Return the state attributes."""
-        return self.entity_description.attr_fn(self.coordinator.data)
+        self._update_attributes()
+        return self._attributes
 
     @property
     def available(self) -> bool:
         return super().available and self.native_value is not None
+
+
+class FrankEnergieWindowSensor(FrankEnergieSensor):
+    """Start of the cheapest or most expensive window of electricity prices.
+
+    The length of the window is configured in the options. The window is searched in the prices
+    from the current slot on, and is only searched again after new prices or at a slot boundary.
+    """
+
+    entity_description: FrankEnergieWindowEntityDescription
+    _window: PriceWindow | None = None
+
+    def _update_native_value(self) -> None:
+        """Update the window and its start from the coordinator data."""
+        try:
+            self._window = self.coordinator.data[self._site_reference][DATA_ELECTRICITY_INDEX].window(
+                self.coordinator.window_hours, self.entity_description.cheapest
+            )
+        except TypeError:
+            # No data available
+            self._window = None
+        self._attr_native_value = self._window.start if self._window else None
+
+    def _update_attributes(self) -> None:
+        """Describe the window, which changes along with the state."""
+        self._attributes = {
+            ATTR_END: self._window.end,
+            ATTR_AVERAGE_PRICE: self._window.avg,
+            ATTR_HOURS: self.coordinator.window_hours,
+            ATTR_FETCHED_AT: self.coordinator.fetched_at(self._site_reference, REFRESH_PRICES),
+        } if self._window else {}
+        self._attributes_fingerprint = attributes_fingerprint(self._attributes)
+
+
+class FrankEnergieDiagnosticSensor(FrankEnergieSensor):
+    """Metric of the requests to the API and the refreshes of the config entry."""
+
+    entity_description: FrankEnergieDiagnosticEntityDescription
+
+    def _update_native_value(self) -> None:
+        """Update the native value from the metrics."""
+        self._attr_native_value = self.entity_description.metrics_fn(self.coordinator.metrics)
+
+    def _update_attributes(self) -> None:
+        """Rebuild the attributes, the metrics change with every request."""
+        self._attributes = self.entity_description.metrics_attr_fn(self.coordinator.metrics)
+        self._attributes_fingerprint = attributes_fingerprint(self._attributes)
+
+    @property
+    def available(self) -> bool:
+        # The metrics remain valid when refreshes fail, which is when they're most useful
+        return self.native_value is not None
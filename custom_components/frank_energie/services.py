@@ -0,0 +1,148 @@
+"""Services of the Frank Energie integration."""
+from __future__ import annotations
+
+import voluptuous as vol
+from homeassistant.core import HomeAssistant, ServiceCall, ServiceResponse, SupportsResponse, callback
+from homeassistant.exceptions import HomeAssistantError
+import homeassistant.helpers.config_validation as cv
+from homeassistant.util import dt as dt_util
+
+from .const import (
+    ATTR_AVERAGE_PRICE,
+    ATTR_CONFIG_ENTRY_ID,
+    ATTR_COST,
+    ATTR_DEADLINE,
+    ATTR_EFFICIENCY,
+    ATTR_END,
+    ATTR_ENERGY,
+    ATTR_HOURS,
+    ATTR_MAX_POWER,
+    ATTR_MODE,
+    ATTR_POWER,
+    ATTR_PRICE,
+    ATTR_SITE_REFERENCE,
+    CONF_COORDINATOR,
+    DATA_ELECTRICITY_INDEX,
+    DOMAIN,
+    MODE_CHARGE,
+    MODE_DISCHARGE,
+    SERVICE_FIND_PRICE_WINDOWS,
+    SERVICE_OPTIMIZE_SCHEDULE,
+)
+from .coordinator import FrankEnergieCoordinator
+from .optimizer import optimize_schedule
+from .price_index import PriceIndex, PriceWindow
+
+SITE_SCHEMA = {
+    vol.Optional(ATTR_CONFIG_ENTRY_ID): cv.string,
+    vol.Optional(ATTR_SITE_REFERENCE): cv.string,
+}
+
+FIND_PRICE_WINDOWS_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_HOURS): vol.All(vol.Coerce(float), vol.Range(min=0.25, max=24)),
+        **SITE_SCHEMA,
+    }
+)
+
+OPTIMIZE_SCHEDULE_SCHEMA = vol.Schema(
+    {
+        vol.Required(ATTR_ENERGY): vol.All(vol.Coerce(float), vol.Range(min=0, min_included=False)),
+        vol.Required(ATTR_MAX_POWER): vol.All(vol.Coerce(float), vol.Range(min=0, min_included=False)),
+        vol.Required(ATTR_DEADLINE): cv.datetime,
+        vol.Optional(ATTR_EFFICIENCY, default=1.0): vol.All(
+            vol.Coerce(float), vol.Range(min=0, max=1, min_included=False)
+        ),
+        vol.Optional(ATTR_MODE, default=MODE_CHARGE): vol.In([MODE_CHARGE, MODE_DISCHARGE]),
+        **SITE_SCHEMA,
+    }
+)
+
+
+@callback
+def async_setup_services(hass: HomeAssistant) -> None:
+    """Register the services of the integration."""
+
+    async def async_find_price_windows(call: ServiceCall) -> ServiceResponse:
+        """Return the cheapest and most expensive window of electricity prices of the given length."""
+        index = _get_electricity_index(hass, call)
+        return {
+            "cheapest": _window_response(index.window(call.data[ATTR_HOURS], cheapest=True)),
+            "most_expensive": _window_response(index.window(call.data[ATTR_HOURS], cheapest=False)),
+        }
+
+    async def async_optimize_schedule(call: ServiceCall) -> ServiceResponse:
+        """Return when to charge or discharge the given energy before the deadline, at the best prices."""
+        index = _get_electricity_index(hass, call)
+        try:
+            slots = optimize_schedule(
+                index,
+                energy=call.data[ATTR_ENERGY],
+                max_power=call.data[ATTR_MAX_POWER],
+                deadline=dt_util.as_utc(call.data[ATTR_DEADLINE]),
+                efficiency=call.data[ATTR_EFFICIENCY],
+                discharge=call.data[ATTR_MODE] == MODE_DISCHARGE,
+            )
+        except ValueError as ex:
+            raise HomeAssistantError(str(ex)) from ex
+
+        return {
+            "slots": [
+                {
+                    "start": slot.start.isoformat(),
+                    ATTR_END: slot.end.isoformat(),
+                    ATTR_ENERGY: slot.energy,
+                    ATTR_POWER: slot.power,
+                    ATTR_PRICE: slot.price,
+                }
+                for slot in slots
+            ],
+            ATTR_ENERGY: round(sum(slot.energy for slot in slots), 5),
+            ATTR_COST: round(sum(slot.cost for slot in slots), 5),
+        }
+
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_FIND_PRICE_WINDOWS,
+        async_find_price_windows,
+        schema=FIND_PRICE_WINDOWS_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+    hass.services.async_register(
+        DOMAIN,
+        SERVICE_OPTIMIZE_SCHEDULE,
+        async_optimize_schedule,
+        schema=OPTIMIZE_SCHEDULE_SCHEMA,
+        supports_response=SupportsResponse.ONLY,
+    )
+
+
+def _get_coordinator(hass: HomeAssistant, entry_id: str | None) -> FrankEnergieCoordinator:
+    """Return the coordinator of the given config entry, or of the first one when not given."""
+    entries = hass.data.get(DOMAIN, {})
+    if entry_id is None and entries:
+        entry_id = next(iter(entries))
+    if entry_id not in entries:
+        raise HomeAssistantError(f"Frank Energie config entry {entry_id} is not loaded")
+    return entries[entry_id][CONF_COORDINATOR]
+
+
+def _get_electricity_index(hass: HomeAssistant, call: ServiceCall) -> PriceIndex:
+    """Return the index of the electricity prices of the site the service is called for."""
+    coordinator = _get_coordinator(hass, call.data.get(ATTR_CONFIG_ENTRY_ID))
+    site_reference = call.data.get(ATTR_SITE_REFERENCE, coordinator.site_reference)
+    if coordinator.data is None or site_reference not in coordinator.data:
+        raise HomeAssistantError(f"No prices available for site {site_reference}")
+
+    return coordinator.data[site_reference][DATA_ELECTRICITY_INDEX]
+
+
+def _window_response(window: PriceWindow | None) -> dict | None:
+    """Return a window in the format of a service response."""
+    if window is None:
+        return None
+    return {
+        "start": window.start.isoformat(),
+        ATTR_END: window.end.isoformat(),
+        ATTR_AVERAGE_PRICE: window.avg,
+    }
@@ -0,0 +1,374 @@
+"""Import of Frank Energie prices into the long-term statistics of the recorder."""
+from __future__ import annotations
+
+import asyncio
+import logging
+from datetime import date, timedelta
+from typing import Any
+
+from homeassistant.components.recorder import get_instance
+from homeassistant.components.recorder.models import StatisticData, StatisticMetaData
+from homeassistant.components.recorder.statistics import async_add_external_statistics, get_last_statistics
+from homeassistant.const import CURRENCY_EURO, UnitOfEnergy, UnitOfVolume
+from homeassistant.core import HomeAssistant
+from homeassistant.exceptions import ConfigEntryAuthFailed
+from homeassistant.util import dt as dt_util, slugify
+from python_frank_energie.exceptions import AuthException, RequestException
+from python_frank_energie.models import PriceData
+
+from .const import (
+    DATA_ELECTRICITY,
+    DATA_ELECTRICITY_INDEX,
+    DATA_GAS,
+    DATA_GAS_INDEX,
+    DOMAIN,
+    STATISTICS_BACKFILL_DAYS,
+    STATISTICS_BACKFILL_DELAY,
+    USAGE_BACKFILL_DAYS,
+    USAGE_CHUNK_DAYS,
+    USAGE_FINAL_AFTER,
+    USAGE_REQUEST_DELAY,
+)
+from .auth import TokenManager
+from .client import FrankEnergieClient
+from .price_index import PriceIndex
+from .storage import UsageCheckpointStore
+
+LOGGER = logging.getLogger(__name__)
+
+# Key of the prices and index in the data of a site, and the unit of the prices, of each commodity
+PRICE_COMMODITIES = {
+    "electricity": (DATA_ELECTRICITY, DATA_ELECTRICITY_INDEX, f"{CURRENCY_EURO}/{UnitOfEnergy.KILO_WATT_HOUR}"),
+    "gas": (DATA_GAS, DATA_GAS_INDEX, f"{CURRENCY_EURO}/{UnitOfVolume.CUBIC_METERS}"),
+}
+
+# Field in the usage and costs of a day, and the unit of the usage, of each kind of usage
+USAGE_KINDS = {
+    "electricity": ("electricity", UnitOfEnergy.KILO_WATT_HOUR),
+    "gas": ("gas", UnitOfVolume.CUBIC_METERS),
+    "feed_in": ("feedIn", UnitOfEnergy.KILO_WATT_HOUR),
+}
+USAGE_SELECTION = "items { from till usage costs }"
+
+
+def price_statistic_id(commodity: str, site_reference: str | None) -> str:
+    """Return the ID of the statistic of the prices of a commodity for a site."""
+    if site_reference is None:
+        return f"{DOMAIN}:{commodity}_price"
+    return f"{DOMAIN}:{commodity}_price_{slugify(site_reference)}"
+
+
+def hourly_price_statistics(
+    index: PriceIndex, after: float | None = None, until: float | None = None
+) -> list[StatisticData]:
+    """Return the mean, min and max of the prices of each hour.
+
+    Only the hours starting after the given timestamp are returned, and that have ended by the given moment.
+    Prices shorter than an hour are combined into the hour they start in, weighted by their length.
+    """
+    hours: dict[float, list[tuple[float, float]]] = {}
+    for start, end, total in zip(index.starts, index.ends, index.totals):
+        hour = start - start % 3600
+        if (after is None or hour > after) and (until is None or hour + 3600 <= until):
+            hours.setdefault(hour, []).append((total, end - start))
+
+    return [
+        StatisticData(
+            start=dt_util.utc_from_timestamp(hour),
+            mean=round(sum(total * length for total, length in prices) / sum(length for _, length in prices), 5),
+            min=min(total for total, _ in prices),
+            max=max(total for total, _ in prices),
+        )
+        for hour, prices in hours.items()
+    ]
+
+
+class PriceStatistics:
+    """Imports the prices of all sites of a config entry as external statistics.
+
+    Only the hours after the last imported one that have ended are imported, in a single batch per
+    statistic. When statistics are missing for days before the current prices, those are backfilled with
+    the prices of each day, up to a limited number of days back. Sites with prices of their own are
+    backfilled with those, so a statistic never mixes them with the public prices.
+    """
+
+    def __init__(self, hass: HomeAssistant, api: FrankEnergieClient, sites: dict[str | None, str]) -> None:
+        """Initialize the importer."""
+        self.hass = hass
+        self.api = api
+        self.sites = sites
+        # Start of the last imported hour of each statistic, once looked up in the recorder
+        self._last_imported: dict[str, float | None] = {}
+        self._lock = asyncio.Lock()
+
+    async def async_import(self, data: dict) -> None:
+        """Import the prices of all sites in the data of the coordinator."""
+        if "recorder" not in self.hass.config.components:
+            return
+
+        # A single import at a time, so an import never works with outdated last imported hours
+        async with self._lock:
+            statistics = {
+                price_statistic_id(commodity, site): (site, commodity)
+                for site in data
+                for commodity in PRICE_COMMODITIES
+            }
+            for statistic_id in statistics:
+                if statistic_id not in self._last_imported:
+                    self._last_imported[statistic_id] = await self._async_last_imported(statistic_id)
+
+            try:
+                backfill = await self._async_fetch_backfill(data)
+            except (AuthException, RequestException, ValueError) as ex:
+                # Import nothing, so the missing days are tried again with the next refresh
+                LOGGER.debug("Failed to fetch prices to backfill the statistics: %s", ex)
+                return
+
+            now = dt_util.utcnow().timestamp()
+            for statistic_id, (site, commodity) in statistics.items():
+                prices_key, index_key, unit = PRICE_COMMODITIES[commodity]
+                if site in backfill:
+                    index = PriceIndex(backfill[site][commodity] + data[site][prices_key])
+                else:
+                    index = data[site][index_key]
+                self._async_add_statistics(statistic_id, site, commodity, unit, index, now)
+
+    def _async_add_statistics(
+        self, statistic_id: str, site: str | None, commodity: str, unit: str, index: PriceIndex, now: float
+    ) -> None:
+        """Add the hours of the prices that weren't imported before, and have ended, to the statistic."""
+        rows = hourly_price_statistics(index, self._last_imported[statistic_id], now)
+        if not rows:
+            return
+
+        LOGGER.debug("Importing %s hours of %s statistics", len(rows), statistic_id)
+        name = f"Frank Energie {commodity} price"
+        if site is not None:
+            name += f" ({self.sites.get(site, site)})"
+        async_add_external_statistics(
+            self.hass,
+            StatisticMetaData(
+                has_mean=True,
+                has_sum=False,
+                name=name,
+                source=DOMAIN,
+                statistic_id=statistic_id,
+                unit_of_measurement=unit,
+            ),
+            rows,
+        )
+        self._last_imported[statistic_id] = rows[-1]["start"].timestamp()
+
+    async def _async_last_imported(self, statistic_id: str) -> float | None:
+        """Look up the start of the last hour of the statistic in the recorder."""
+        last = await get_instance(self.hass).async_add_executor_job(
+            get_last_statistics, self.hass, 1, statistic_id, False, {"mean"}
+        )
+        return last[statistic_id][0]["start"] if last.get(statistic_id) else None
+
+    async def _async_fetch_backfill(self, data: dict) -> dict[str | None, dict[str, PriceData]]:
+        """Fetch the prices of each site for the days that are missing before the prices in the data.
+
+        The days are requested one at a time, with a pause between the requests.
+        """
+        backfill: dict[str | None, dict[str, PriceData]] = {}
+        requested = False
+        for site, site_data in data.items():
+            days = self._missing_days(site, site_data)
+            if not days:
+                continue
+
+            LOGGER.debug("Backfilling price statistics of %s from %s until %s", site, days[0], days[-1])
+            backfill[site] = {commodity: PriceData() for commodity in PRICE_COMMODITIES}
+            for day in days:
+                if requested:
+                    await asyncio.sleep(STATISTICS_BACKFILL_DELAY.total_seconds())
+                requested = True
+
+                if site is None:
+                    # Each day is requested on its own, gas prices are only returned for the first day of a range
+                    prices = await self.api.prices(day, day + timedelta(days=1))
+                else:
+                    prices = await self.api.user_prices(day, site)
+                backfill[site]["electricity"] += prices.electricity
+                backfill[site]["gas"] += prices.gas
+
+        return backfill
+
+    def _missing_days(self, site: str | None, site_data: dict) -> list[date]:
+        """Return the days of a site from the one of its least recently imported hour until its first current price."""
+        first_prices = [
+            site_data[key].starts[0] for key in (DATA_ELECTRICITY_INDEX, DATA_GAS_INDEX) if len(site_data[key])
+        ]
+        if not first_prices:
+            return []
+
+        first_day = dt_util.as_local(dt_util.utc_from_timestamp(min(first_prices))).date()
+        oldest_day = first_day - timedelta(days=STATISTICS_BACKFILL_DAYS)
+        last_days = [
+            dt_util.as_local(dt_util.utc_from_timestamp(last)).date() if last is not None else oldest_day
+            for last in (self._last_imported[price_statistic_id(commodity, site)] for commodity in PRICE_COMMODITIES)
+        ]
+        start_day = max(min(last_days), oldest_day)
+
+        return [start_day + timedelta(days=offset) for offset in range((first_day - start_day).days)]
+
+
+def usage_statistic_id(kind: str, measure: str, site_reference: str) -> str:
+    """Return the ID of the statistic of the usage or cost of a kind of usage for a site."""
+    return f"{DOMAIN}:{kind}_{measure}_{slugify(site_reference)}"
+
+
+def usage_query(site_reference: str, days: list[date]) -> dict[str, Any]:
+    """Return the query for the usage and costs of a site on each of the given days, with an alias per day."""
+    selection = " ".join(f"{field} {{ {USAGE_SELECTION} }}" for field, _ in USAGE_KINDS.values())
+    fields = " ".join(
+        f"day{number}: periodUsageAndCosts(date: $date{number}, siteReference: $site) {{ {selection} }}"
+        for number in range(len(days))
+    )
+    declarations = ", ".join(["$site: String!"] + [f"$date{number}: String!" for number in range(len(days))])
+    return {
+        "query": f"query PeriodUsageAndCosts({declarations}) {{ {fields} }}",
+        "operationName": "PeriodUsageAndCosts",
+        "variables": {"site": site_reference, **{f"date{number}": str(day) for number, day in enumerate(days)}},
+    }
+
+
+def hourly_usage(items: list[dict[str, Any]], field: str) -> dict[float, float]:
+    """Return the total of the field of the usage items of each hour, by the start of the hour."""
+    hours: dict[float, float] = {}
+    for item in items:
+        start = dt_util.parse_datetime(item["from"]).timestamp()
+        hours[start - start % 3600] = hours.get(start - start % 3600, 0) + float(item[field] or 0)
+    return dict(sorted(hours.items()))
+
+
+class UsageStatistics:
+    """Imports the usage and costs of all sites of a config entry as external statistics, for the Energy dashboard.
+
+    The last imported day of each site is checkpointed, so every run only fetches the days after it, and the
+    recent days of which meter readings may still arrive, as their usage may have been partial. The first run
+    backfills a long period, a chunk of days per request with a pause between the requests, and adds the
+    statistics and saves the checkpoint after every chunk.
+    """
+
+    def __init__(
+        self, hass: HomeAssistant, entry_id: str, api: FrankEnergieClient, tokens: TokenManager, sites: dict[str, str]
+    ) -> None:
+        """Initialize the importer."""
+        self.hass = hass
+        self.api = api
+        self.tokens = tokens
+        self.sites = sites
+        self.store = UsageCheckpointStore(hass, entry_id)
+        # Start of the last imported hour and the sum until then of each statistic, once looked up in the recorder
+        self._last: dict[str, tuple[float | None, float]] = {}
+        self._lock = asyncio.Lock()
+        self._requested = False
+
+    async def async_import(self) -> None:
+        """Import the usage and costs of all sites since their checkpoint, unless an import is running already."""
+        if "recorder" not in self.hass.config.components or self._lock.locked():
+            return
+
+        async with self._lock:
+            self._requested = False
+            checkpoints = await self.store.async_load() or {}
+            try:
+                for site in self.sites:
+                    await self._async_import_site(site, checkpoints)
+            except (AuthException, ConfigEntryAuthFailed, RequestException, ValueError) as ex:
+                # Continued from the last checkpoint by the next import
+                LOGGER.debug("Failed to import usage and costs: %s", ex)
+
+    async def _async_import_site(self, site: str, checkpoints: dict[str, str]) -> None:
+        """Import the days after the checkpoint of a site, and the days that aren't final yet, up to yesterday."""
+        today = dt_util.now().date()
+        if site in checkpoints:
+            # Hours that were imported before are skipped, only the usage that arrived since then is added
+            start = min(date.fromisoformat(checkpoints[site]), today - USAGE_FINAL_AFTER) + timedelta(days=1)
+        else:
+            start = today - timedelta(days=USAGE_BACKFILL_DAYS)
+
+        while start < today:
+            days = [start + timedelta(days=offset) for offset in range(min(USAGE_CHUNK_DAYS, (today - start).days))]
+            if self._requested:
+                await asyncio.sleep(USAGE_REQUEST_DELAY.total_seconds())
+            self._requested = True
+
+            await self.tokens.async_ensure_valid()
+            response = await self.api.async_query(usage_query(site, days))
+            if not response.get("data"):
+                raise RequestException(f"Usage and costs query was rejected: {response.get('errors')}")
+
+            if (final := await self._async_add_days(site, days, response["data"], today)) is None:
+                return
+            if site not in checkpoints or final > date.fromisoformat(checkpoints[site]):
+                checkpoints[site] = str(final)
+            await self.store.async_save(checkpoints)
+            if final != days[-1]:
+                return
+            start = final + timedelta(days=1)
+
+    async def _async_add_days(self, site: str, days: list[date], data: dict[str, Any], today: date) -> date | None:
+        """Add the usage and costs of the days to the statistics.
+
+        Stops at a recent day without any usage, of which the meter readings may still arrive. Returns the
+        last day that was added.
+        """
+        hours: dict[tuple[str, str], dict[float, float]] = {}
+        final = None
+        for number, day in enumerate(days):
+            usage = data.get(f"day{number}") or {}
+            items = {kind: (usage.get(field) or {}).get("items") or [] for kind, (field, _) in USAGE_KINDS.items()}
+            if not any(items.values()) and today - day < USAGE_FINAL_AFTER:
+                break
+
+            for kind, kind_items in items.items():
+                for measure, field in (("usage", "usage"), ("cost", "costs")):
+                    hours.setdefault((kind, measure), {}).update(hourly_usage(kind_items, field))
+            final = day
+
+        for (kind, measure), values in hours.items():
+            if values:
+                await self._async_add_statistics(site, kind, measure, values)
+        return final
+
+    async def _async_add_statistics(self, site: str, kind: str, measure: str, values: dict[float, float]) -> None:
+        """Add the hourly values that weren't imported before to the statistic, continuing its sum."""
+        statistic_id = usage_statistic_id(kind, measure, site)
+        if statistic_id not in self._last:
+            self._last[statistic_id] = await self._async_last_sum(statistic_id)
+
+        last_start, total = self._last[statistic_id]
+        rows = []
+        for start, value in values.items():
+            if last_start is not None and start <= last_start:
+                continue
+            total += value
+            rows.append(StatisticData(start=dt_util.utc_from_timestamp(start), state=value, sum=round(total, 5)))
+        if not rows:
+            return
+
+        async_add_external_statistics(
+            self.hass,
+            StatisticMetaData(
+                has_mean=False,
+                has_sum=True,
+                name=f"Frank Energie {kind.replace('_', '-')} {measure} ({self.sites.get(site, site)})",
+                source=DOMAIN,
+                statistic_id=statistic_id,
+                unit_of_measurement=CURRENCY_EURO if measure == "cost" else USAGE_KINDS[kind][1],
+            ),
+            rows,
+        )
+        self._last[statistic_id] = (rows[-1]["start"].timestamp(), total)
+
+    async def _async_last_sum(self, statistic_id: str) -> tuple[float | None, float]:
+        """Look up the start of the last hour of the statistic and its sum until then in the recorder."""
+        last = await get_instance(self.hass).async_add_executor_job(
+            get_last_statistics, self.hass, 1, statistic_id, True, {"sum"}
+        )
+        if not last.get(statistic_id):
+            return None, 0
+        return last[statistic_id][0]["start"], last[statistic_id][0]["sum"] or 0
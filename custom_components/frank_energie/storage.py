@@ -0,0 +1,167 @@
+"""Persistent cache for the Frank Energie coordinator data."""
+from __future__ import annotations
+
+import logging
+from collections.abc import Iterable
+from dataclasses import asdict
+from datetime import date, datetime
+from typing import Any
+
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.storage import Store
+from python_frank_energie.models import Invoices, MonthSummary, Price, PriceData
+
+from .const import (
+    DATA_ELECTRICITY,
+    DATA_ELECTRICITY_HISTORY,
+    DATA_GAS,
+    DATA_GAS_HISTORY,
+    DATA_INVOICES,
+    DATA_MONTH_SUMMARY,
+    DEFAULT_HISTORY_DAYS,
+    DOMAIN,
+)
+from .history import HistoryDay, PriceHistory
+
+LOGGER = logging.getLogger(__name__)
+
+STORAGE_VERSION = 2
+STORAGE_SAVE_DELAY = 10
+USAGE_CHECKPOINT_VERSION = 1
+
+# Order of the fields of a single price row in the store
+PRICE_FIELDS = ("from", "till", "marketPrice", "marketPriceTax", "sourcingMarkupPrice", "energyTaxPrice")
+
+
+class FrankEnergieStore(Store):
+    """Store holding the last data fetched for a config entry."""
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        """Initialize the store."""
+        super().__init__(hass, STORAGE_VERSION, f"{DOMAIN}.{entry_id}")
+
+    async def _async_migrate_func(self, old_major_version: int, old_minor_version: int, old_data: dict) -> None:
+        """Discard data from other versions, it's only a cache and will be fetched again."""
+        LOGGER.debug("Discarding cached data with version %s.%s", old_major_version, old_minor_version)
+        return None
+
+
+class UsageCheckpointStore(Store):
+    """Store holding the last day of which the usage and costs of each site were imported."""
+
+    def __init__(self, hass: HomeAssistant, entry_id: str) -> None:
+        """Initialize the store."""
+        super().__init__(hass, USAGE_CHECKPOINT_VERSION, f"{DOMAIN}.{entry_id}.usage")
+
+
+def encode_prices(prices: Iterable[Price]) -> list[list]:
+    """Encode prices to a list of rows, in the order of PRICE_FIELDS."""
+    return [
+        [
+            price.date_from.isoformat(),
+            price.date_till.isoformat(),
+            price.market_price,
+            price.market_price_tax,
+            price.sourcing_markup_price,
+            price.energy_tax_price,
+        ]
+        for price in prices
+    ]
+
+
+def encode_price_data(price_data: PriceData) -> list[list]:
+    """Encode price data to a list of rows, in the order of PRICE_FIELDS."""
+    return encode_prices(price_data.all)
+
+
+def decode_price_data(rows: list[list]) -> PriceData:
+    """Decode a list of rows, created by encode_price_data, to price data."""
+    return PriceData([dict(zip(PRICE_FIELDS, row)) for row in rows])
+
+
+def encode_price_history(history: PriceHistory) -> list[list]:
+    """Encode the days of a price history, as a list of the date, average price and rows of each day."""
+    return [[str(day.day), day.avg, encode_prices(day.prices)] for day in history]
+
+
+def decode_price_history(rows: list[list], days: int) -> PriceHistory:
+    """Decode a price history, created by encode_price_history, keeping the given number of past days."""
+    history = PriceHistory(days)
+    for day, avg, prices in sorted(rows):
+        history.add_day(HistoryDay(date.fromisoformat(day), tuple(decode_price_data(prices).all), avg))
+    return history
+
+
+def encode_invoices(invoices: Invoices) -> dict[str, Any]:
+    """Encode invoices to a dict that can be stored as JSON."""
+    return {
+        period: {
+            "StartDate": invoice.StartDate.isoformat(),
+            "PeriodDescription": invoice.PeriodDescription,
+            "TotalAmount": invoice.TotalAmount,
+        } if (invoice := getattr(invoices, period)) is not None else None
+        for period in ("previousPeriodInvoice", "currentPeriodInvoice", "upcomingPeriodInvoice")
+    }
+
+
+def decode_invoices(data: dict[str, Any]) -> Invoices:
+    """Decode invoices, created by encode_invoices."""
+    return Invoices(**{period: Invoices.Invoice.from_dict(invoice) for period, invoice in data.items()})
+
+
+def encode_data(data: dict[str, Any]) -> dict[str, Any]:
+    """Encode coordinator data to a dict that can be stored as JSON."""
+    return {
+        DATA_ELECTRICITY: encode_price_data(data[DATA_ELECTRICITY]),
+        DATA_GAS: encode_price_data(data[DATA_GAS]),
+        DATA_MONTH_SUMMARY: asdict(data[DATA_MONTH_SUMMARY]) if data[DATA_MONTH_SUMMARY] else None,
+        DATA_INVOICES: encode_invoices(data[DATA_INVOICES]) if data[DATA_INVOICES] else None,
+        DATA_ELECTRICITY_HISTORY: encode_price_history(data[DATA_ELECTRICITY_HISTORY]),
+        DATA_GAS_HISTORY: encode_price_history(data[DATA_GAS_HISTORY]),
+    }
+
+
+def decode_data(data: dict[str, Any], history_days: int = DEFAULT_HISTORY_DAYS) -> dict[str, Any]:
+    """Decode coordinator data, created by encode_data.
+
+    The price histories were added later, data stored before that starts with empty histories.
+    """
+    return {
+        DATA_ELECTRICITY: decode_price_data(data[DATA_ELECTRICITY]),
+        DATA_GAS: decode_price_data(data[DATA_GAS]),
+        DATA_MONTH_SUMMARY: MonthSummary(**data[DATA_MONTH_SUMMARY]) if data[DATA_MONTH_SUMMARY] else None,
+        DATA_INVOICES: decode_invoices(data[DATA_INVOICES]) if data[DATA_INVOICES] else None,
+        DATA_ELECTRICITY_HISTORY: decode_price_history(data.get(DATA_ELECTRICITY_HISTORY, []), history_days),
+        DATA_GAS_HISTORY: decode_price_history(data.get(DATA_GAS_HISTORY, []), history_days),
+    }
+
+
+def encode_sites_data(
+    data: dict[str | None, dict[str, Any]], fetched_at: dict[str | None, dict[str, datetime]] | None = None
+) -> dict[str, Any]:
+    """Encode the coordinator data of all sites, as a list of site reference and data pairs.
+
+    When each kind of data of the sites was fetched is stored along with it, in the same way.
+    """
+    return {
+        "sites": [[site, encode_data(site_data)] for site, site_data in data.items()],
+        "fetched_at": [
+            [site, {kind: when.isoformat() for kind, when in kinds.items()}]
+            for site, kinds in (fetched_at or {}).items()
+        ],
+    }
+
+
+def decode_sites_data(
+    data: dict[str, Any], history_days: int = DEFAULT_HISTORY_DAYS
+) -> dict[str | None, dict[str, Any]]:
+    """Decode the coordinator data of all sites, created by encode_sites_data."""
+    return {site: decode_data(site_data, history_days) for site, site_data in data["sites"]}
+
+
+def decode_fetched_at(data: dict[str, Any]) -> dict[str | None, dict[str, datetime]]:
+    """Decode when each kind of data of the sites was fetched, stored by encode_sites_data."""
+    return {
+        site: {kind: datetime.fromisoformat(when) for kind, when in kinds.items()}
+        for site, kinds in data.get("fetched_at", [])
+    }
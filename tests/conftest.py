@@ -1,5 +1,38 @@
 import sys
 from os.path import abspath, dirname
+from unittest.mock import patch
+
+import pytest
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt
+from python_frank_energie import FrankEnergie
+
+from tests.utils import GraphQLMock
 
 root_dir = abspath(dirname(__file__) + "/../custom_components/")
 sys.path.append(root_dir)
+
+
+@pytest.fixture
+def start_of_day(hass: HomeAssistant, freezer):
+    """Return the start of today, at 13:15 UTC on 1 March 2023 in the Netherlands."""
+    hass.config.set_time_zone("Europe/Amsterdam")
+    freezer.move_to("2023-03-01 13:15:00+00:00")
+    return dt.start_of_local_day()
+
+
+@pytest.fixture
+def graphql():
+    """Answer all requests to the API with a GraphQLMock, of an account with two sites."""
+    mock = GraphQLMock({"site-a": 0.2, "site-b": 0.25})
+
+    async def query(_, query):
+        return await mock(query)
+
+    with patch.object(FrankEnergie, "_query", query):
+        yield mock
+
+
+def pytest_configure(config):
+    """Register the markers of the tests."""
+    config.addinivalue_line("markers", "perf: benchmarks of the hot paths, only run when FRANK_ENERGIE_PERF is set")
@@ -0,0 +1,59 @@
+import asyncio
+from datetime import timedelta
+
+import jwt
+from homeassistant.const import CONF_ACCESS_TOKEN, CONF_TOKEN, CONF_USERNAME
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+from python_frank_energie import FrankEnergie
+from python_frank_energie.models import Authentication
+
+from custom_components.frank_energie import const
+from custom_components.frank_energie.auth import TokenManager
+
+
+def token(expires_in: timedelta) -> str:
+    return jwt.encode({"exp": int((dt.utcnow() + expires_in).timestamp())}, "secret", algorithm="HS256")
+
+
+def token_manager(hass: HomeAssistant, expires_in: timedelta) -> tuple[TokenManager, list]:
+    entry = MockConfigEntry(
+        domain=const.DOMAIN,
+        data={
+            CONF_USERNAME: "user",
+            CONF_ACCESS_TOKEN: token(expires_in),
+            CONF_TOKEN: "old",
+            const.CONF_SITE_REFERENCE: "site",
+        },
+    )
+    entry.add_to_hass(hass)
+    api = FrankEnergie(auth_token=entry.data[CONF_ACCESS_TOKEN], refresh_token="old")
+    renewals = []
+
+    async def renew_token():
+        renewals.append(1)
+        await asyncio.sleep(0)
+        return Authentication(token(timedelta(hours=1)), "renewed")
+
+    api.renew_token = renew_token
+    return TokenManager(hass, entry, api), renewals
+
+
+async def test_renew_before_expiry(hass: HomeAssistant):
+    tokens, renewals = token_manager(hass, timedelta(minutes=1))
+
+    await asyncio.gather(tokens.async_ensure_valid(), tokens.async_ensure_valid())
+
+    assert len(renewals) == 1
+    assert tokens.entry.data[CONF_TOKEN] == "renewed"
+    assert tokens.entry.data[const.CONF_SITE_REFERENCE] == "site"
+    assert tokens.expires_at > dt.utcnow() + timedelta(minutes=50)
+
+
+async def test_valid_token_is_not_renewed(hass: HomeAssistant):
+    tokens, renewals = token_manager(hass, timedelta(hours=1))
+
+    await tokens.async_ensure_valid()
+
+    assert renewals == []
@@ -0,0 +1,85 @@
+from datetime import date, datetime, timezone
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.json import json_dumps
+from python_frank_energie.exceptions import RequestException
+
+from custom_components.frank_energie import const
+from custom_components.frank_energie.batch import RefreshBatch
+from custom_components.frank_energie.metrics import CoordinatorMetrics
+from custom_components.frank_energie.public_prices import async_get_public_price_cache
+from tests.utils import ResponseMocks
+
+DAYS = [(date(2023, 3, 1), date(2023, 3, 2)), (date(2023, 3, 2), date(2023, 3, 3))]
+START = datetime(2023, 3, 1, tzinfo=timezone.utc)
+
+
+def test_query():
+    batch = RefreshBatch(DAYS, ["site-a", "site-b"], {const.REFRESH_PRICES, const.REFRESH_INVOICES}, DAYS[1:])
+    query = batch.query
+
+    assert query["variables"] == {
+        "start1": "2023-03-02",
+        "end1": "2023-03-03",
+        "site0": "site-a",
+        "date0": "2023-03-01",
+        "date1": "2023-03-02",
+        "site1": "site-b",
+    }
+    assert "electricity0:" not in query["query"]
+    assert "gas1: marketPricesGas(startDate: $start1, endDate: $end1)" in query["query"]
+    assert "userPrices1_0: customerMarketPrices(date: $date0, siteReference: $site1)" in query["query"]
+    assert "invoices1: invoices(siteReference: $site1)" in query["query"]
+    assert "monthSummary" not in query["query"]
+
+
+def test_empty_query():
+    assert not RefreshBatch(DAYS, [], {const.REFRESH_MONTH_SUMMARY}, [])
+
+
+async def test_response(hass: HomeAssistant):
+    prices = ResponseMocks()._generate_prices_response(START, [0.2] * 24)
+    api = MagicMock(
+        async_query=AsyncMock(
+            return_value={
+                "data": {
+                    "electricity0": prices,
+                    "gas0": prices,
+                    "userPrices0_0": None,
+                    "monthSummary0": None,
+                },
+                "errors": [
+                    {"message": "No marketprices found for segment", "path": ["userPrices0_0"]},
+                    {"message": "Something went wrong", "path": ["monthSummary0"]},
+                ],
+            }
+        )
+    )
+    cache = async_get_public_price_cache(hass)
+    metrics = CoordinatorMetrics()
+    batch = RefreshBatch(DAYS[:1], ["site-a"], {const.REFRESH_PRICES, const.REFRESH_MONTH_SUMMARY}, DAYS[:1])
+
+    response = await batch.async_fetch(api, cache, metrics)
+
+    assert len((await response.prices(*DAYS[0])).electricity.all) == 24
+    assert cache.async_contains(*DAYS[0])
+    assert (await response.user_prices(DAYS[0][0], "site-a")).electricity.all == []
+    with pytest.raises(RequestException):
+        await response.month_summary("site-a")
+
+    # Each field is recorded under the kind of query it replaces
+    assert metrics.batched_fields["prices"].fields == 2
+    assert metrics.batched_fields["prices"].response_bytes == 2 * len(json_dumps(prices))
+    assert metrics.batched_fields["prices"].failures == 0
+    assert metrics.batched_fields["user_prices"].failures == 1
+    assert metrics.batched_fields["month_summary"].failures == 1
+    assert metrics.batched_fields["month_summary"].response_bytes == len("null")
+
+
+async def test_rejected_query(hass: HomeAssistant):
+    api = MagicMock(async_query=AsyncMock(return_value={"errors": [{"message": "Cannot query field"}]}))
+    batch = RefreshBatch(DAYS, [], {const.REFRESH_PRICES}, DAYS)
+
+    assert await batch.async_fetch(api, async_get_public_price_cache(hass)) is None
@@ -0,0 +1,179 @@
+"""Benchmarks of the hot paths of a refresh, skipped unless FRANK_ENERGIE_PERF is set.
+
+Run them with `FRANK_ENERGIE_PERF=1 pytest -m perf -s`. Set FRANK_ENERGIE_BENCHMARK_RESULTS to a file
+name to save the results as JSON, to compare them between commits.
+"""
+import asyncio
+import json
+import os
+import statistics
+from datetime import timedelta
+from time import perf_counter
+from typing import Callable
+
+import pytest
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.json import json_dumps
+from homeassistant.util import dt
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+from pytest_homeassistant_custom_component.test_util.aiohttp import AiohttpClientMocker
+
+from custom_components.frank_energie import const
+from custom_components.frank_energie.price_index import PriceIndex
+from custom_components.frank_energie.public_prices import PublicPriceCache
+from tests.utils import ResponseMocks, price_data
+
+pytestmark = [
+    pytest.mark.perf,
+    pytest.mark.skipif(not os.environ.get("FRANK_ENERGIE_PERF"), reason="Set FRANK_ENERGIE_PERF to run benchmarks"),
+]
+
+# Simulated round trip time of a request to the API
+NETWORK_DELAY = 0.05
+ROUNDS = 10
+
+RESULTS: dict[str, dict] = {}
+
+
+@pytest.fixture(scope="module", autouse=True)
+def save_results():
+    """Save the results of all benchmarks of the module, when requested."""
+    yield
+    if path := os.environ.get("FRANK_ENERGIE_BENCHMARK_RESULTS"):
+        with open(path, "w", encoding="utf-8") as file:
+            json.dump(RESULTS, file, indent=2, sort_keys=True)
+
+
+def record(name: str, **results) -> None:
+    """Record the results of a benchmark, and show them in the output of pytest."""
+    RESULTS[name] = results
+    print(f"\n{name}: {results}")
+
+
+async def measure(run: Callable, rounds: int = ROUNDS) -> float:
+    """Return the median duration of the given (async) callable, in milliseconds."""
+    durations = []
+    for _ in range(rounds):
+        start = perf_counter()
+        if asyncio.iscoroutine(result := run()):
+            await result
+        durations.append((perf_counter() - start) * 1000)
+    return round(statistics.median(durations), 3)
+
+
+@pytest.fixture
+async def coordinator(
+    hass: HomeAssistant, enable_custom_integrations, aioclient_mock: AiohttpClientMocker, request
+):
+    """Set up an entry with public prices of today, served with a simulated network delay.
+
+    Unless the fixture is parametrized with True, the prices of tomorrow aren't published yet, so
+    they're requested again with every refresh.
+    """
+    published = getattr(request, "param", False)
+    responses = ResponseMocks()
+    hass.config.set_time_zone("Europe/Amsterdam")
+    start = dt.start_of_local_day()
+    responses.add_batch(start, [([0.2] * 24, [1.2] * 24), ([0.3] * 24, [1.3] * 24) if published else ([], [])])
+    # Later refreshes only request the prices of tomorrow
+    unpublished = ResponseMocks()
+    unpublished.add_batch(start + timedelta(days=1), [([], [])])
+    unpublished.cyclic()
+
+    async def delayed_response(*_):
+        await asyncio.sleep(NETWORK_DELAY)
+        return next(responses, None) or next(unpublished)
+
+    aioclient_mock.post(const.DATA_URL, side_effect=delayed_response)
+
+    entry = MockConfigEntry(domain=const.DOMAIN, data={}, unique_id="frank_energie")
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    return hass.data[const.DOMAIN][entry.entry_id][const.CONF_COORDINATOR]
+
+
+async def test_refresh_latency(hass: HomeAssistant, coordinator, aioclient_mock: AiohttpClientMocker):
+    async def refresh(cold: bool):
+        # Public prices are shared for a while, start every cold round with an empty cache
+        if cold:
+            coordinator.public_prices = PublicPriceCache(hass)
+        coordinator.scheduler.reschedule(const.REFRESH_PRICES, dt.utcnow())
+        await coordinator.async_refresh()
+
+    results = {}
+    for cold in (True, False):
+        calls = aioclient_mock.call_count
+        latency = await measure(lambda: refresh(cold))
+        results["cold" if cold else "warm"] = {
+            "latency_ms": latency,
+            "requests": (aioclient_mock.call_count - calls) / ROUNDS,
+        }
+
+    record("refresh", **results, network_delay_ms=NETWORK_DELAY * 1000)
+    # All data of a refresh is fetched with a single round trip, and not at all while the prices are shared
+    assert results["cold"]["requests"] == 1
+    assert results["warm"]["requests"] == 0
+
+
+@pytest.mark.parametrize("coordinator", [True], indirect=True)
+async def test_refresh_complete_days(hass: HomeAssistant, coordinator, aioclient_mock: AiohttpClientMocker):
+    async def refresh():
+        # Every round starts with an empty public price cache, as when the shared prices have expired
+        coordinator.public_prices = PublicPriceCache(hass)
+        coordinator.scheduler.reschedule(const.REFRESH_PRICES, dt.utcnow())
+        await coordinator.async_refresh()
+
+    calls = aioclient_mock.call_count
+    generation = coordinator.data_generation
+    latency = await measure(refresh)
+
+    record("refresh_complete_days", latency_ms=latency, requests=(aioclient_mock.call_count - calls) / ROUNDS)
+    # All prices of today and tomorrow are known, so they're not requested again and nothing changes
+    assert aioclient_mock.call_count == calls
+    assert coordinator.data_generation == generation
+
+
+async def test_sensor_fan_out(hass: HomeAssistant, coordinator):
+    listeners = len(hass.states.async_all())
+
+    def new_data():
+        # Make every entity rebuild its state and attributes, as after a refresh with new data
+        coordinator.data_generation += 1
+        coordinator.async_update_listeners()
+
+    writes = coordinator.suppressed_writes
+    new_data_duration = await measure(new_data)
+
+    # At the start of a new slot without new data only the states of some entities change
+    suppressed = coordinator.suppressed_writes
+    slot_duration = await measure(coordinator.async_update_listeners)
+
+    record(
+        "fan_out",
+        listeners=listeners,
+        new_data_ms=new_data_duration,
+        new_slot_ms=slot_duration,
+        suppressed_writes_per_update=(coordinator.suppressed_writes - suppressed) / ROUNDS,
+    )
+    assert coordinator.suppressed_writes - writes >= listeners * ROUNDS
+
+
+@pytest.mark.parametrize("slots", [24, 48, 96])
+async def test_prices_attribute(hass: HomeAssistant, slots: int):
+    start = dt.start_of_local_day()
+    data = price_data(start, [0.2 + 0.01 * (slot % 7) for slot in range(slots)], minutes=24 * 60 // slots)
+
+    results = {}
+    for compact in (False, True):
+        index = PriceIndex(data)
+        results["compact" if compact else "full"] = {
+            "build_ms": await measure(lambda: PriceIndex(data).prices_attribute("total", compact)),
+            "serialize_ms": await measure(lambda: json_dumps(index.prices_attribute("total", compact))),
+            "bytes": len(json_dumps(index.prices_attribute("total", compact))),
+        }
+
+    record(f"prices_attribute_{slots}", **results)
+    assert results["compact"]["bytes"] < results["full"]["bytes"]
+    assert index.slot_seconds == timedelta(days=1).total_seconds() / slots
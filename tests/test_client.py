@@ -0,0 +1,55 @@
+"""Tests of the parts of python-frank-energie the client relies on, these fail when the pinned version changes them."""
+import pytest
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers.aiohttp_client import async_get_clientsession
+from python_frank_energie.exceptions import AuthException
+from pytest_homeassistant_custom_component.test_util.aiohttp import AiohttpClientMocker
+
+from custom_components.frank_energie.client import FrankEnergieClient
+
+QUERY = {"query": "query Me { me { id } }", "operationName": "Me", "variables": {}}
+
+
+class RecordingClient(FrankEnergieClient):
+    def __init__(self, *args, **kwargs) -> None:
+        super().__init__(*args, **kwargs)
+        self.queries: list[str] = []
+
+    async def async_query(self, query):
+        self.queries.append(query["operationName"])
+        return await super().async_query(query)
+
+
+async def test_query(hass: HomeAssistant, aioclient_mock: AiohttpClientMocker):
+    aioclient_mock.post(FrankEnergieClient.DATA_URL, json={"data": {"me": {"id": "1"}}})
+    api = FrankEnergieClient(clientsession=async_get_clientsession(hass), auth_token="token", refresh_token="refresh")
+
+    assert await api.async_query(QUERY) == {"data": {"me": {"id": "1"}}}
+
+    [(method, url, data, headers)] = aioclient_mock.mock_calls
+    assert (method, str(url), data) == ("POST", FrankEnergieClient.DATA_URL, QUERY)
+    assert headers == {"Authorization": "Bearer token"}
+
+
+async def test_rejected_tokens(hass: HomeAssistant, aioclient_mock: AiohttpClientMocker):
+    aioclient_mock.post(FrankEnergieClient.DATA_URL, json={"errors": [{"message": "user-error:auth-not-authorised"}]})
+    api = FrankEnergieClient(clientsession=async_get_clientsession(hass), auth_token="token", refresh_token="refresh")
+
+    with pytest.raises(AuthException):
+        await api.async_query(QUERY)
+
+
+async def test_library_requests(hass: HomeAssistant, aioclient_mock: AiohttpClientMocker):
+    aioclient_mock.post(
+        FrankEnergieClient.DATA_URL,
+        json={"data": {"renewToken": {"authToken": "renewed", "refreshToken": "refresh2"}}},
+    )
+    api = RecordingClient(clientsession=async_get_clientsession(hass), auth_token="token", refresh_token="refresh")
+
+    tokens = await api.renew_token()
+    await api.async_query(QUERY)
+
+    # Requests of the library pass through async_query, and use the tokens renew_token returned
+    assert api.queries == ["RenewToken", "Me"]
+    assert (tokens.authToken, tokens.refreshToken) == ("renewed", "refresh2")
+    assert aioclient_mock.mock_calls[-1][3] == {"Authorization": "Bearer renewed"}
@@ -0,0 +1,156 @@
+from datetime import timedelta
+
+from aiohttp import ClientError
+from homeassistant.const import STATE_UNAVAILABLE
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+
+from custom_components.frank_energie import const
+from tests.utils import ResponseMocks, authenticated_entry
+
+
+async def test_failed_refresh_keeps_data(
+    hass: HomeAssistant, enable_custom_integrations, aioclient_mock, socket_enabled, freezer
+):
+    responses = ResponseMocks()
+    failing = False
+
+    async def next_response(*_):
+        if failing:
+            raise ClientError("Connection reset")
+        return next(responses)
+
+    aioclient_mock.post(const.DATA_URL, side_effect=next_response)
+    responses.add_batch(dt.start_of_local_day(), [([0.2] * 24, [1.2] * 24)])
+    responses.cyclic()
+    entry = MockConfigEntry(domain=const.DOMAIN, data={}, unique_id="frank_energie")
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    coordinator = hass.data[const.DOMAIN][entry.entry_id][const.CONF_COORDINATOR]
+    fetched_at = coordinator.fetched_at(None, const.REFRESH_PRICES)
+    assert fetched_at is not None
+
+    # Only today's prices are known, which isn't enough to skip a refresh after a failure before
+    failing = True
+    coordinator.api.attempts = 1
+    # The public prices are no longer shared once they've expired
+    freezer.tick(const.PUBLIC_PRICES_CACHE_TTL + timedelta(seconds=1))
+    coordinator.scheduler.reschedule(const.REFRESH_PRICES, dt.utcnow())
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+
+    assert coordinator.last_update_success
+    assert coordinator.metrics.refresh_failures == 1
+    assert coordinator.scheduler.due(dt.utcnow()) == set()
+    state = hass.states.get("sensor.current_electricity_price_all_in")
+    assert state.state != STATE_UNAVAILABLE
+    assert state.attributes[const.ATTR_FETCHED_AT] == fetched_at
+
+
+async def test_complete_price_days_not_fetched_again(
+    hass: HomeAssistant, enable_custom_integrations, aioclient_mock, socket_enabled, freezer
+):
+    responses = ResponseMocks()
+
+    async def next_response(*_):
+        return next(responses)
+
+    aioclient_mock.post(const.DATA_URL, side_effect=next_response)
+    start = dt.start_of_local_day()
+    responses.add_batch(start, [([0.2] * 24, [1.2] * 24), ([0.3] * 24, [1.3] * 24)])
+    responses.cyclic()
+    entry = MockConfigEntry(domain=const.DOMAIN, data={}, unique_id="frank_energie")
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    coordinator = hass.data[const.DOMAIN][entry.entry_id][const.CONF_COORDINATOR]
+    calls = aioclient_mock.call_count
+    index = coordinator.data[None][const.DATA_ELECTRICITY_INDEX]
+    generation = coordinator.data_generation
+    fetched_at = coordinator.fetched_at(None, const.REFRESH_PRICES)
+
+    # The public prices are no longer shared once they've expired
+    freezer.tick(const.PUBLIC_PRICES_CACHE_TTL + timedelta(seconds=1))
+    coordinator.scheduler.reschedule(const.REFRESH_PRICES, dt.utcnow())
+    await coordinator.async_refresh()
+
+    assert aioclient_mock.call_count == calls
+    assert coordinator.last_update_success
+    assert len(coordinator.data[None][const.DATA_ELECTRICITY].all) == 48
+    # Nothing was fetched, so the prices and everything derived from them are unchanged
+    assert coordinator.data[None][const.DATA_ELECTRICITY_INDEX] is index
+    assert coordinator.data_generation == generation
+    assert coordinator.fetched_at(None, const.REFRESH_PRICES) == fetched_at
+
+
+async def test_partial_first_refresh(hass: HomeAssistant, enable_custom_integrations, graphql, start_of_day):
+    graphql.sites = {"site-a": 0.2}
+    graphql.failing = {"monthSummary"}
+    entry = authenticated_entry({"site-a": "Hoofdstraat 1"})
+    entry.add_to_hass(hass)
+
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    # The costs couldn't be fetched, the sensors exist but are unavailable until they can
+    assert hass.states.get("sensor.actual_monthly_cost").state == STATE_UNAVAILABLE
+    assert hass.states.get("sensor.expected_cost_this_month").state == STATE_UNAVAILABLE
+    assert hass.states.get("sensor.invoice_current_period").state == "45.6"
+    assert hass.states.get("sensor.current_electricity_price_all_in").state == "0.2"
+
+    coordinator = hass.data[const.DOMAIN][entry.entry_id][const.CONF_COORDINATOR]
+    assert coordinator.scheduler.due(dt.utcnow()) == set()
+    graphql.failing = set()
+    coordinator.scheduler.reschedule(const.REFRESH_MONTH_SUMMARY, dt.utcnow())
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+
+    assert hass.states.get("sensor.actual_monthly_cost").state == "20.0"
+    assert graphql.fields("monthSummary") == [{"siteReference": "site-a"}] * 2
+    assert len(graphql.fields("invoices")) == 1
+
+
+async def test_expired_data(hass: HomeAssistant, enable_custom_integrations, graphql, start_of_day, freezer):
+    graphql.sites = {"site-a": 0.2}
+    entry = authenticated_entry({"site-a": "Hoofdstraat 1"})
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    coordinator = hass.data[const.DOMAIN][entry.entry_id][const.CONF_COORDINATOR]
+    assert hass.states.get("sensor.actual_monthly_cost").state == "20.0"
+
+    # The month summary keeps failing for longer than it's shown
+    graphql.failing = {"monthSummary"}
+    graphql.invoice_amount = 50.0
+    freezer.tick(const.DATA_TTL[const.REFRESH_MONTH_SUMMARY] + timedelta(minutes=1))
+    coordinator.scheduler.reschedule(const.REFRESH_MONTH_SUMMARY, dt.utcnow())
+    coordinator.scheduler.reschedule(const.REFRESH_INVOICES, dt.utcnow())
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+
+    assert coordinator.last_update_success
+    assert coordinator.data["site-a"][const.DATA_MONTH_SUMMARY] is None
+    assert hass.states.get("sensor.actual_monthly_cost").state == STATE_UNAVAILABLE
+    assert hass.states.get("sensor.expected_monthly_cost_until_now").state == STATE_UNAVAILABLE
+    # The entities after the expired ones are still updated
+    invoice = hass.states.get("sensor.invoice_current_period")
+    assert invoice.state == "50.0"
+    assert invoice.attributes[const.ATTR_FETCHED_AT] == dt.utcnow()
+
+
+async def test_first_prices_of_site_failed(
+    hass: HomeAssistant, enable_custom_integrations, graphql, start_of_day
+):
+    graphql.sites = {"site-a": 0.2, "site-b": None}
+    graphql.failing = {"marketPricesElectricity"}
+    entry = authenticated_entry({"site-a": "Hoofdstraat 1", "site-b": "Hoofdstraat 2"})
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    # The second site has no prices of its own, and the public prices it falls back to failed
+    assert hass.states.get("sensor.current_electricity_price_all_in").state == "0.2"
+    assert hass.states.get("sensor.current_electricity_price_all_in_hoofdstraat_2").state == STATE_UNAVAILABLE
+    assert hass.states.get("sensor.actual_monthly_cost_hoofdstraat_2").state == "30.0"
@@ -0,0 +1,119 @@
+from datetime import timedelta
+
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt
+from pytest_homeassistant_custom_component.common import MockConfigEntry, async_fire_time_changed
+
+from custom_components.frank_energie import const
+from tests.utils import ResponseMocks, authenticated_entry
+
+
+async def setup_public_entry(hass: HomeAssistant, aioclient_mock, electricity: list, gas: list):
+    """Set up an entry without an account, with the given public prices of today and tomorrow."""
+    responses = ResponseMocks()
+
+    async def next_response(*_):
+        return next(responses)
+
+    aioclient_mock.post(const.DATA_URL, side_effect=next_response)
+    responses.add_batch(dt.start_of_local_day(), [(electricity, gas), (electricity, gas)])
+    responses.cyclic()
+    entry = MockConfigEntry(domain=const.DOMAIN, data={}, unique_id="frank_energie")
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    return hass.data[const.DOMAIN][entry.entry_id][const.CONF_COORDINATOR]
+
+
+async def test_unchanged_state_not_written(
+    hass: HomeAssistant, enable_custom_integrations, aioclient_mock, socket_enabled, start_of_day, freezer
+):
+    coordinator = await setup_public_entry(hass, aioclient_mock, [0.2] * 24, [1.2] * 24)
+    states = {state.entity_id: state for state in hass.states.async_all()}
+    assert states
+    assert coordinator.suppressed_writes == 0
+
+    # Nothing has changed a second later, so none of the states is written again
+    freezer.tick(1)
+    coordinator.async_update_listeners()
+    await hass.async_block_till_done()
+
+    assert coordinator.suppressed_writes == len(states)
+    for state in hass.states.async_all():
+        assert state.last_updated == states[state.entity_id].last_updated
+
+
+async def test_same_prices_not_written(
+    hass: HomeAssistant, enable_custom_integrations, graphql, start_of_day, freezer
+):
+    graphql.sites = {"site-a": 0.2}
+    graphql.unpublished = {start_of_day.date() + timedelta(days=1)}
+    entry = authenticated_entry({"site-a": "Hoofdstraat 1"})
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    coordinator = hass.data[const.DOMAIN][entry.entry_id][const.CONF_COORDINATOR]
+    # Leave out the diagnostic sensors, the metrics of the requests do change
+    states = {
+        state.entity_id: state for state in hass.states.async_all() if const.ATTR_FETCHED_AT in state.attributes
+    }
+    writes = coordinator.suppressed_writes
+
+    # The prices of tomorrow are fetched again, today's prices are the same as before
+    freezer.tick(60)
+    coordinator.scheduler.reschedule(const.REFRESH_PRICES, dt.utcnow())
+    await coordinator.async_refresh()
+    await hass.async_block_till_done()
+
+    assert coordinator.fetched_at("site-a", const.REFRESH_PRICES) == dt.utcnow()
+    assert coordinator.suppressed_writes - writes >= len(states)
+    for entity_id, state in states.items():
+        assert hass.states.get(entity_id).last_updated == state.last_updated
+
+
+async def test_attributes_rebuilt_for_new_data(
+    hass: HomeAssistant, enable_custom_integrations, aioclient_mock, socket_enabled, start_of_day
+):
+    coordinator = await setup_public_entry(hass, aioclient_mock, [0.2] * 24, [1.2] * 24)
+    entity = hass.data["sensor"].get_entity("sensor.current_electricity_price_all_in")
+    attributes = entity.extra_state_attributes
+    generation = coordinator.data_generation
+
+    # The same attributes are used for as long as the data is the same
+    coordinator.async_update_listeners()
+    await hass.async_block_till_done()
+    assert entity.extra_state_attributes is attributes
+
+    # Changed options, like new data, cause the attributes to be rebuilt
+    hass.config_entries.async_update_entry(coordinator.entry, options={const.CONF_COMPACT_PRICES: True})
+    await hass.async_block_till_done()
+    assert coordinator.data_generation == generation + 1
+    assert entity.extra_state_attributes is not attributes
+    assert entity.extra_state_attributes != attributes
+    assert hass.states.get(entity.entity_id).attributes.items() >= entity.extra_state_attributes.items()
+
+
+async def test_update_at_slot_boundary(
+    hass: HomeAssistant, enable_custom_integrations, aioclient_mock, socket_enabled, start_of_day, freezer
+):
+    electricity = [round(0.1 + hour / 100, 2) for hour in range(24)]
+    gas = [round(1.0 + hour / 100, 2) for hour in range(24)]
+    coordinator = await setup_public_entry(hass, aioclient_mock, electricity, gas)
+    states = {state.entity_id: state for state in hass.states.async_all()}
+    assert states["sensor.current_electricity_price_all_in"].state == "0.24"
+    assert states["sensor.current_gas_price_all_in"].state == "1.14"
+
+    # A single timer lets all entities update their state at the next slot boundary, without a refresh
+    calls = aioclient_mock.call_count
+    boundary = coordinator.next_slot_boundary(dt.utcnow())
+    assert boundary == start_of_day + timedelta(hours=15)
+    freezer.move_to(boundary)
+    async_fire_time_changed(hass, boundary)
+    await hass.async_block_till_done()
+
+    assert aioclient_mock.call_count == calls
+    assert hass.states.get("sensor.current_electricity_price_all_in").state == "0.25"
+    assert hass.states.get("sensor.current_gas_price_all_in").state == "1.15"
+    written = [state for state in hass.states.async_all() if state.last_updated != states[state.entity_id].last_updated]
+    assert len(written) + coordinator.suppressed_writes == len(states)
+    assert coordinator.next_slot_boundary(dt.utcnow()) == start_of_day + timedelta(hours=16)
@@ -0,0 +1,60 @@
+from datetime import timedelta
+
+from homeassistant.util import dt
+
+from custom_components.frank_energie.history import PriceHistory
+from custom_components.frank_energie.price_index import PriceIndex
+from tests.utils import price_data
+
+
+def days_ago(days: int):
+    return dt.start_of_local_day() - timedelta(days=days)
+
+
+def test_add_complete_days():
+    history = PriceHistory(7)
+    # Yesterday, today and the first half of tomorrow
+    history.add(PriceIndex(price_data(days_ago(1), [0.1] * 24 + [0.2] * 24 + [0.3] * 12)))
+
+    today = dt.now().date()
+    assert [day.day for day in history] == [today - timedelta(days=1), today]
+    assert history.average(today - timedelta(days=1)) == 0.1
+    assert history.average(today + timedelta(days=1)) is None
+
+
+def test_evict_past_days():
+    history = PriceHistory(3)
+    for days in range(6, -1, -1):
+        history.add(PriceIndex(price_data(days_ago(days), [0.1 * days] * 24)))
+
+    today = dt.now().date()
+    assert [day.day for day in history] == [today - timedelta(days=days) for days in (3, 2, 1, 0)]
+    assert [day.day for day in history.past_days(today)] == [today - timedelta(days=days) for days in (3, 2, 1)]
+
+    history.resize(1)
+    assert [day.day for day in history] == [today - timedelta(days=1), today]
+
+
+def test_replace_and_insert_days():
+    history = PriceHistory(7)
+    history.add(PriceIndex(price_data(days_ago(1), [0.2] * 24)))
+    history.add(PriceIndex(price_data(days_ago(3), [0.4] * 24)))
+    history.add(PriceIndex(price_data(days_ago(1), [0.3] * 24)))
+
+    today = dt.now().date()
+    assert [(day.day, day.avg) for day in history] == [
+        (today - timedelta(days=3), 0.4),
+        (today - timedelta(days=1), 0.3),
+    ]
+
+
+def test_trailing_average():
+    history = PriceHistory(7)
+    today = dt.now().date()
+    assert history.trailing_average(today) is None
+    assert history.difference(0.2, today) is None
+
+    history.add(PriceIndex(price_data(days_ago(2), [0.1] * 24 + [0.3] * 24 + [0.25] * 24)))
+
+    assert history.trailing_average(today) == 0.2
+    assert history.difference(0.25, today) == 25.0
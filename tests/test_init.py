@@ -0,0 +1,75 @@
+from homeassistant.config_entries import ConfigEntryState
+from homeassistant.core import HomeAssistant
+from homeassistant.helpers import device_registry as dr
+
+from custom_components.frank_energie import const
+from tests.utils import authenticated_entry
+
+
+async def test_multiple_sites(hass: HomeAssistant, enable_custom_integrations, graphql, start_of_day):
+    graphql.sites = {"site-a": 0.2, "site-b": None}
+    entry = authenticated_entry()
+    entry.add_to_hass(hass)
+
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    # The first site is the primary site, the entities of the others have the address in their name
+    assert entry.title == "Hoofdstraat 1"
+    assert entry.data[const.CONF_SITES] == {"site-a": "Hoofdstraat 1", "site-b": "Hoofdstraat 2"}
+    primary = hass.states.get("sensor.current_electricity_price_all_in")
+    other = hass.states.get("sensor.current_electricity_price_all_in_hoofdstraat_2")
+    assert primary.name == "Current electricity price (All-in)"
+    assert other.name == "Current electricity price (All-in) (Hoofdstraat 2)"
+
+    # Each site has its own prices and costs, the second site falls back to the public prices
+    assert primary.state == "0.2"
+    assert other.state == "0.3"
+    assert hass.states.get("sensor.actual_monthly_cost").state == "20.0"
+    assert hass.states.get("sensor.actual_monthly_cost_hoofdstraat_2").state == "30.0"
+    assert len(dr.async_entries_for_config_entry(dr.async_get(hass), entry.entry_id)) == 4
+
+    # All data is fetched with a single query. The public prices are only fetched as a fallback for the
+    # site without prices of its own, once for each day
+    assert [query.get("operationName") for query in graphql.queries] == [
+        "Me", "Refresh", "MarketPrices", "MarketPrices"
+    ]
+    assert len(graphql.fields("marketPricesElectricity")) == 2
+    assert [fields["siteReference"] for fields in graphql.fields("monthSummary")] == ["site-a", "site-b"]
+
+
+async def test_cached_sites(hass: HomeAssistant, enable_custom_integrations, graphql, start_of_day):
+    entry = authenticated_entry({"site-a": "Hoofdstraat 1", "site-b": "Hoofdstraat 2"})
+    entry.add_to_hass(hass)
+    graphql.me_available.clear()
+
+    # The setup doesn't wait for the sites of the account when they're cached
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    assert entry.state is ConfigEntryState.LOADED
+    assert hass.states.get("sensor.current_electricity_price_all_in_hoofdstraat_2").state == "0.25"
+
+    # The sites are refreshed in the background, the entry isn't reloaded when they're unchanged
+    graphql.me_available.set()
+    await hass.async_block_till_done()
+    assert [query.get("operationName") for query in graphql.queries] == ["Me", "Refresh"]
+    assert entry.data[const.CONF_SITES] == {"site-a": "Hoofdstraat 1", "site-b": "Hoofdstraat 2"}
+    # Both sites have prices of their own, so the public prices aren't needed
+    assert graphql.fields("marketPricesElectricity") == []
+
+
+async def test_changed_sites(hass: HomeAssistant, enable_custom_integrations, graphql, start_of_day):
+    entry = authenticated_entry({"site-a": "Hoofdstraat 1"})
+    entry.add_to_hass(hass)
+    graphql.me_available.clear()
+
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    assert hass.states.get("sensor.current_electricity_price_all_in") is not None
+    assert hass.states.get("sensor.current_electricity_price_all_in_hoofdstraat_2") is None
+
+    # The entry is reloaded with the new site once the background refresh finds it
+    graphql.me_available.set()
+    await hass.async_block_till_done()
+    assert entry.state is ConfigEntryState.LOADED
+    assert entry.data[const.CONF_SITES] == {"site-a": "Hoofdstraat 1", "site-b": "Hoofdstraat 2"}
+    assert hass.states.get("sensor.current_electricity_price_all_in_hoofdstraat_2").state == "0.25"
+    assert [query.get("operationName") for query in graphql.queries].count("Refresh") == 2
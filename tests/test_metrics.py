@@ -0,0 +1,99 @@
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt
+from pytest_homeassistant_custom_component.common import MockConfigEntry
+from python_frank_energie import FrankEnergie
+
+from custom_components.frank_energie import const
+from custom_components.frank_energie.diagnostics import async_get_config_entry_diagnostics
+from custom_components.frank_energie.metrics import CoordinatorMetrics, InstrumentedFrankEnergie, query_kind
+from custom_components.frank_energie.sensor import DIAGNOSTIC_SENSOR_TYPES
+from tests.utils import ResponseMocks, authenticated_entry
+
+
+def test_query_kind():
+    assert query_kind({"query": "query Refresh($start0: Date!) { ... }", "operationName": "Refresh"}) == "refresh"
+    assert query_kind({"query": "mutation RenewToken { renewToken }"}) == "renew_token"
+    assert query_kind({"query": "query { customerMarketPrices }", "operationName": "MarketPrices"}) == "user_prices"
+    assert query_kind({"query": "query { marketPricesElectricity }", "operationName": "MarketPrices"}) == "prices"
+    assert query_kind({"query": "{ me { id } }"}) == "unknown"
+
+
+async def test_instrumented_client():
+    metrics = CoordinatorMetrics()
+    api = InstrumentedFrankEnergie(metrics)
+    responses = [{"data": {"monthSummary": {}}}, {"errors": [{"message": "Something went wrong"}]}, ValueError()]
+
+    with patch.object(FrankEnergie, "_query", AsyncMock(side_effect=responses)):
+        await api.async_query({"query": "", "operationName": "MonthSummary"})
+        await api.async_query({"query": "", "operationName": "MonthSummary"})
+        with pytest.raises(ValueError):
+            await api.async_query({"query": "", "operationName": "Invoices"})
+
+    assert metrics.requests == 3
+    assert metrics.failures == 2
+    assert metrics.query("month_summary").response_bytes == len('{"data":{"monthSummary":{}}}') + len(
+        '{"errors":[{"message":"Something went wrong"}]}'
+    )
+    assert metrics.query("month_summary").latency_histogram[0] == 2
+    assert metrics.token_renewals == 0
+
+
+async def test_diagnostics(hass: HomeAssistant, enable_custom_integrations, aioclient_mock, socket_enabled):
+    responses = ResponseMocks()
+
+    async def next_response(*_):
+        return next(responses)
+
+    aioclient_mock.post(const.DATA_URL, side_effect=next_response)
+    responses.add_batch(dt.start_of_local_day(), [([0.2] * 24, [1.2] * 24), ([0.3] * 24, [1.3] * 24)])
+    responses.cyclic()
+    entry = MockConfigEntry(domain=const.DOMAIN, data={}, unique_id="frank_energie")
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+
+    diagnostics = await async_get_config_entry_diagnostics(hass, entry)
+
+    assert diagnostics["metrics"]["requests"] == 1
+    assert diagnostics["metrics"]["queries"]["refresh"]["requests"] == 1
+    assert diagnostics["metrics"]["refreshes"] == 1
+    assert diagnostics["metrics"]["public_price_cache_misses"] == 2
+    assert diagnostics["schedule"][const.REFRESH_PRICES]["attempts"] == 0
+    assert hass.states.get("sensor.api_requests").state == "1"
+
+
+async def test_retry_after_rejected_tokens(hass: HomeAssistant, enable_custom_integrations, graphql, start_of_day):
+    graphql.sites = {"site-a": 0.2}
+    entry = authenticated_entry({"site-a": "Hoofdstraat 1"})
+    entry.add_to_hass(hass)
+    assert await hass.config_entries.async_setup(entry.entry_id)
+    await hass.async_block_till_done()
+    coordinator = hass.data[const.DOMAIN][entry.entry_id][const.CONF_COORDINATOR]
+
+    graphql.rejected_queries = 1
+    coordinator.scheduler.reschedule(const.REFRESH_MONTH_SUMMARY, dt.utcnow())
+    await coordinator.async_refresh()
+
+    # The rejected batched query is retried after renewing the tokens
+    assert coordinator.last_update_success
+    assert coordinator.metrics.query("refresh").requests == 3
+    assert coordinator.metrics.query("refresh").retries == 1
+    assert coordinator.metrics.token_renewals == 1
+    assert all(query.requests for query in coordinator.metrics.queries.values())
+
+    description = next(description for description in DIAGNOSTIC_SENSOR_TYPES if description.key == "api_latency")
+    assert set(description.metrics_attr_fn(coordinator.metrics)) == {
+        f"{kind}_average" for kind in coordinator.metrics.queries
+    }
+
+
+def test_latency_attributes_without_requests():
+    metrics = CoordinatorMetrics()
+    metrics.record_retry("month_summary")
+    metrics.record_query("refresh", 0.2, 100, False)
+
+    description = next(description for description in DIAGNOSTIC_SENSOR_TYPES if description.key == "api_latency")
+    assert description.metrics_attr_fn(metrics) == {"refresh_average": 0.2}
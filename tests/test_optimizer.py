@@ -0,0 +1,51 @@
+from datetime import timedelta
+
+import pytest
+
+from custom_components.frank_energie.optimizer import optimize_schedule
+from custom_components.frank_energie.price_index import PriceIndex
+from tests.utils import price_data
+
+
+async def test_charge_in_cheapest_slots(start_of_day):
+    index = PriceIndex(price_data(start_of_day, [0.1] * 14 + [0.3, 0.2, 0.15, 0.1, 0.12, 0.4, 0.5, 0.45]))
+
+    slots = optimize_schedule(index, energy=5, max_power=2, deadline=start_of_day + timedelta(hours=22))
+
+    assert [slot.start for slot in slots] == [
+        start_of_day + timedelta(hours=16),
+        start_of_day + timedelta(hours=17),
+        start_of_day + timedelta(hours=18),
+    ]
+    assert [slot.energy for slot in slots] == [1, 2, 2]
+    assert round(sum(slot.cost for slot in slots), 5) == 0.59
+
+
+async def test_charge_from_now(start_of_day):
+    # It's 14:15, so only three quarters of the current hour are left
+    index = PriceIndex(price_data(start_of_day, [0.1] * 14 + [0.1, 0.2, 0.3]))
+
+    slots = optimize_schedule(index, energy=2.5, max_power=2, deadline=start_of_day + timedelta(hours=17))
+
+    assert slots[0].start == start_of_day + timedelta(hours=14, minutes=15)
+    assert [slot.energy for slot in slots] == [1.5, 1]
+
+
+async def test_discharge_with_losses(start_of_day):
+    index = PriceIndex(price_data(start_of_day, [0.1] * 14 + [0.3, 0.2, 0.5, 0.1]))
+
+    slots = optimize_schedule(
+        index, energy=3, max_power=2, deadline=start_of_day + timedelta(hours=18), efficiency=0.8, discharge=True
+    )
+
+    assert [(slot.start, slot.energy) for slot in slots] == [
+        (start_of_day + timedelta(hours=14, minutes=15), -0.4),
+        (start_of_day + timedelta(hours=16), -2),
+    ]
+
+
+async def test_not_enough_time(start_of_day):
+    index = PriceIndex(price_data(start_of_day, [0.1] * 24))
+
+    with pytest.raises(ValueError):
+        optimize_schedule(index, energy=10, max_power=2, deadline=start_of_day + timedelta(hours=17))
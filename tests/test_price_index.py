@@ -0,0 +1,193 @@
+from datetime import timedelta
+from statistics import mean, pstdev
+
+import pytest
+from python_frank_energie.models import PriceData
+
+from custom_components.frank_energie.price_index import PriceIndex
+from tests.utils import price_data
+
+
+async def test_current_slot(start_of_day):
+    index = PriceIndex(price_data(start_of_day, [0.2] * 14 + [0.3] + [0.15] * 33))
+
+    assert index.slot_seconds == 3600
+    assert index.current_slot.total == 0.3
+    assert index.slot_at(start_of_day - timedelta(minutes=1)) is None
+    assert index.slot_at(start_of_day + timedelta(days=2)) is None
+
+
+async def test_current_slot_quarter_hours(start_of_day):
+    index = PriceIndex(price_data(start_of_day, [0.2] * 57 + [0.3] + [0.15] * 38, minutes=15))
+
+    assert index.slot_seconds == 900
+    assert index.current_slot.total == 0.3
+
+
+async def test_current_slot_with_gaps(start_of_day):
+    data = price_data(start_of_day, [0.2] * 8) + price_data(start_of_day + timedelta(hours=12), [0.3] * 6)
+    index = PriceIndex(data)
+
+    assert index.slot_seconds is None
+    assert index.slot_at(start_of_day + timedelta(hours=10)) is None
+    assert index.current_slot.total == 0.3
+
+
+async def test_next_boundary(start_of_day):
+    hourly = PriceIndex(price_data(start_of_day, [0.2] * 48))
+    quarters = PriceIndex(price_data(start_of_day, [0.2] * 192, minutes=15))
+    now = start_of_day + timedelta(hours=14, minutes=15)
+
+    assert hourly.next_boundary(now) == start_of_day + timedelta(hours=15)
+    assert quarters.next_boundary(now) == start_of_day + timedelta(hours=14, minutes=30)
+    assert quarters.next_boundary(start_of_day - timedelta(hours=1)) == start_of_day
+    assert quarters.next_boundary(start_of_day + timedelta(days=2)) is None
+
+
+async def test_next_boundary_with_gaps(start_of_day):
+    data = price_data(start_of_day, [0.2] * 8) + price_data(start_of_day + timedelta(hours=12), [0.3] * 6)
+    index = PriceIndex(data)
+
+    assert index.next_boundary(start_of_day + timedelta(hours=7, minutes=30)) == start_of_day + timedelta(hours=8)
+    assert index.next_boundary(start_of_day + timedelta(hours=10)) == start_of_day + timedelta(hours=12)
+
+
+async def test_day_stats(start_of_day):
+    index = PriceIndex(
+        price_data(start_of_day, [0.2] * 10 + [0.25, 0.3, 0.5, 0.4] + [0.15] * 10 + [0.3] * 12 + [0.1] * 12)
+    )
+
+    assert index.today_min.total == 0.15
+    assert index.today_min.date_from == start_of_day + timedelta(hours=14)
+    assert index.today_max.total == 0.5
+    assert index.today_max.date_from == start_of_day + timedelta(hours=12)
+    assert index.today_avg == 0.20625
+
+    tomorrow = index.day((start_of_day + timedelta(days=1)).date())
+    assert (tomorrow.start, tomorrow.end, tomorrow.min, tomorrow.max) == (24, 48, 0.1, 0.3)
+
+    with pytest.raises(ValueError):
+        index.day((start_of_day - timedelta(days=1)).date())
+
+
+async def test_ranks(start_of_day):
+    today = [0.2] * 14 + [0.3] + [0.15] * 9
+    index = PriceIndex(price_data(start_of_day, today + [0.1] * 24))
+
+    assert index.current_rank == 24
+    assert index.current_percentile == round(23 / 24 * 100, 1)
+    assert index.current_zscore == round((0.3 - mean(today)) / pstdev(today), 3)
+    assert not index.in_cheapest(4)
+    assert index.in_most_expensive(1)
+
+    # Equal prices share their rank, counted from either end
+    assert (index.ranks[0], index.ranks_desc[0], index.percentiles[0]) == (10, 2, 37.5)
+    assert (index.ranks[15], index.ranks_desc[15]) == (1, 16)
+    assert index.ranks[24:] == index.ranks_desc[24:]
+
+
+async def test_percentile_tied_prices(start_of_day):
+    index = PriceIndex(price_data(start_of_day, [0.1] * 6 + [0.3] * 8 + [0.2] * 10 + [0.3] * 24))
+
+    # Only strictly lower prices count, so equal prices share their percentile
+    assert index.current_percentile == 25
+    assert set(index.percentiles[:24]) == {0, 25, 66.7}
+    assert index.percentiles[6] == index.percentiles[13] == 66.7
+    assert index.percentiles[24] == 0
+
+    index = PriceIndex(price_data(start_of_day, [0.2], minutes=24 * 60))
+    assert index.current_percentile == 0
+
+
+async def test_ranks_quarter_hours(start_of_day):
+    index = PriceIndex(price_data(start_of_day, [0.2] * 56 + [0.1, 0.11, 0.12, 0.13] + [0.3] * 36, minutes=15))
+
+    assert index.current_rank == 2
+    assert index.in_cheapest(0.5)
+    assert not index.in_cheapest(0.25)
+    assert not index.in_most_expensive(8)
+
+
+async def test_empty_index(start_of_day):
+    index = PriceIndex(PriceData())
+
+    assert len(index) == 0
+    with pytest.raises(IndexError):
+        index.current_slot
+    with pytest.raises(ValueError):
+        index.today_min
+
+
+async def test_prices_attribute(start_of_day):
+    index = PriceIndex(price_data(start_of_day, [0.2, 0.3, 0.4]))
+
+    prices = index.prices_attribute("total")["prices"]
+    assert [price["price"] for price in prices] == [0.2, 0.3, 0.4]
+    assert prices[1]["from"] == start_of_day + timedelta(hours=1)
+    assert index.prices_attribute("total") is index.prices_attribute("total")
+
+
+async def test_compact_prices_attribute(start_of_day):
+    data = price_data(start_of_day, [0.2, 0.3]) + price_data(start_of_day + timedelta(hours=3), [0.4])
+    index = PriceIndex(data)
+
+    assert index.prices_attribute("total", compact=True) == {
+        "prices_start": start_of_day,
+        "prices_interval": 60,
+        "prices": [0.2, 0.3, None, 0.4],
+    }
+
+
+async def test_window(start_of_day):
+    # Prices from the current hour (14:00 local) on, with the cheapest 3 hours starting at 16:00
+    index = PriceIndex(price_data(start_of_day, [0.1] * 14 + [0.3, 0.2, 0.15, 0.1, 0.12, 0.4, 0.5, 0.45, 0.3, 0.3]))
+
+    cheapest = index.window(3)
+    assert cheapest.start == start_of_day + timedelta(hours=16)
+    assert cheapest.end == start_of_day + timedelta(hours=19)
+    assert cheapest.avg == 0.12333
+
+    most_expensive = index.window(2, cheapest=False)
+    assert most_expensive.start == start_of_day + timedelta(hours=20)
+    assert most_expensive.avg == 0.475
+
+    assert index.window(3) is index.window(3)
+    assert index.window(11) is None
+
+
+async def test_window_with_gaps(start_of_day):
+    data = price_data(start_of_day, [0.3] * 14 + [0.1, 0.1]) + price_data(
+        start_of_day + timedelta(hours=17), [0.1, 0.5, 0.5]
+    )
+    index = PriceIndex(data)
+
+    # The cheapest hours are followed by a gap, so a longer window can't include them
+    assert index.window(2).start == start_of_day + timedelta(hours=14)
+    assert index.window(3).start == start_of_day + timedelta(hours=17)
+
+
+async def test_window_quarter_hours(start_of_day):
+    index = PriceIndex(price_data(start_of_day, [0.2] * 57 + [0.3, 0.1, 0.1, 0.2] + [0.3] * 20, minutes=15))
+
+    window = index.window(0.5)
+    assert window.start == start_of_day + timedelta(minutes=58 * 15)
+    assert window.avg == 0.1
+
+
+async def test_window_rounded_to_slots(start_of_day, caplog):
+    quarter_hours = PriceIndex(price_data(start_of_day, [0.2] * 57 + [0.3, 0.1, 0.1, 0.2] + [0.3] * 20, minutes=15))
+    hours = PriceIndex(price_data(start_of_day, [0.1] * 14 + [0.3, 0.2, 0.15, 0.1, 0.12, 0.4]))
+
+    # 20 minutes is rounded to a single quarter-hour, 36 minutes to 2 of them
+    window = quarter_hours.window(1 / 3)
+    assert window.start == start_of_day + timedelta(minutes=58 * 15)
+    assert window.end == start_of_day + timedelta(minutes=59 * 15)
+    window = quarter_hours.window(0.6)
+    assert window.start == start_of_day + timedelta(minutes=58 * 15)
+    assert window.end == start_of_day + timedelta(minutes=60 * 15)
+    assert "doesn't fit slots of 15 minutes" in caplog.text
+
+    # A window is never shorter than a single slot
+    window = hours.window(0.25)
+    assert window.start == start_of_day + timedelta(hours=17)
+    assert window.end == start_of_day + timedelta(hours=18)
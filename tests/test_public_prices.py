@@ -0,0 +1,37 @@
+import asyncio
+from datetime import date
+from unittest.mock import AsyncMock, MagicMock
+
+import pytest
+from homeassistant.core import HomeAssistant
+
+from custom_components.frank_energie.public_prices import async_get_public_price_cache
+
+
+async def test_concurrent_requests_are_shared(hass: HomeAssistant):
+    api = MagicMock(prices=AsyncMock(return_value="prices"))
+    cache = async_get_public_price_cache(hass)
+
+    results = await asyncio.gather(
+        cache.async_get(api, date(2023, 3, 1), date(2023, 3, 2)),
+        async_get_public_price_cache(hass).async_get(api, date(2023, 3, 1), date(2023, 3, 2)),
+    )
+    assert results == ["prices", "prices"]
+    assert api.prices.await_count == 1
+
+    await cache.async_get(api, date(2023, 3, 1), date(2023, 3, 2))
+    assert api.prices.await_count == 1
+
+    await cache.async_get(api, date(2023, 3, 2), date(2023, 3, 3))
+    assert api.prices.await_count == 2
+
+
+async def test_failed_requests_are_not_cached(hass: HomeAssistant):
+    api = MagicMock(prices=AsyncMock(side_effect=[ValueError("Request failed"), "prices"]))
+    cache = async_get_public_price_cache(hass)
+
+    with pytest.raises(ValueError):
+        await cache.async_get(api, date(2023, 3, 1))
+
+    assert await cache.async_get(api, date(2023, 3, 1)) == "prices"
+    assert api.prices.await_count == 2
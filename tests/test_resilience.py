@@ -0,0 +1,93 @@
+from datetime import timedelta
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from python_frank_energie import FrankEnergie
+from python_frank_energie.exceptions import AuthException
+
+from custom_components.frank_energie.metrics import CoordinatorMetrics
+from custom_components.frank_energie.resilience import (
+    CIRCUIT_CLOSED,
+    CIRCUIT_HALF_OPEN,
+    CIRCUIT_OPEN,
+    CircuitBreaker,
+    CircuitOpenError,
+    ResilientFrankEnergie,
+)
+
+QUERY = {"query": "", "operationName": "MonthSummary"}
+
+
+def client(breaker: CircuitBreaker | None = None) -> ResilientFrankEnergie:
+    return ResilientFrankEnergie(CoordinatorMetrics(), breaker=breaker, backoff_min=timedelta(0))
+
+
+async def test_retry_transient_error():
+    api = client()
+    responses = [ValueError("Request failed"), ValueError("Request failed"), {"data": {"monthSummary": {}}}]
+
+    with patch.object(FrankEnergie, "_query", AsyncMock(side_effect=responses)):
+        assert await api.async_query(QUERY) == {"data": {"monthSummary": {}}}
+
+    assert api.metrics.query("month_summary").requests == 3
+    assert api.metrics.query("month_summary").retries == 2
+    assert api.breaker.failures == 0
+
+
+async def test_retry_gives_up():
+    api = client()
+
+    with patch.object(FrankEnergie, "_query", AsyncMock(side_effect=ValueError("Request failed"))) as query:
+        with pytest.raises(ValueError):
+            await api.async_query(QUERY)
+
+    assert query.call_count == 3
+    assert api.breaker.failures == 3
+
+
+async def test_no_retry_of_api_errors():
+    api = client()
+
+    with patch.object(FrankEnergie, "_query", AsyncMock(side_effect=AuthException())) as query:
+        with pytest.raises(AuthException):
+            await api.async_query(QUERY)
+
+    assert query.call_count == 1
+
+
+async def test_circuit_breaker():
+    breaker = CircuitBreaker(threshold=2, reset_timeout=timedelta(minutes=5))
+    api = client(breaker)
+
+    with patch.object(FrankEnergie, "_query", AsyncMock(side_effect=ValueError("Request failed"))) as query:
+        with pytest.raises(ValueError):
+            await api.async_query(QUERY)
+        assert query.call_count == 2
+        assert breaker.state == CIRCUIT_OPEN
+
+        with pytest.raises(CircuitOpenError):
+            await api.async_query(QUERY)
+        assert query.call_count == 2
+
+    # After the timeout a single probe is let through
+    with patch("custom_components.frank_energie.resilience.monotonic", return_value=breaker._opened_at + 301):
+        assert breaker.state == CIRCUIT_HALF_OPEN
+        assert breaker.acquire()
+        assert not breaker.acquire()
+        breaker.record_success()
+
+    assert breaker.state == CIRCUIT_CLOSED
+    assert breaker.as_dict() == {"state": CIRCUIT_CLOSED, "failures": 0, "opened": 1, "rejected": 2}
+
+
+async def test_failed_probe_reopens_circuit():
+    breaker = CircuitBreaker(threshold=1, reset_timeout=timedelta(minutes=5))
+    breaker.acquire()
+    breaker.record_failure()
+
+    with patch("custom_components.frank_energie.resilience.monotonic", return_value=breaker._opened_at + 301):
+        assert breaker.acquire()
+        breaker.record_failure()
+        assert breaker.state == CIRCUIT_OPEN
+
+    assert breaker.opened == 1
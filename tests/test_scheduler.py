@@ -0,0 +1,52 @@
+from datetime import datetime, timedelta
+
+from homeassistant.util import dt
+
+from custom_components.frank_energie import const
+from custom_components.frank_energie.scheduler import RefreshScheduler, next_price_refresh
+
+TZ = dt.get_time_zone(const.PRICE_TIME_ZONE)
+
+
+def local(day: int, hour: int, minute: int = 0) -> datetime:
+    return datetime(2023, 3, day, hour, minute, tzinfo=TZ)
+
+
+def test_next_price_refresh_all_prices_known():
+    assert next_price_refresh(local(1, 18), local(3, 0)) == local(2, 13)
+
+
+def test_next_price_refresh_before_publication():
+    assert next_price_refresh(local(1, 9), local(2, 0)) == local(1, 13)
+
+
+def test_next_price_refresh_during_publication():
+    now = local(1, 14)
+    next_refresh = next_price_refresh(now, local(2, 0))
+
+    assert now < next_refresh <= now + const.PRICE_PUBLICATION_POLL_INTERVAL * 1.2
+
+
+def test_next_price_refresh_late_publication():
+    assert next_price_refresh(local(1, 17), local(2, 0)) is None
+    assert next_price_refresh(local(1, 9), None) is None
+
+
+def test_scheduler_backoff():
+    now = local(1, 9)
+    scheduler = RefreshScheduler([const.REFRESH_PRICES, const.REFRESH_INVOICES])
+    assert scheduler.due(now) == {const.REFRESH_PRICES, const.REFRESH_INVOICES}
+
+    scheduler.reschedule(const.REFRESH_INVOICES, now + const.INVOICES_REFRESH_INTERVAL)
+    intervals = []
+    for _ in range(6):
+        scheduler.backoff([const.REFRESH_PRICES], now)
+        intervals.append(scheduler.next_interval(now))
+
+    assert scheduler.due(now) == set()
+    assert intervals[0] <= const.REFRESH_BACKOFF_MIN * 1.2
+    assert intervals[-1] >= const.REFRESH_BACKOFF_MAX * 0.8
+    assert all(interval <= const.REFRESH_BACKOFF_MAX * 1.2 for interval in intervals)
+
+    scheduler.reschedule(const.REFRESH_PRICES, now + timedelta(hours=4))
+    assert scheduler.next_interval(now) == timedelta(hours=4)
@@ -0,0 +1,225 @@
+from datetime import date, timedelta
+from unittest.mock import AsyncMock, MagicMock
+
+from homeassistant.components.recorder import Recorder
+from homeassistant.components.recorder.statistics import get_last_statistics, statistics_during_period
+from homeassistant.core import HomeAssistant
+from homeassistant.util import dt
+from python_frank_energie.models import MarketPrices, PriceData
+from pytest_homeassistant_custom_component.components.recorder.common import async_wait_recording_done
+
+from custom_components.frank_energie import const, statistics
+from custom_components.frank_energie.coordinator import build_price_indexes
+from custom_components.frank_energie.history import PriceHistory
+from custom_components.frank_energie.price_index import PriceIndex
+from custom_components.frank_energie.statistics import PriceStatistics, UsageStatistics, hourly_price_statistics
+from tests.utils import price_data
+
+
+def test_hourly_price_statistics(start_of_day):
+    index = PriceIndex(price_data(start_of_day, [0.1, 0.2, 0.3, 0.4, 0.5, 0.5, 0.5, 0.5], minutes=15))
+
+    rows = hourly_price_statistics(index)
+
+    assert [(row["start"], row["mean"], row["min"], row["max"]) for row in rows] == [
+        (start_of_day, 0.25, 0.1, 0.4),
+        (start_of_day + timedelta(hours=1), 0.5, 0.5, 0.5),
+    ]
+    assert hourly_price_statistics(index, after=start_of_day.timestamp()) == rows[1:]
+    assert hourly_price_statistics(index, until=(start_of_day + timedelta(minutes=90)).timestamp()) == rows[:1]
+
+
+async def test_import(recorder_mock: Recorder, hass: HomeAssistant, start_of_day, monkeypatch):
+    monkeypatch.setattr(statistics, "STATISTICS_BACKFILL_DAYS", 2)
+    monkeypatch.setattr(statistics, "STATISTICS_BACKFILL_DELAY", timedelta(0))
+    hass.config.components.add("recorder")
+
+    api = MagicMock()
+    api.prices = AsyncMock(
+        side_effect=lambda start, end: MarketPrices(
+            electricity=price_data(start_of_day - (start_of_day.date() - start).days * timedelta(days=1), [0.1] * 24),
+            gas=PriceData(),
+        )
+    )
+    data = {None: {
+        const.DATA_ELECTRICITY: price_data(start_of_day, [0.2] * 48),
+        const.DATA_GAS: price_data(start_of_day, [1.0] * 24),
+        const.DATA_ELECTRICITY_HISTORY: PriceHistory(7),
+        const.DATA_GAS_HISTORY: PriceHistory(7),
+    }}
+    build_price_indexes(data[None])
+    importer = PriceStatistics(hass, api, {None: "Frank Energie"})
+
+    await importer.async_import(data)
+    await async_wait_recording_done(hass)
+
+    assert api.prices.await_count == 2
+    stats = await recorder_mock.async_add_executor_job(
+        statistics_during_period,
+        hass,
+        start_of_day - timedelta(days=3),
+        None,
+        {"frank_energie:electricity_price", "frank_energie:gas_price"},
+        "hour",
+        None,
+        {"mean"},
+    )
+    # The backfilled days, and the hours of today that have ended by 14:15
+    assert len(stats["frank_energie:electricity_price"]) == 2 * 24 + 14
+    assert stats["frank_energie:electricity_price"][0]["mean"] == 0.1
+    assert len(stats["frank_energie:gas_price"]) == 14
+
+    # Hours that were imported before are not imported again, and no days are missing anymore
+    importer = PriceStatistics(hass, api, {None: "Frank Energie"})
+    await importer.async_import(data)
+
+    await async_wait_recording_done(hass)
+
+    assert api.prices.await_count == 2
+    last = await recorder_mock.async_add_executor_job(
+        get_last_statistics, hass, 1, "frank_energie:electricity_price", False, {"mean"}
+    )
+    assert last["frank_energie:electricity_price"][0]["start"] == (start_of_day + timedelta(hours=13)).timestamp()
+
+
+async def test_import_site_prices(recorder_mock: Recorder, hass: HomeAssistant, start_of_day, monkeypatch):
+    monkeypatch.setattr(statistics, "STATISTICS_BACKFILL_DAYS", 2)
+    monkeypatch.setattr(statistics, "STATISTICS_BACKFILL_DELAY", timedelta(0))
+    hass.config.components.add("recorder")
+
+    api = MagicMock()
+    api.prices = AsyncMock(return_value=MarketPrices(electricity=PriceData(), gas=PriceData()))
+    api.user_prices = AsyncMock(
+        side_effect=lambda start, site: MarketPrices(
+            electricity=price_data(start_of_day - (start_of_day.date() - start).days * timedelta(days=1), [0.3] * 24),
+            gas=PriceData(),
+        )
+    )
+    data = {"1234AB 10": {
+        const.DATA_ELECTRICITY: price_data(start_of_day, [0.2] * 24),
+        const.DATA_GAS: PriceData(),
+        const.DATA_ELECTRICITY_HISTORY: PriceHistory(7),
+        const.DATA_GAS_HISTORY: PriceHistory(7),
+    }}
+    build_price_indexes(data["1234AB 10"])
+    importer = PriceStatistics(hass, api, {"1234AB 10": "Street 10"})
+
+    await importer.async_import(data)
+    await async_wait_recording_done(hass)
+
+    # The statistic of the site is backfilled with its own prices, not the public ones
+    assert api.prices.await_count == 0
+    assert [call.args for call in api.user_prices.await_args_list] == [
+        (start_of_day.date() - timedelta(days=2), "1234AB 10"),
+        (start_of_day.date() - timedelta(days=1), "1234AB 10"),
+    ]
+    stats = await recorder_mock.async_add_executor_job(
+        statistics_during_period,
+        hass,
+        start_of_day - timedelta(days=3),
+        None,
+        {"frank_energie:electricity_price_1234ab_10"},
+        "hour",
+        None,
+        {"mean"},
+    )
+    assert {row["mean"] for row in stats["frank_energie:electricity_price_1234ab_10"][:48]} == {0.3}
+
+
+async def test_usage_import(recorder_mock: Recorder, hass: HomeAssistant, start_of_day, monkeypatch):
+    monkeypatch.setattr(statistics, "USAGE_BACKFILL_DAYS", 3)
+    monkeypatch.setattr(statistics, "USAGE_CHUNK_DAYS", 2)
+    monkeypatch.setattr(statistics, "USAGE_REQUEST_DELAY", timedelta(0))
+    monkeypatch.setattr(statistics, "USAGE_FINAL_AFTER", timedelta(days=2))
+    hass.config.components.add("recorder")
+    published = {start_of_day.date() - timedelta(days=3), start_of_day.date() - timedelta(days=2)}
+
+    def usage(day: str) -> dict:
+        start = dt.start_of_local_day(date.fromisoformat(day))
+        items = [
+            {"from": (start + timedelta(hours=hour)).isoformat(), "usage": 1.0, "costs": 0.3} for hour in range(24)
+        ] if date.fromisoformat(day) in published else []
+        return {"electricity": {"items": items}, "gas": None, "feedIn": {"items": []}}
+
+    async def query(document: dict) -> dict:
+        dates = {name: value for name, value in document["variables"].items() if name.startswith("date")}
+        return {"data": {f"day{name[4:]}": usage(day) for name, day in dates.items()}}
+
+    api = MagicMock(async_query=AsyncMock(side_effect=query))
+    importer = UsageStatistics(
+        hass, "entry", api, MagicMock(async_ensure_valid=AsyncMock()), {"1234AB 10": "Street 10"}
+    )
+
+    await importer.async_import()
+    await async_wait_recording_done(hass)
+
+    # Two chunks, the last day isn't imported as its meter readings may still arrive
+    assert api.async_query.await_count == 2
+    assert await importer.store.async_load() == {"1234AB 10": "2023-02-27"}
+    last = await recorder_mock.async_add_executor_job(
+        get_last_statistics, hass, 1, "frank_energie:electricity_usage_1234ab_10", True, {"sum"}
+    )
+    assert last["frank_energie:electricity_usage_1234ab_10"][0]["sum"] == 48
+
+    # Only the days after the checkpoint are fetched
+    published.add(start_of_day.date() - timedelta(days=1))
+    await importer.async_import()
+    await async_wait_recording_done(hass)
+
+    assert api.async_query.await_count == 3
+    assert await importer.store.async_load() == {"1234AB 10": "2023-02-28"}
+    last = await recorder_mock.async_add_executor_job(
+        get_last_statistics, hass, 1, "frank_energie:electricity_cost_1234ab_10", True, {"sum"}
+    )
+    assert last["frank_energie:electricity_cost_1234ab_10"][0]["sum"] == round(72 * 0.3, 5)
+
+
+async def test_usage_arriving_late(recorder_mock: Recorder, hass: HomeAssistant, start_of_day, monkeypatch):
+    monkeypatch.setattr(statistics, "USAGE_BACKFILL_DAYS", 2)
+    monkeypatch.setattr(statistics, "USAGE_REQUEST_DELAY", timedelta(0))
+    hass.config.components.add("recorder")
+    yesterday = start_of_day - timedelta(days=1)
+    # Hours of the usage of yesterday that have arrived, of electricity and gas
+    arrived = {"electricity": 12, "gas": 0}
+
+    def usage(day: str) -> dict:
+        start = dt.start_of_local_day(date.fromisoformat(day))
+        hours = arrived if start == yesterday else {"electricity": 24, "gas": 24}
+        return {
+            kind: {
+                "items": [
+                    {"from": (start + timedelta(hours=hour)).isoformat(), "usage": 1.0, "costs": 0.3}
+                    for hour in range(hours[kind])
+                ]
+            }
+            for kind in ("electricity", "gas")
+        }
+
+    async def query(document: dict) -> dict:
+        dates = {name: value for name, value in document["variables"].items() if name.startswith("date")}
+        return {"data": {f"day{name[4:]}": usage(day) for name, day in dates.items()}}
+
+    async def last_sum(kind: str) -> float:
+        statistic_id = f"frank_energie:{kind}_usage_1234ab_10"
+        last = await recorder_mock.async_add_executor_job(get_last_statistics, hass, 1, statistic_id, True, {"sum"})
+        return last[statistic_id][0]["sum"]
+
+    api = MagicMock(async_query=AsyncMock(side_effect=query))
+    importer = UsageStatistics(
+        hass, "entry", api, MagicMock(async_ensure_valid=AsyncMock()), {"1234AB 10": "Street 10"}
+    )
+
+    await importer.async_import()
+    await async_wait_recording_done(hass)
+
+    assert await importer.store.async_load() == {"1234AB 10": str(yesterday.date())}
+    assert (await last_sum("electricity"), await last_sum("gas")) == (36, 24)
+
+    # The partial day is fetched again, and the usage that arrived since then is added
+    arrived.update(electricity=24, gas=24)
+    await importer.async_import()
+    await async_wait_recording_done(hass)
+
+    assert api.async_query.await_count == 2
+    assert await importer.store.async_load() == {"1234AB 10": str(yesterday.date())}
+    assert (await last_sum("electricity"), await last_sum("gas")) == (48, 48)
@@ -0,0 +1,75 @@
+from datetime import datetime, timedelta
+
+from homeassistant.util import dt
+from python_frank_energie.models import Invoices, MonthSummary, PriceData
+
+from custom_components.frank_energie import const, storage
+from custom_components.frank_energie.history import PriceHistory
+from custom_components.frank_energie.price_index import PriceIndex
+from tests.utils import ResponseMocks, price_data
+
+
+def test_encode_decode_data():
+    start_of_day = datetime.utcnow().replace(hour=0, minute=0)
+    electricity = PriceData(
+        ResponseMocks()._generate_prices_response(start_of_day, [0.2] * 12 + [0.3] * 12)
+    )
+    gas = PriceData(ResponseMocks()._generate_prices_response(start_of_day, [1.23] * 24))
+    month_summary = MonthSummary(12.3, 13.4, 50.1, "2023-01-01")
+    invoices = Invoices(
+        previousPeriodInvoice=None,
+        currentPeriodInvoice=Invoices.Invoice(start_of_day.astimezone(), "January", 45.6),
+        upcomingPeriodInvoice=None,
+    )
+    history = PriceHistory(7)
+    history.add(PriceIndex(price_data(dt.start_of_local_day() - timedelta(days=1), [0.1] * 24)))
+
+    data = storage.decode_data(
+        storage.encode_data(
+            {
+                const.DATA_ELECTRICITY: electricity,
+                const.DATA_GAS: gas,
+                const.DATA_MONTH_SUMMARY: month_summary,
+                const.DATA_INVOICES: invoices,
+                const.DATA_ELECTRICITY_HISTORY: history,
+                const.DATA_GAS_HISTORY: PriceHistory(7),
+            }
+        )
+    )
+
+    assert [p.total for p in data[const.DATA_ELECTRICITY].all] == [p.total for p in electricity.all]
+    assert [p.date_from for p in data[const.DATA_GAS].all] == [p.date_from for p in gas.all]
+    assert data[const.DATA_GAS].all[-1].date_till - data[const.DATA_GAS].all[0].date_from == timedelta(days=1)
+    assert data[const.DATA_MONTH_SUMMARY] == month_summary
+    assert data[const.DATA_INVOICES] == invoices
+    assert [day.avg for day in data[const.DATA_ELECTRICITY_HISTORY]] == [day.avg for day in history] == [0.1]
+    assert len(data[const.DATA_GAS_HISTORY]) == 0
+
+
+def test_encode_decode_unauthenticated_data():
+    data = storage.decode_data(
+        storage.encode_data(
+            {
+                const.DATA_ELECTRICITY: PriceData(),
+                const.DATA_GAS: PriceData(),
+                const.DATA_MONTH_SUMMARY: None,
+                const.DATA_INVOICES: None,
+                const.DATA_ELECTRICITY_HISTORY: PriceHistory(7),
+                const.DATA_GAS_HISTORY: PriceHistory(7),
+            }
+        )
+    )
+
+    assert data[const.DATA_ELECTRICITY].all == []
+    assert data[const.DATA_MONTH_SUMMARY] is None
+    assert data[const.DATA_INVOICES] is None
+
+
+def test_encode_decode_fetched_at():
+    now = dt.utcnow()
+    fetched_at = {None: {const.REFRESH_PRICES: now}, "site-a": {const.REFRESH_INVOICES: now - timedelta(days=1)}}
+
+    assert storage.decode_fetched_at(storage.encode_sites_data({}, fetched_at)) == fetched_at
+    assert storage.decode_fetched_at(storage.encode_sites_data({})) == {}
+    # Data stored before the fetch times were
+    assert storage.decode_fetched_at({"sites": []}) == {}
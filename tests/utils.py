@@ -1,7 +1,14 @@
-from datetime import datetime, timedelta
+import asyncio
+import re
+from datetime import date, datetime, timedelta
 from http import HTTPStatus
 
-from homeassistant.const import CONTENT_TYPE_JSON
+import jwt
+from homeassistant.const import CONF_ACCESS_TOKEN, CONF_TOKEN, CONF_USERNAME, CONTENT_TYPE_JSON
+from homeassistant.util import dt
+from python_frank_energie.exceptions import AuthException
+from python_frank_energie.models import PriceData
+from pytest_homeassistant_custom_component.common import MockConfigEntry
 from pytest_homeassistant_custom_component.test_util.aiohttp import (
     AiohttpClientMockResponse,
 )
@@ -61,6 +68,29 @@ class ResponseMocks:
             )
         )
 
+    def add_batch(
+        self,
+        start_date: datetime,
+        days: list[tuple[list, list]],
+        http_status: int = HTTPStatus.OK,
+    ):
+        """Add a response mock to a batched query, with the electricity and gas prices of each day."""
+        data = {}
+        for day, (electricity_prices, gas_prices) in enumerate(days):
+            day_start = start_date + timedelta(days=day)
+            data[f"electricity{day}"] = self._generate_prices_response(day_start, electricity_prices)
+            data[f"gas{day}"] = self._generate_prices_response(day_start, gas_prices)
+
+        self._responses.append(
+            AiohttpClientMockResponse(
+                "POST",
+                const.DATA_URL,
+                json={"data": data},
+                headers={"Content-Type": CONTENT_TYPE_JSON},
+                status=http_status,
+            )
+        )
+
     def _generate_prices_response(self, start: datetime, all_in_prices: list | range):
         """Generate a list of prices."""
         start = start.replace(second=0, microsecond=0)
@@ -75,3 +105,169 @@ class ResponseMocks:
             }
             for i, price in enumerate(all_in_prices)
         ]
+
+
+def price_data(start: datetime, prices: list, minutes: int = 60) -> PriceData:
+    """Generate price data with the given all-in prices, for periods of the given length."""
+    response = ResponseMocks()._generate_prices_response(start, prices)
+    for i, price in enumerate(response):
+        price["from"] = (start + timedelta(minutes=i * minutes)).isoformat()
+        price["till"] = (start + timedelta(minutes=(i + 1) * minutes)).isoformat()
+    return PriceData(response)
+
+
+class GraphQLMock:
+    """Answers the queries of the integration like the API, as a replacement of FrankEnergie._query.
+
+    Each site of the account has its own electricity price, the public prices are the same for everyone.
+    A site without a price has no prices of its own, like a site of a customer without a dynamic contract.
+    Fields in `failing` return an error, like a query that fails on the side of the API. The tokens
+    are rejected for the given number of `rejected_queries`, until they're renewed. The sites of the
+    account are only returned once `me_available` is set. The prices of the days in `unpublished`
+    are empty, like those of tomorrow before they're published.
+    """
+
+    PUBLIC_ELECTRICITY_PRICE = 0.3
+    PUBLIC_GAS_PRICE = 1.3
+
+    def __init__(self, sites: dict[str, float | None] | None = None):
+        self.sites = dict(sites or {})
+        self.failing: set[str] = set()
+        self.rejected_queries = 0
+        self.queries: list[dict] = []
+        self.me_available = asyncio.Event()
+        self.me_available.set()
+        self.invoice_amount = 45.6
+        self.unpublished: set[date] = set()
+
+    def fields(self, field: str) -> list[dict]:
+        """Return the arguments of each time a field was queried."""
+        return [
+            arguments
+            for query in self.queries
+            for name, arguments in self._fields(query)
+            if name == field
+        ]
+
+    async def __call__(self, query: dict) -> dict:
+        self.queries.append(query)
+        if query.get("operationName") == "RenewToken":
+            return {"data": {"renewToken": {"authToken": access_token(), "refreshToken": "renewed"}}}
+        if self.rejected_queries:
+            self.rejected_queries -= 1
+            raise AuthException
+        if query.get("operationName") == "Me":
+            await self.me_available.wait()
+            return {"data": {"me": self._me()}}
+
+        data, errors = {}, []
+        for alias, (field, arguments) in zip(self._aliases(query), self._fields(query)):
+            if field in self.failing:
+                data[alias] = None
+                errors.append({"message": f"Failed to query {field}", "path": [alias]})
+            elif field == "customerMarketPrices" and self.sites[arguments["siteReference"]] is None:
+                data[alias] = None
+                errors.append({"message": "No marketprices found for segment ELECTRICITY", "path": [alias]})
+            else:
+                data[alias] = self._field(field, arguments)
+        return {"data": data, "errors": errors} if errors else {"data": data}
+
+    @staticmethod
+    def _aliases(query: dict) -> list[str]:
+        return [alias or field for alias, field, _ in GraphQLMock._parse(query)]
+
+    @staticmethod
+    def _fields(query: dict) -> list[tuple[str, dict]]:
+        variables = query.get("variables") or {}
+        return [
+            (field, {
+                name: variables.get(value[1:], value)
+                for name, value in (argument.split(": ") for argument in arguments.split(", "))
+            })
+            for _, field, arguments in GraphQLMock._parse(query)
+        ]
+
+    @staticmethod
+    def _parse(query: dict) -> list[tuple[str, str, str]]:
+        """Return the alias, name and arguments of each field with arguments, after the operation's header."""
+        return re.findall(r"(?:(\w+):\s*)?(\w+)\(([^)]*)\)", query["query"].split("{", 1)[1])
+
+    def _field(self, field: str, arguments: dict) -> dict | list | None:
+        mocks = ResponseMocks()
+        if field in ("marketPricesElectricity", "marketPricesGas"):
+            day = date.fromisoformat(arguments["startDate"])
+            price = self.PUBLIC_ELECTRICITY_PRICE if field == "marketPricesElectricity" else self.PUBLIC_GAS_PRICE
+            return mocks._generate_prices_response(dt.start_of_local_day(day), self._day_prices(day, price))
+        if field == "customerMarketPrices":
+            day = date.fromisoformat(arguments["date"])
+            start = dt.start_of_local_day(day)
+            return {
+                "electricityPrices": mocks._generate_prices_response(
+                    start, self._day_prices(day, self.sites[arguments["siteReference"]])
+                ),
+                "gasPrices": mocks._generate_prices_response(start, self._day_prices(day, self.PUBLIC_GAS_PRICE)),
+            }
+        if field == "monthSummary":
+            price = self.sites[arguments["siteReference"]] or self.PUBLIC_ELECTRICITY_PRICE
+            return {
+                "actualCostsUntilLastMeterReadingDate": 100 * price,
+                "expectedCostsUntilLastMeterReadingDate": 110 * price,
+                "expectedCosts": 200 * price,
+                "lastMeterReadingDate": "2023-03-01",
+            }
+        if field == "invoices":
+            return {
+                "previousPeriodInvoice": None,
+                "currentPeriodInvoice": {
+                    "StartDate": "2023-03-01", "PeriodDescription": "Maart", "TotalAmount": self.invoice_amount
+                },
+                "upcomingPeriodInvoice": None,
+            }
+        raise ValueError(f"Unexpected field {field}")
+
+    def _day_prices(self, day: date, price: float | None) -> list:
+        return [] if day in self.unpublished else [price] * 24
+
+    def _me(self) -> dict:
+        return {
+            "id": "1",
+            "email": "user@example.com",
+            "countryCode": "NL",
+            "advancedPaymentAmount": 100,
+            "treesCount": 0,
+            "hasInviteLink": False,
+            "hasCO2Compensation": False,
+            "deliverySites": [
+                {
+                    "reference": reference,
+                    "segments": ["ELECTRICITY", "GAS"],
+                    "address": {
+                        "street": "Hoofdstraat",
+                        "houseNumber": str(number),
+                        "houseNumberAddition": None,
+                        "zipCode": "1234 AB",
+                        "city": "Amsterdam",
+                    },
+                    "status": "IN_DELIVERY",
+                }
+                for number, reference in enumerate(self.sites, 1)
+            ],
+        }
+
+
+def access_token() -> str:
+    """Return an access token that expires in a year."""
+    return jwt.encode({"exp": int((dt.utcnow() + timedelta(days=365)).timestamp())}, "secret")
+
+
+def authenticated_entry(sites: dict[str, str] | None = None) -> MockConfigEntry:
+    """Return a config entry of an account, with the given sites and their titles when they're known."""
+    data = {CONF_USERNAME: "user@example.com", CONF_ACCESS_TOKEN: access_token(), CONF_TOKEN: "refresh"}
+    if sites:
+        data.update({const.CONF_SITE_REFERENCE: next(iter(sites)), const.CONF_SITES: sites})
+    return MockConfigEntry(
+        domain=const.DOMAIN,
+        data=data,
+        unique_id="user@example.com",
+        title=next(iter(sites.values())) if sites else "user@example.com",
+    )